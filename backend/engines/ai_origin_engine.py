@@ -4,29 +4,41 @@ Detects whether message is likely AI-generated scam or human-written
 """
 
 import math
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+from engines.keyword_registry import KEYWORDS, KeywordHits
 
 class AIOriginEngine:
     def __init__(self):
-        self.ai_markers = [
+        self.ai_markers = KEYWORDS.register("ai_origin.markers", [
             "act now", "limited time", "verify immediately",
             "failure to comply", "avoid suspension",
             "click the link below"
-        ]
+        ])
+        self.generic_greetings = KEYWORDS.register("ai_origin.greetings", [
+            "dear customer", "dear user"
+        ])
 
-    async def analyze(self, content: str, mode: str) -> Dict:
-        text = content.lower()
+    async def analyze(
+        self,
+        content: str,
+        mode: str,
+        hits: Optional[KeywordHits] = None,
+        lower: Optional[str] = None
+    ) -> Dict:
+        text = lower if lower is not None else content.lower()
+        hits = hits if hits is not None else KEYWORDS.scan(text)
         findings = []
         score = 0
 
         # 1️⃣ Over-polished grammar + urgency
-        urgency_count = sum(1 for k in self.ai_markers if k in text)
+        urgency_count = hits.count_of(self.ai_markers)
         if urgency_count >= 2:
             score += 20
             findings.append("AI-style urgency phrasing detected")
 
         # 2️⃣ Generic personalization
-        if "dear customer" in text or "dear user" in text:
+        if hits.any_of(self.generic_greetings):
             score += 15
             findings.append("Generic AI-style personalization detected")
 
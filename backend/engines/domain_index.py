@@ -0,0 +1,205 @@
+"""
+Domain Index
+Public-suffix-aware domain lookups in O(label count):
+
+  LabelTrie         reversed-label trie for curated lists (risky TLDs,
+                    shorteners, known brands); matches a domain or any
+                    parent of it
+  PublicSuffixList  the bundled offline PSL (data/public_suffix_list.dat)
+                    compiled into a LabelTrie with wildcard / exception
+                    rules; gives public suffix and registrable domain
+  DomainSet         allow/deny lists with millions of entries loaded from
+                    a local file; stores 64-bit label-suffix digests
+                    (blake2b, stable across processes and restarts) in one
+                    sorted NumPy array (8 bytes/domain instead of a dict
+                    node per label)
+
+PUBLIC_SUFFIX_LIST     path to a newer PSL copy      (default: bundled)
+DOMAIN_ALLOWLIST_FILE  one domain per line, optional (hosts-file lines OK)
+DOMAIN_DENYLIST_FILE   one domain per line, optional
+"""
+
+import hashlib
+import os
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+import numpy as np
+
+BUNDLED_PSL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "public_suffix_list.dat")
+
+_END = "$"        # a rule / entry ends at this node
+_EXCEPTION = "!"  # PSL exception rule ends at this node
+
+
+def _digest(domain: str) -> int:
+    # Not hash(): that is salted per process (PYTHONHASHSEED)
+    return int.from_bytes(hashlib.blake2b(domain.encode("utf-8"), digest_size=8).digest(), "little", signed=True)
+
+
+def _labels(domain: str) -> list:
+    return domain.strip().strip(".").lower().split(".")[::-1]
+
+
+class LabelTrie:
+    """Reversed-label trie: com -> paypal -> www."""
+
+    def __init__(self, domains: Iterable[str] = ()):
+        self._root: Dict[str, Any] = {}
+        self.size = 0
+        for domain in domains:
+            self.add(domain)
+
+    def add(self, domain: str, value: Any = True):
+        node = self._root
+        for label in _labels(domain.lstrip(".")):
+            node = node.setdefault(label, {})
+        if _END not in node:
+            self.size += 1
+        node[_END] = value
+
+    def match(self, host: str) -> Optional[Any]:
+        """Value of the longest entry equal to host or a parent of it."""
+        node = self._root
+        found = None
+        for label in _labels(host):
+            node = node.get(label)
+            if node is None:
+                break
+            if _END in node:
+                found = node[_END]
+        return found
+
+    def __contains__(self, host: str) -> bool:
+        return self.match(host) is not None
+
+    def __len__(self) -> int:
+        return self.size
+
+
+class PublicSuffixList:
+    def __init__(self, rules: Iterable[str]):
+        self._root: Dict[str, Any] = {}
+        for rule in rules:
+            exception = rule.startswith("!")
+            node = self._root
+            for label in _labels(rule.lstrip("!")):
+                node = node.setdefault(label, {})
+            node[_EXCEPTION if exception else _END] = True
+
+    @classmethod
+    def from_file(cls, path: str) -> "PublicSuffixList":
+        def rules() -> Iterator[str]:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    rule = line.split(None, 1)[0] if line.strip() else ""
+                    if not rule or rule.startswith("//"):
+                        continue
+                    yield rule
+                    if not rule.isascii():
+                        # Hosts may arrive Unicode or punycoded
+                        try:
+                            yield rule.encode("idna").decode("ascii")
+                        except UnicodeError:
+                            pass
+        return cls(rules())
+
+    def is_known_tld(self, label: str) -> bool:
+        return label.lower() in self._root
+
+    def suffix_length(self, host: str) -> int:
+        """Number of labels in the public suffix (unknown TLD: 1)."""
+        node = self._root
+        length = 1
+        for i, label in enumerate(_labels(host)):
+            nxt = node.get(label)
+            if nxt is not None and _EXCEPTION in nxt:
+                return i
+            if nxt is None:
+                nxt = node.get("*")
+                if nxt is None:
+                    break
+            if _END in nxt:
+                length = i + 1
+            node = nxt
+        return length
+
+    def public_suffix(self, host: str) -> str:
+        labels = host.strip(".").lower().split(".")
+        return ".".join(labels[-self.suffix_length(host):])
+
+    def registrable_domain(self, host: str) -> str:
+        """eTLD+1, or "" when host is itself a public suffix."""
+        labels = host.strip(".").lower().split(".")
+        length = self.suffix_length(host)
+        if len(labels) <= length:
+            return ""
+        return ".".join(labels[-(length + 1):])
+
+
+class DomainSet:
+    """Membership of a domain or any parent domain, for very large lists."""
+
+    def __init__(self, domains: Iterable[str]):
+        hashes = np.fromiter((_digest(d) for d in self._clean(domains)), dtype=np.int64)
+        self._hashes = np.unique(hashes)
+
+    @staticmethod
+    def _clean(domains: Iterable[str]) -> Iterator[str]:
+        for line in domains:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                # hosts-file lines: "0.0.0.0 evil.example"
+                yield line.split()[-1].strip(".").lower()
+
+    @classmethod
+    def from_file(cls, path: str) -> "DomainSet":
+        with open(path, encoding="utf-8") as f:
+            return cls(f)
+
+    def __contains__(self, host: str) -> bool:
+        hashes = self._hashes
+        size = len(hashes)
+        if not size:
+            return False
+        labels = host.strip(".").lower().split(".")
+        for i in range(len(labels)):
+            h = _digest(".".join(labels[i:]))
+            pos = hashes.searchsorted(h)
+            if pos < size and hashes[pos] == h:
+                return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+
+class DomainIndex:
+    def __init__(
+        self,
+        psl: PublicSuffixList,
+        allowlist: Optional[DomainSet] = None,
+        denylist: Optional[DomainSet] = None
+    ):
+        self.psl = psl
+        self.allowlist = allowlist
+        self.denylist = denylist
+
+    @classmethod
+    def from_env(cls) -> "DomainIndex":
+        allow = os.environ.get("DOMAIN_ALLOWLIST_FILE")
+        deny = os.environ.get("DOMAIN_DENYLIST_FILE")
+        return cls(
+            PublicSuffixList.from_file(os.environ.get("PUBLIC_SUFFIX_LIST", BUNDLED_PSL)),
+            DomainSet.from_file(allow) if allow else None,
+            DomainSet.from_file(deny) if deny else None
+        )
+
+    def is_allowlisted(self, host: str) -> bool:
+        return self.allowlist is not None and host in self.allowlist
+
+    def is_denylisted(self, host: str) -> bool:
+        return self.denylist is not None and host in self.denylist
+
+
+# Process-wide index (workers inherit it on fork)
+DOMAINS = DomainIndex.from_env()
@@ -2,6 +2,10 @@
 import re
 from typing import List, Dict, Optional
 
+from engines.domain_index import DOMAINS
+from engines.rule_packs import RULES
+from engines.raw_email import parse_received_chain
+
 class EmailHeaderEngine:
     """Detects email spoofing and header manipulation"""
     
@@ -78,18 +82,16 @@ class EmailHeaderEngine:
         from_domain = self._extract_domain(from_header)
         return_domain = self._extract_domain(return_path)
         
-        # Check if domains match
-        if from_domain and return_domain and from_domain != return_domain:
+        # Check if domains match (mail.paypal.com and paypal.com do)
+        if from_domain and return_domain and self._registrable(from_domain) != self._registrable(return_domain):
             score += 20
             findings.append(f"Domain mismatch: From ({from_domain}) vs Return-Path ({return_domain})")
         
-        # Check for common spoofing domains
-        suspicious_domains = ['gmail', 'yahoo', 'outlook', 'hotmail', 'paypal', 'amazon']
-        for domain in suspicious_domains:
-            if domain in from_domain and not from_domain.endswith(f'{domain}.com'):
-                score += 25
-                findings.append(f"Suspicious domain mimicking {domain}")
-                break
+        # Check for domains mimicking protected brands (gmail, paypal, ...)
+        matches = RULES.brands.lookup(from_domain) if from_domain else []
+        if matches:
+            score += 25
+            findings.append(f"Suspicious domain mimicking {matches[0].brand}")
         
         return score
     
@@ -104,7 +106,7 @@ class EmailHeaderEngine:
             from_domain = self._extract_domain(from_header)
             reply_domain = self._extract_domain(reply_to)
             
-            if from_domain != reply_domain:
+            if self._registrable(from_domain) != self._registrable(reply_domain):
                 score += 20
                 findings.append(f"Reply-To address differs from sender domain")
         
@@ -124,14 +126,19 @@ class EmailHeaderEngine:
                 findings.append(f"Routing through suspicious region detected")
                 break
         
-        # Check for excessive hops
-        hop_count = received.count('received:')
+        # Check for excessive hops (one structured hop per Received header)
+        hop_count = len(parse_received_chain(received))
         if hop_count > 10:
             score += 8
             findings.append(f"Excessive routing hops detected ({hop_count})")
         
         return score
     
+    def _registrable(self, domain: str) -> str:
+        if not domain:
+            return ''
+        return DOMAINS.psl.registrable_domain(domain) or domain
+
     def _extract_domain(self, email_string: str) -> str:
         """Extract domain from email address"""
         match = re.search(r'@([\w.-]+)', email_string)
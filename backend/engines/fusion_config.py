@@ -0,0 +1,194 @@
+"""
+Fusion Configuration
+Everything that turns per-engine scores into the final verdict, loaded
+ONCE at startup from a versioned JSON file written by backend_train.py:
+
+  weights       logistic weights over per-engine scores (column = engine
+                name, value = its highest risk_score / 100) + has_urls
+  calibration   platt (sigmoid of a*margin + b) or isotonic (piecewise
+                linear over the margin): calibrated phishing probability
+  thresholds    phishing verdict cut-off, zero-trust URL floor,
+                consensus rule (engines >= score, how many, forced score)
+
+Without a config file (or with one that has no weights) the built-in
+rules apply: highest engine score, 70 URL floor, 2 engines >= 60 force
+95, phishing at >= 70. A run stopped early by a decisive engine always
+keeps its decisive score: the weights are fitted on full runs only.
+
+FUSION_CONFIG  path of the JSON config  (default: data/fusion_config.json)
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("CyberSentinel")
+
+FORMAT_VERSION = 1
+HAS_URLS = "has_urls"
+BUNDLED_CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "fusion_config.json")
+
+DEFAULT_CONSENSUS = {"engine_score": 60.0, "min_engines": 2, "forced_score": 95.0}
+
+
+def engine_scores(engines: Iterable[Dict[str, Any]]) -> Dict[str, float]:
+    """Engine name -> highest risk_score (URL engines report once per URL)."""
+    scores: Dict[str, float] = {}
+    for result in engines:
+        name = result["engine_name"]
+        score = float(result["risk_score"])
+        if score > scores.get(name, -1.0):
+            scores[name] = score
+    return scores
+
+
+class Calibration:
+    """Margin -> probability."""
+
+    def __init__(self, method: str = "sigmoid", a: float = 1.0, b: float = 0.0,
+                 x: Sequence[float] = (), y: Sequence[float] = ()):
+        if method not in ("sigmoid", "platt", "isotonic"):
+            raise ValueError(f"Unknown calibration method: {method}")
+        if method == "isotonic" and (len(x) < 2 or len(x) != len(y)):
+            raise ValueError("Isotonic calibration needs matching x / y knots")
+        self.method = method
+        self.a = a
+        self.b = b
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+
+    def __call__(self, margin: np.ndarray) -> np.ndarray:
+        if self.method == "isotonic":
+            return np.interp(margin, self.x, self.y)
+        z = np.clip(self.a * margin + self.b, -35.0, 35.0)
+        return 1.0 / (1.0 + np.exp(-z))
+
+    def to_json(self) -> Dict[str, Any]:
+        if self.method == "isotonic":
+            return {"method": "isotonic", "x": self.x.tolist(), "y": self.y.tolist()}
+        return {"method": self.method, "a": self.a, "b": self.b}
+
+
+class FusionConfig:
+    def __init__(
+        self,
+        columns: Sequence[str] = (),
+        weights: Optional[Sequence[float]] = None,
+        bias: float = 0.0,
+        calibration: Optional[Calibration] = None,
+        phishing_threshold: float = 70.0,
+        url_floor: Optional[float] = 70.0,
+        consensus: Optional[Dict[str, float]] = DEFAULT_CONSENSUS,
+        version: str = "builtin",
+        metrics: Optional[Dict[str, Any]] = None
+    ):
+        self.columns = list(columns)
+        self.weights = None if weights is None else np.asarray(weights, dtype=np.float64)
+        if self.weights is not None and self.weights.size != len(self.columns):
+            raise ValueError(f"{self.weights.size} weights for {len(self.columns)} columns")
+        self.bias = float(bias)
+        self.calibration = calibration or Calibration()
+        self.phishing_threshold = float(phishing_threshold)
+        self.url_floor = None if url_floor is None else float(url_floor)
+        self.consensus = dict(consensus) if consensus else None
+        self.version = version
+        self.metrics = metrics or {}
+        self._index = {name: i for i, name in enumerate(self.columns)}
+
+    # ---------------- LOADING ----------------
+    @classmethod
+    def from_json(cls, state: Dict[str, Any]) -> "FusionConfig":
+        if state.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported fusion config format: {state.get('format_version')}")
+        calibration = state.get("calibration")
+        return cls(
+            columns=state.get("columns", ()),
+            weights=state.get("weights"),
+            bias=state.get("bias", 0.0),
+            calibration=Calibration(**calibration) if calibration else None,
+            phishing_threshold=state.get("phishing_threshold", 70.0),
+            url_floor=state.get("url_floor", 70.0),
+            consensus=state.get("consensus", DEFAULT_CONSENSUS),
+            version=state.get("version", "unversioned"),
+            metrics=state.get("metrics")
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "FusionConfig":
+        with open(path) as f:
+            return cls.from_json(json.load(f))
+
+    @classmethod
+    def from_env(cls) -> "FusionConfig":
+        path = os.environ.get("FUSION_CONFIG", BUNDLED_CONFIG)
+        if not os.path.exists(path):
+            return cls()
+        try:
+            config = cls.load(path)
+        except (OSError, ValueError, TypeError, KeyError):
+            # A bad retune must not take the service down: keep the rules
+            logger.exception("Ignoring unusable fusion config %s", path)
+            return cls()
+        logger.info("Fusion config %s loaded from %s", config.version, path)
+        return config
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "format_version": FORMAT_VERSION,
+            "version": self.version,
+            "columns": self.columns,
+            "weights": None if self.weights is None else self.weights.tolist(),
+            "bias": self.bias,
+            "calibration": self.calibration.to_json(),
+            "phishing_threshold": self.phishing_threshold,
+            "url_floor": self.url_floor,
+            "consensus": self.consensus,
+            "metrics": self.metrics
+        }
+
+    def save(self, path: str):
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.to_json(), f, indent=2)
+        os.replace(tmp, path)
+
+    # ---------------- SCORING ----------------
+    @property
+    def trained(self) -> bool:
+        return self.weights is not None
+
+    def row(self, engines: Iterable[Dict[str, Any]], has_urls: bool) -> np.ndarray:
+        """One message's feature row in column order (unknown engines ignored)."""
+        x = np.zeros(len(self.columns))
+        for name, score in engine_scores(engines).items():
+            i = self._index.get(name)
+            if i is not None:
+                x[i] = score / 100.0
+        i = self._index.get(HAS_URLS)
+        if i is not None:
+            x[i] = float(has_urls)
+        return x
+
+    def probability(self, matrix: np.ndarray) -> np.ndarray:
+        """Calibrated phishing probability for every row of a feature matrix."""
+        return self.calibration(matrix @ self.weights + self.bias)
+
+    def score(self, engines: List[Dict[str, Any]], has_urls: bool) -> float:
+        """Fused 0-100 risk score of one message."""
+        return float(self.probability(self.row(engines, has_urls)[None, :])[0]) * 100.0
+
+    def consensus_vote(self, engines: Iterable[Dict[str, Any]]) -> Tuple[bool, Optional[float], Optional[str]]:
+        rule = self.consensus
+        if rule is None:
+            return False, None, None
+        high = sum(1 for r in engines if r["risk_score"] >= rule["engine_score"])
+        if high >= rule["min_engines"]:
+            return True, rule["forced_score"], "Multiple engines agree on phishing"
+        return False, None, None
+
+
+# Process-wide config, read once at startup
+FUSION = FusionConfig.from_env()
@@ -0,0 +1,133 @@
+"""
+IDN & Script Analysis
+Host labels are decoded from punycode (xn--) and classified by Unicode
+script, so homograph hosts survive to the engines instead of being
+ASCII-folded away by text normalization:
+
+  mixed script       one label mixes scripts (pаypal: Latin + Cyrillic);
+                     Latin + Han/Kana/Hangul is allowed as in UTS #39
+  whole-script spoof a single non-Latin script label made only of Latin
+                     look-alikes (раура: all Cyrillic)
+  bad punycode       xn-- label that does not decode
+
+Label results are memoized: the same IDN hosts recur across a campaign.
+skeleton() is shared with the look-alike engine.
+"""
+
+import unicodedata
+from functools import lru_cache
+from typing import FrozenSet, Tuple
+
+LABEL_CACHE_SIZE = 8192
+
+# Look-alike characters -> the Latin letter they imitate (after NFKC + lower)
+_CONFUSABLES = {
+    # digits / symbols
+    "0": "o", "1": "l", "3": "e", "4": "a", "5": "s", "7": "t", "8": "b", "9": "g",
+    "|": "l", "!": "l", "$": "s", "@": "a",
+    # Cyrillic
+    "а": "a", "в": "b", "е": "e", "ё": "e", "һ": "h", "і": "i", "ї": "i", "ј": "j",
+    "к": "k", "м": "m", "н": "h", "о": "o", "р": "p", "с": "c", "т": "t", "у": "y",
+    "х": "x", "ԁ": "d", "ѕ": "s", "ԛ": "q", "ԝ": "w", "ү": "y", "ӏ": "l", "ɡ": "g",
+    # Greek
+    "α": "a", "β": "b", "ε": "e", "η": "n", "ι": "i", "κ": "k", "ν": "v", "ο": "o",
+    "ρ": "p", "τ": "t", "υ": "u", "χ": "x", "ω": "w",
+    # Latin variants
+    "ı": "i", "ł": "l", "ø": "o", "đ": "d", "ħ": "h", "ŀ": "l", "ɩ": "i", "ƅ": "b",
+}
+
+# Multi-character confusables, mapped to one prototype (TR39 direction)
+_SEQUENCES = (("m", "rn"), ("w", "vv"))
+
+COMMON = "COMMON"
+
+# Unicode character-name prefixes that are not script names
+_SCRIPT_ALIASES = {"CJK": "HAN", "KATAKANA-HIRAGANA": "KATAKANA", "MODIFIER": COMMON}
+
+# UTS #39 "highly restrictive": Latin may mix with these East Asian sets
+_ALLOWED_MIXES = (
+    frozenset({"LATIN", "HAN", "HIRAGANA", "KATAKANA"}),
+    frozenset({"LATIN", "HAN", "BOPOMOFO"}),
+    frozenset({"LATIN", "HAN", "HANGUL"}),
+)
+
+
+def skeleton(text: str) -> str:
+    """Confusable skeleton: strings that look alike share one skeleton."""
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = "".join(_CONFUSABLES.get(ch, ch) for ch in text)
+    # Strip accents (é -> e) after mapping so mapped letters stay intact
+    text = "".join(
+        ch for ch in unicodedata.normalize("NFKD", text)
+        if not unicodedata.combining(ch)
+    )
+    for char, prototype in _SEQUENCES:
+        text = text.replace(char, prototype)
+    return text
+
+
+def char_script(ch: str) -> str:
+    """Script of a letter (LATIN, CYRILLIC, HAN...); COMMON for the rest."""
+    if ch.isascii():
+        return "LATIN" if ch.isalpha() else COMMON
+    if unicodedata.category(ch)[0] != "L":
+        # digits, punctuation and combining marks inherit the label's script
+        return COMMON
+    name = unicodedata.name(ch, "")
+    if not name:
+        return "UNKNOWN"
+    prefix = name.split(" ", 1)[0]
+    return _SCRIPT_ALIASES.get(prefix, prefix)
+
+
+def decode_label(label: str) -> str:
+    """Unicode form of a punycode label (undecodable labels are returned as is)."""
+    if label.startswith("xn--"):
+        try:
+            return label.encode("ascii").decode("idna")
+        except UnicodeError:
+            return label
+    return label
+
+
+class LabelInfo:
+    __slots__ = ("label", "unicode", "scripts", "mixed_script", "whole_script_spoof", "bad_punycode")
+
+    def __init__(self, label: str):
+        self.label = label
+        self.unicode = decode_label(label)
+        self.bad_punycode = label.startswith("xn--") and self.unicode == label
+
+        text = unicodedata.normalize("NFKC", self.unicode).lower()
+        scripts = frozenset(char_script(ch) for ch in text) - {COMMON}
+        self.scripts: FrozenSet[str] = scripts
+        self.mixed_script = len(scripts) > 1 and not any(scripts <= allowed for allowed in _ALLOWED_MIXES)
+        self.whole_script_spoof = (
+            len(scripts) == 1
+            and "LATIN" not in scripts
+            and all(_CONFUSABLES.get(ch, ch).isascii() for ch in text)
+        )
+
+    @property
+    def suspicious(self) -> bool:
+        return self.mixed_script or self.whole_script_spoof or self.bad_punycode
+
+    def __repr__(self) -> str:
+        return f"LabelInfo({self.unicode!r}, scripts={sorted(self.scripts)})"
+
+
+@lru_cache(maxsize=LABEL_CACHE_SIZE)
+def _label_info(label: str) -> LabelInfo:
+    return LabelInfo(label)
+
+
+def host_labels(host: str) -> Tuple[LabelInfo, ...]:
+    """Per-label IDN / script info, only for labels that need it."""
+    return tuple(
+        _label_info(label) for label in host.split(".")
+        if label and (not label.isascii() or label.startswith("xn--"))
+    )
+
+
+def unicode_host(host: str) -> str:
+    return ".".join(decode_label(label) for label in host.split("."))
@@ -1,13 +1,19 @@
 # backend/engines/intent_engine.py
 
+from engines.keyword_registry import KEYWORDS
+
+MONEY_WORDS = KEYWORDS.register("intent.money", ["fee", "payment", "pay", "processing fee", "transfer"])
+CREDENTIAL_WORDS = KEYWORDS.register("intent.credential", ["verify", "login", "password", "otp", "account access"])
+PERSONAL_DATA_WORDS = KEYWORDS.register("intent.personal_data", ["ssn", "aadhar", "pan", "id proof"])
+
 class IntentEngine:
     """
     Detects the primary malicious intent behind a message.
     Focuses on WHAT the attacker wants, not just keywords.
     """
 
-    def analyze(self, content: str):
-        text = content.lower()
+    def analyze(self, content: str, hits=None):
+        hits = hits if hits is not None else KEYWORDS.scan(content.lower())
 
         intent = {
             "primary_goal": "Unknown",
@@ -17,21 +23,21 @@ class IntentEngine:
         }
 
         # Money extraction intent
-        if any(word in text for word in ["fee", "payment", "pay", "processing fee", "transfer"]):
+        if hits.any_of(MONEY_WORDS):
             intent["primary_goal"] = "Extract Money"
             intent["malicious_intent"] = True
             intent["confidence"] = 0.90
             intent["signals"].append("Requests direct or indirect payment")
 
         # Credential theft intent
-        elif any(word in text for word in ["verify", "login", "password", "otp", "account access"]):
+        elif hits.any_of(CREDENTIAL_WORDS):
             intent["primary_goal"] = "Steal Credentials"
             intent["malicious_intent"] = True
             intent["confidence"] = 0.85
             intent["signals"].append("Requests account verification or credentials")
 
         # Personal data harvesting
-        elif any(word in text for word in ["ssn", "aadhar", "pan", "id proof"]):
+        elif hits.any_of(PERSONAL_DATA_WORDS):
             intent["primary_goal"] = "Harvest Personal Data"
             intent["malicious_intent"] = True
             intent["confidence"] = 0.80
@@ -0,0 +1,251 @@
+"""
+Shared Keyword Registry
+Every engine registers its phrase lists here. All phrases are compiled
+into ONE Aho-Corasick automaton, so a message is scanned a single time
+no matter how many engines (or keywords) are active.
+
+register() returns a live KeywordGroup handle, not a frozen tuple: rule
+packs (engines/rule_packs.py) can replace a group's phrases at runtime.
+KeywordHits resolve a handle against the group table compiled into the
+automaton that produced them, so one scan never mixes two rule versions.
+"""
+
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+Groups = Dict[str, Tuple[str, ...]]
+
+
+class KeywordGroup:
+    """Live handle on a registered group (iterates its current phrases)."""
+
+    __slots__ = ("name", "_registry")
+
+    def __init__(self, name: str, registry: "KeywordRegistry"):
+        self.name = name
+        self._registry = registry
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._registry.group(self.name))
+
+    def __len__(self) -> int:
+        return len(self._registry.group(self.name))
+
+    def __contains__(self, phrase: str) -> bool:
+        return phrase in self._registry.group(self.name)
+
+    def __repr__(self) -> str:
+        return f"KeywordGroup({self.name!r})"
+
+
+class KeywordHits:
+    """
+    Shared match table for one scanned text.
+    Semantics are identical to `phrase in text` (substring match).
+    """
+
+    __slots__ = ("_first", "groups")
+
+    def __init__(self, first: Dict[str, int], groups: Optional[Groups] = None):
+        # phrase -> offset of its first occurrence
+        self._first = first
+        # group table of the automaton that produced these hits
+        self.groups = groups or {}
+
+    def _phrases(self, phrases: Iterable[str]) -> Iterable[str]:
+        if isinstance(phrases, KeywordGroup):
+            return self.groups.get(phrases.name, ())
+        return phrases
+
+    def __contains__(self, phrase: str) -> bool:
+        return phrase in self._first
+
+    def __len__(self) -> int:
+        return len(self._first)
+
+    def any_of(self, phrases: Iterable[str]) -> bool:
+        first = self._first
+        return any(p in first for p in self._phrases(phrases))
+
+    def count_of(self, phrases: Iterable[str]) -> int:
+        first = self._first
+        return sum(1 for p in self._phrases(phrases) if p in first)
+
+    def matched(self, phrases: Iterable[str]) -> List[str]:
+        first = self._first
+        return [p for p in self._phrases(phrases) if p in first]
+
+    def position(self, phrase: str) -> Optional[int]:
+        return self._first.get(phrase)
+
+    def phrases(self) -> FrozenSet[str]:
+        return frozenset(self._first)
+
+    def after(self, earlier: Iterable[str]) -> "KeywordHits":
+        """
+        These hits preceded by phrases seen in earlier text (streamed
+        windows); an earlier phrase's first occurrence is offset -1.
+        """
+        return KeywordHits({**self._first, **dict.fromkeys(earlier, -1)}, self.groups)
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton compiled to a full DFA
+    (one dict lookup per input character, no failure-link walking).
+    """
+
+    def __init__(self, phrases: Iterable[str], groups: Optional[Groups] = None):
+        self.phrases: Tuple[str, ...] = tuple(dict.fromkeys(p for p in phrases if p))
+        self.groups: Groups = groups or {}
+        self._delta, self._out = self._build(self.phrases)
+
+    @classmethod
+    def from_groups(cls, groups: Groups) -> "KeywordAutomaton":
+        return cls((p for phrases in groups.values() for p in phrases), groups)
+
+    @staticmethod
+    def _build(phrases: Tuple[str, ...]):
+        goto: List[Dict[str, int]] = [{}]
+        out: List[Tuple[int, ...]] = [()]
+
+        # ---- Trie ----
+        for pid, phrase in enumerate(phrases):
+            state = 0
+            for ch in phrase:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto.append({})
+                    out.append(())
+                    goto[state][ch] = nxt
+                state = nxt
+            out[state] += (pid,)
+
+        # ---- Failure links folded into the transition table (BFS) ----
+        fail = [0] * len(goto)
+        delta: List[Dict[str, int]] = [{} for _ in goto]
+        delta[0] = dict(goto[0])
+
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            f = fail[state]
+            out[state] = out[state] + out[f]
+
+            table = dict(delta[f])
+            table.update(goto[state])
+            delta[state] = table
+
+            for ch, child in goto[state].items():
+                fail[child] = delta[f].get(ch, 0) if state else 0
+                queue.append(child)
+
+        return delta, out
+
+    def scan(self, text: str) -> KeywordHits:
+        delta = self._delta
+        out = self._out
+        phrases = self.phrases
+        first: Dict[str, int] = {}
+
+        state = 0
+        for i, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                for pid in out[state]:
+                    phrase = phrases[pid]
+                    if phrase not in first:
+                        first[phrase] = i - len(phrase) + 1
+
+        return KeywordHits(first, self.groups)
+
+    def occurrences(self, text: str) -> Iterator[Tuple[int, int]]:
+        """(end offset, phrase id) of EVERY occurrence, in end-offset order."""
+        delta = self._delta
+        out = self._out
+
+        state = 0
+        for i, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                for pid in out[state]:
+                    yield i, pid
+
+
+class KeywordRegistry:
+    """
+    Named phrase groups from every engine, compiled on demand.
+    Re-registering a group with new phrases triggers a recompile;
+    scans in flight keep using the automaton they started with.
+
+    Rule-pack overrides sit on top of the registered (built-in) phrases:
+    build() compiles a candidate off the request path, install() swaps
+    overrides and automaton in one step.
+    """
+
+    def __init__(self):
+        self._groups: Groups = {}      # built-in phrases, from register()
+        self._overrides: Groups = {}   # rule-pack phrases, from install()
+        self._automaton: Optional[KeywordAutomaton] = None
+        self._pinned: ContextVar[Optional[KeywordAutomaton]] = ContextVar("keyword_automaton", default=None)
+        self._lock = threading.Lock()
+
+    def register(self, group: str, phrases: Iterable[str]) -> KeywordGroup:
+        phrases = tuple(p.lower() for p in phrases)
+        with self._lock:
+            if self._groups.get(group) != phrases:
+                self._groups[group] = phrases
+                if group not in self._overrides:
+                    self._automaton = None
+        return KeywordGroup(group, self)
+
+    def group(self, name: str) -> Tuple[str, ...]:
+        overrides = self._overrides
+        return overrides[name] if name in overrides else self._groups[name]
+
+    def builtin(self, name: str) -> Tuple[str, ...]:
+        return self._groups[name]
+
+    def groups(self) -> Groups:
+        """Snapshot of every registered group (name -> current phrases)."""
+        with self._lock:
+            return {**self._groups, **self._overrides}
+
+    def build(self, overrides: Groups) -> KeywordAutomaton:
+        """Compiles built-ins + overrides without installing anything."""
+        unknown = overrides.keys() - self._groups.keys()
+        if unknown:
+            raise ValueError(f"Unknown keyword groups: {sorted(unknown)}")
+        return KeywordAutomaton.from_groups({**self._groups, **overrides})
+
+    def install(self, overrides: Groups, automaton: KeywordAutomaton):
+        with self._lock:
+            self._overrides = dict(overrides)
+            self._automaton = automaton
+
+    def compile(self) -> KeywordAutomaton:
+        with self._lock:
+            if self._automaton is None:
+                self._automaton = KeywordAutomaton.from_groups({**self._groups, **self._overrides})
+            return self._automaton
+
+    @contextmanager
+    def pinned(self, automaton: KeywordAutomaton) -> Iterator[KeywordAutomaton]:
+        """Scans in this context use `automaton`, whatever gets installed."""
+        token = self._pinned.set(automaton)
+        try:
+            yield automaton
+        finally:
+            self._pinned.reset(token)
+
+    def scan(self, text: str) -> KeywordHits:
+        automaton = self._pinned.get() or self._automaton or self.compile()
+        return automaton.scan(text)
+
+
+# Process-wide registry shared by all engines
+KEYWORDS = KeywordRegistry()
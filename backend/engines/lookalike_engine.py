@@ -0,0 +1,286 @@
+"""
+Look-alike Domain Engine
+Checks every host against a protected-brand list (10k+ entries) for:
+
+  homoglyph    same confusable skeleton as a brand (pаypal, paypa1, arnazon)
+               (engines.idn.skeleton)
+  typo         bounded Damerau-Levenshtein distance to a brand skeleton,
+               via a SymSpell deletion index (no scan over all brands);
+               single substitutions between adjacent QWERTY keys are
+               reported as keyboard typos
+  combosquat   brand used as a label or embedded in a foreign domain
+               (paypal-secure.com, login.paypal.com.evil.tk, paypal.xyz,
+               dhlparcel.com)
+
+Only the official domains listed (and allowlisted domains) never match:
+a brand on any other suffix (paypal.tk, amazon.co.uk unless listed) is
+a combosquat. Brands come from the bundled
+data/protected_brands.txt plus PROTECTED_BRANDS_FILE (same format).
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from engines.domain_index import DOMAINS
+from engines.idn import decode_label, skeleton
+from engines.url_features import URLFeatures, tokenize_urls
+
+BUNDLED_BRANDS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "protected_brands.txt")
+
+_QWERTY = ("1234567890", "qwertyuiop", "asdfghjkl", "zxcvbnm")
+
+
+def _keyboard_neighbours() -> Dict[str, Set[str]]:
+    position = {ch: (r, c) for r, row in enumerate(_QWERTY) for c, ch in enumerate(row)}
+    neighbours: Dict[str, Set[str]] = {ch: set() for ch in position}
+    for a, (ra, ca) in position.items():
+        for b, (rb, cb) in position.items():
+            # Rows are staggered: same row +-1, or row +-1 at column c / c-1 / c+1
+            if a != b and abs(ra - rb) <= 1 and abs(ca - cb) <= 1:
+                neighbours[a].add(b)
+    return neighbours
+
+
+KEYBOARD_NEIGHBOURS = _keyboard_neighbours()
+
+
+def osa_distance(a: str, b: str, limit: int) -> int:
+    """Optimal-string-alignment distance, or limit + 1 once it exceeds limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, prev2[j - 2] + 1)
+            cur[j] = value
+            row_min = min(row_min, value)
+        if row_min > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1] if prev[-1] <= limit else limit + 1
+
+
+def max_typo_distance(length: int) -> int:
+    """Short names only match exactly; longer names tolerate more edits."""
+    if length <= 4:
+        return 0
+    if length <= 8:
+        return 1
+    return 2
+
+
+class LookalikeMatch:
+    __slots__ = ("brand", "official", "kind", "token", "distance")
+
+    def __init__(self, brand: str, official: str, kind: str, token: str, distance: int = 0):
+        self.brand = brand
+        self.official = official
+        self.kind = kind
+        self.token = token
+        self.distance = distance
+
+    def __repr__(self) -> str:
+        return f"LookalikeMatch({self.kind}: {self.token!r} ~ {self.official})"
+
+
+# Strongest evidence first
+_KIND_RANK = {"homoglyph": 0, "keyboard typo": 1, "typo": 2, "combosquat": 3}
+
+
+class BrandIndex:
+    def __init__(self, official_domains: Iterable[str], min_embedded: int = 3, cache_size: int = 8192):
+        self.min_embedded = min_embedded
+        self.official: Set[str] = set()
+        self.brands: Dict[str, str] = {}            # brand label -> first official domain
+        self._by_skeleton: Dict[str, Set[str]] = {}  # skeleton -> brand labels
+        self._deletes: Dict[str, Set[str]] = {}      # SymSpell deletes -> skeletons
+        self._max_len = 0
+
+        for domain in official_domains:
+            self.add(domain)
+
+        self._cache: "OrderedDict[str, List[LookalikeMatch]]" = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def read_files(*paths: str) -> Iterator[str]:
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.split("#", 1)[0].strip().lower()
+                    if line:
+                        yield line
+
+    @staticmethod
+    def env_files() -> List[str]:
+        extra = os.environ.get("PROTECTED_BRANDS_FILE")
+        return [BUNDLED_BRANDS, *([extra] if extra else [])]
+
+    @classmethod
+    def from_files(cls, *paths: str) -> "BrandIndex":
+        return cls(cls.read_files(*paths))
+
+    @classmethod
+    def from_env(cls) -> "BrandIndex":
+        return cls.from_files(*cls.env_files())
+
+    # ---------------- BUILD ----------------
+    def add(self, domain: str):
+        registrable = DOMAINS.psl.registrable_domain(domain) or domain
+        suffix = DOMAINS.psl.public_suffix(registrable)
+        brand = registrable[:-(len(suffix) + 1)] if registrable != suffix else registrable
+        self.official.add(registrable)
+        if brand in self.brands:
+            return
+        self.brands[brand] = registrable
+
+        sk = skeleton(brand)
+        self._by_skeleton.setdefault(sk, set()).add(brand)
+        self._max_len = max(self._max_len, len(sk))
+        for variant in self._delete_variants(sk, max_typo_distance(len(sk))):
+            self._deletes.setdefault(variant, set()).add(sk)
+
+    @staticmethod
+    def _delete_variants(word: str, distance: int) -> Set[str]:
+        variants = {word}
+        frontier = {word}
+        for _ in range(distance):
+            frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+            variants |= frontier
+        return variants
+
+    def __len__(self) -> int:
+        return len(self.brands)
+
+    # ---------------- LOOKUP ----------------
+    def lookup(self, host: str) -> List[LookalikeMatch]:
+        with self._lock:
+            cached = self._cache.get(host)
+            if cached is not None:
+                self._cache.move_to_end(host)
+                return cached
+
+        matches = self._lookup(host)
+
+        with self._lock:
+            self._cache[host] = matches
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return matches
+
+    def _lookup(self, host: str) -> List[LookalikeMatch]:
+        host = host.lower().strip(".")
+        registrable = DOMAINS.psl.registrable_domain(host) or host
+        if registrable in self.official or DOMAINS.is_allowlisted(host):
+            return []
+
+        suffix = DOMAINS.psl.public_suffix(host)
+        name = host[:-(len(suffix) + 1)] if host != suffix else host
+        labels = [decode_label(label) for label in name.split(".") if label]
+        if not labels:
+            return []
+
+        found: Dict[str, LookalikeMatch] = {}
+
+        def keep(match: LookalikeMatch):
+            best = found.get(match.brand)
+            if best is None or _KIND_RANK[match.kind] < _KIND_RANK[best.kind]:
+                found[match.brand] = match
+
+        # Whole labels and their hyphen-separated parts
+        tokens = []
+        for label in labels:
+            tokens.append(label)
+            if "-" in label:
+                tokens.extend(part for part in label.split("-") if part)
+
+        for token in dict.fromkeys(tokens):
+            sk = skeleton(token)
+            for brand in self._by_skeleton.get(sk, ()):
+                kind = "combosquat" if token == brand else "homoglyph"
+                keep(LookalikeMatch(brand, self.brands[brand], kind, token))
+            for match in self._typos(token, sk):
+                keep(match)
+
+        # Brand embedded inside a longer label (paypalsecure, secure-paypal1)
+        for label in labels:
+            sk = skeleton(label.replace("-", ""))
+            for brand in self._embedded(sk):
+                keep(LookalikeMatch(brand, self.brands[brand], "combosquat", label))
+
+        return sorted(found.values(), key=lambda m: (_KIND_RANK[m.kind], m.brand))
+
+    def _typos(self, token: str, sk: str) -> Iterator[LookalikeMatch]:
+        limit = max_typo_distance(len(sk))
+        if not limit:
+            return
+        candidates: Set[str] = set()
+        for variant in self._delete_variants(sk, limit):
+            candidates |= self._deletes.get(variant, set())
+        candidates.discard(sk)
+
+        for candidate in candidates:
+            distance = osa_distance(sk, candidate, min(limit, max_typo_distance(len(candidate))))
+            if distance > limit or distance == 0:
+                continue
+            kind = "keyboard typo" if self._keyboard_slip(sk, candidate) else "typo"
+            for brand in self._by_skeleton[candidate]:
+                yield LookalikeMatch(brand, self.brands[brand], kind, token, distance)
+
+    @staticmethod
+    def _keyboard_slip(typed: str, intended: str) -> bool:
+        if len(typed) != len(intended):
+            return False
+        diffs = [(a, b) for a, b in zip(typed, intended) if a != b]
+        return len(diffs) == 1 and diffs[0][0] in KEYBOARD_NEIGHBOURS.get(diffs[0][1], ())
+
+    def _embedded(self, sk: str) -> Set[str]:
+        brands: Set[str] = set()
+        by_skeleton = self._by_skeleton
+        for start in range(len(sk)):
+            for end in range(start + self.min_embedded, min(len(sk), start + self._max_len) + 1):
+                hit = by_skeleton.get(sk[start:end])
+                if hit is not None:
+                    brands |= hit
+        return brands
+
+
+class LookalikeEngine:
+    def __init__(self, index: Optional[BrandIndex] = None):
+        self.index = index or BRAND_INDEX
+
+    async def analyze(self, content: str, mode: str, urls: Optional[List[URLFeatures]] = None) -> Dict:
+        urls = urls if urls is not None else tokenize_urls(content)
+        findings = []
+        score = 0.0
+
+        seen = set()
+        for features in urls[:10]:
+            if features.is_ip or features.host in seen:
+                continue
+            seen.add(features.host)
+            for match in self.index.lookup(features.host):
+                score += {"homoglyph": 45, "keyboard typo": 40, "typo": 35}.get(match.kind, 30)
+                findings.append(
+                    f"{match.kind.capitalize()} look-alike of {match.official}: {features.host}"
+                )
+
+        return {
+            "engine_name": "Look-alike Domain Engine",
+            "risk_score": min(score, 100),
+            "findings": findings or ["No brand look-alike domains"],
+            "confidence": 0.9 if findings else 0.5
+        }
+
+
+# Process-wide brand index
+BRAND_INDEX = BrandIndex.from_env()
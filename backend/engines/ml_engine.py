@@ -1,45 +1,118 @@
 """
 SAFE Machine Learning Engine
-NO pickle
-NO training
+NO pickle (weights are a plain NumPy .npz, loaded with allow_pickle=False)
+NO training at runtime (see engines/ml_features.py for the model format)
 NO crashes
 ML is SUPPORT ONLY
+
+With a model file the engine scores hashed n-gram + keyword + URL
+features with a linear model; without one it falls back to the original
+keyword heuristics. score_batch scores many messages in one sparse
+matrix-vector product.
+
+ML_MODEL_FILE  path of the .npz model   (default: data/ml_model.npz)
 """
 
-from typing import Dict
-import math
+from typing import Dict, List, Optional, Sequence
+import logging
+import os
+
+import numpy as np
+
+from engines.keyword_registry import KEYWORDS, KeywordHits
+from engines.ml_features import LinearModel, MessageFeatures, load_model
+from engines.url_features import URLFeatures, tokenize_urls
+
+logger = logging.getLogger("CyberSentinel")
+
+BUNDLED_MODEL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "ml_model.npz")
+
+ACTION_WORDS = KEYWORDS.register("ml.action", ["verify", "confirm", "update", "secure"])
+URGENCY_WORDS = KEYWORDS.register("ml.urgency", ["urgent", "immediately", "within 24 hours"])
+THREAT_WORDS = KEYWORDS.register("ml.threat", ["account", "suspended", "locked"])
+
+# ML can NEVER exceed 40
+MAX_SCORE = 40
 
 class MLDetectionEngine:
     """
-    ML-style probabilistic scoring using heuristics.
+    ML probabilistic scoring (linear model, heuristic fallback).
     Designed to NEVER override security rules.
     """
 
-    async def analyze(self, content: str, mode: str) -> Dict:
-        text = content.lower()
+    def __init__(self, model: Optional[LinearModel] = None):
+        if model is None:
+            path = os.environ.get("ML_MODEL_FILE", BUNDLED_MODEL)
+            try:
+                model = load_model(path)
+            except (OSError, ValueError, KeyError):
+                logger.exception("Ignoring unusable ML model %s; using heuristics", path)
+        self.model = model
+        self.features = model.extractor() if model is not None else None
+
+    def score_batch(self, items: Sequence[MessageFeatures]) -> np.ndarray:
+        """Phishing probability per (content, lowercase hits, urls) item."""
+        if self.model is None:
+            raise RuntimeError("No ML model loaded")
+        return self.model.predict_proba(self.features.transform(items))
+
+    async def analyze(
+        self,
+        content: str,
+        mode: str,
+        hits: Optional[KeywordHits] = None,
+        urls: Optional[List[URLFeatures]] = None
+    ) -> Dict:
+        hits = hits if hits is not None else KEYWORDS.scan(content.lower())
+        urls = urls if urls is not None else tokenize_urls(content)
+
+        if self.model is None:
+            return self._heuristic(hits, urls)
+        return self._model_result(content, hits, urls)
+
+    def _model_result(self, content: str, hits: KeywordHits, urls: List[URLFeatures]) -> Dict:
+        probability = float(self.score_batch([(content, hits, urls)])[0])
+        findings = [f"ML model: phishing probability {probability:.2f}"]
+
+        # Explain with the named features that pushed the score up
+        named = self.features.named_features(content, hits, urls)
+        if named:
+            columns = np.fromiter((self.features.named_column(n) for n in named), dtype=np.int64, count=len(named))
+            values = np.fromiter(named.values(), dtype=np.float32, count=len(named))
+            shares = self.model.contributions(columns, values)
+            ranked = sorted(zip(shares.tolist(), named), reverse=True)
+            findings.extend(f"ML signal: {name}" for share, name in ranked[:3] if share > 0)
+
+        return {
+            "engine_name": "Machine Learning Engine (Safe)",
+            "risk_score": round(MAX_SCORE * probability, 1),
+            "findings": findings,
+            # Still LOW confidence on purpose, a little higher far from 0.5
+            "confidence": round(0.3 + 0.4 * abs(2 * probability - 1), 2)
+        }
 
+    def _heuristic(self, hits: KeywordHits, urls: List[URLFeatures]) -> Dict:
         score = 0
         findings = []
 
         # Heuristic ML-like signals
-        if any(x in text for x in ["verify", "confirm", "update", "secure"]):
+        if hits.any_of(ACTION_WORDS):
             score += 15
             findings.append("ML heuristic: action request detected")
 
-        if any(x in text for x in ["urgent", "immediately", "within 24 hours"]):
+        if hits.any_of(URGENCY_WORDS):
             score += 15
             findings.append("ML heuristic: urgency detected")
 
-        if any(x in text for x in ["account", "suspended", "locked"]):
+        if hits.any_of(THREAT_WORDS):
             score += 20
             findings.append("ML heuristic: account threat language")
 
-        if "http" in text or "www." in text:
+        if any(u.explicit for u in urls):
             score += 10
             findings.append("ML heuristic: link present")
 
-        # ML can NEVER exceed 40
-        score = min(score, 40)
+        score = min(score, MAX_SCORE)
 
         return {
             "engine_name": "Machine Learning Engine (Safe)",
@@ -0,0 +1,269 @@
+"""
+ML Features and Linear Model
+Turns messages into ONE sparse feature vector each, in a fixed hashed
+space of `dim` columns (no vocabulary to ship or keep in sync):
+
+  word n-grams   unigrams + bigrams of [a-z0-9] words
+  char n-grams   3..5 character grams over the same words, hashed as
+                 rolling polynomials over the code points (vectorized)
+  named          keyword-group hits from the shared registry, URL
+                 features from the shared tokenizer, a few text stats
+
+Each n-gram block is sublinear-tf weighted (1 + log count) and L2
+normalized; named features keep their own scale. Rows are stacked into
+a CSR batch (indptr / indices / data NumPy arrays), so a linear model
+scores a whole batch with ONE sparse matrix-vector product.
+
+Model files are plain NumPy archives read with allow_pickle=False:
+
+  weights          float32[dim]
+  bias             float
+  feature_version  int (must equal FEATURE_VERSION)
+  char_ngrams      int[2]  (min, max)  optional, default (3, 5)
+"""
+
+import math
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from engines.keyword_registry import KeywordHits
+from engines.url_features import URLFeatures
+
+# Bump when hashing or feature definitions change: old models are refused
+FEATURE_VERSION = 1
+DEFAULT_DIM = 1 << 18
+MAX_NGRAM_CHARS = 100_000  # char n-grams look at the first 100k chars only
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_MASK64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+_PRIME = np.uint64(0x100000001B3)
+
+# (content, keyword hits on the lowercase text, URL records)
+MessageFeatures = Tuple[str, KeywordHits, List[URLFeatures]]
+
+
+def _mix(h: np.ndarray) -> np.ndarray:
+    """64-bit finalizer (murmur3 fmix64): spreads polynomial hashes."""
+    with np.errstate(over="ignore"):
+        h = h ^ (h >> np.uint64(33))
+        h = h * np.uint64(0xFF51AFD7ED558CCD)
+        h = h ^ (h >> np.uint64(33))
+        h = h * np.uint64(0xC4CEB9FE1A85EC53)
+        return h ^ (h >> np.uint64(33))
+
+
+def _stable_hash(token: str) -> int:
+    # crc32, not hash(): must match across processes and training runs
+    return zlib.crc32(token.encode("utf-8", "surrogatepass"))
+
+
+def _tf_block(hashes: np.ndarray, dim: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Hashed tokens -> (columns, sublinear tf, L2 normalized)."""
+    if not hashes.size:
+        return np.empty(0, np.int64), np.empty(0, np.float32)
+    columns, counts = np.unique((hashes % np.uint64(dim)).astype(np.int64), return_counts=True)
+    values = 1.0 + np.log(counts)
+    values /= np.sqrt((values * values).sum())
+    return columns, values.astype(np.float32)
+
+
+class SparseBatch:
+    """Rows of hashed features in CSR layout."""
+
+    __slots__ = ("indptr", "indices", "data", "dim")
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, data: np.ndarray, dim: int):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.dim = dim
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Tuple[np.ndarray, np.ndarray]], dim: int) -> "SparseBatch":
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(columns) for columns, _ in rows], out=indptr[1:])
+        if rows:
+            indices = np.concatenate([columns for columns, _ in rows])
+            data = np.concatenate([values for _, values in rows])
+        else:
+            indices, data = np.empty(0, np.int64), np.empty(0, np.float32)
+        return cls(indptr, indices, data, dim)
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    def row_ids(self) -> np.ndarray:
+        return np.repeat(np.arange(len(self)), np.diff(self.indptr))
+
+    def dot(self, weights: np.ndarray) -> np.ndarray:
+        """X @ weights for every row at once."""
+        return np.bincount(self.row_ids(), weights=self.data * weights[self.indices], minlength=len(self))
+
+    def rdot(self, residuals: np.ndarray) -> np.ndarray:
+        """X.T @ residuals (the gradient step of a linear model)."""
+        return np.bincount(self.indices, weights=self.data * residuals[self.row_ids()], minlength=self.dim)
+
+    def take(self, rows: np.ndarray) -> "SparseBatch":
+        """Sub-batch of the given row numbers (in that order)."""
+        starts, ends = self.indptr[rows], self.indptr[rows + 1]
+        picked = [np.arange(s, e) for s, e in zip(starts, ends)]
+        flat = np.concatenate(picked) if picked else np.empty(0, np.int64)
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(ends - starts, out=indptr[1:])
+        return SparseBatch(indptr, self.indices[flat], self.data[flat], self.dim)
+
+
+class FeatureExtractor:
+    def __init__(self, dim: int = DEFAULT_DIM, char_ngrams: Tuple[int, int] = (3, 5)):
+        self.dim = dim
+        self.char_ngrams = char_ngrams
+        self._named_columns: Dict[str, int] = {}
+
+    # ---------------- NAMED FEATURES ----------------
+    def named_column(self, name: str) -> int:
+        column = self._named_columns.get(name)
+        if column is None:
+            column = self._named_columns[name] = _stable_hash("n:" + name) % self.dim
+        return column
+
+    @staticmethod
+    def named_features(content: str, hits: KeywordHits, urls: List[URLFeatures]) -> Dict[str, float]:
+        features: Dict[str, float] = {}
+
+        for group, phrases in hits.groups.items():
+            matched = hits.count_of(phrases)
+            if matched:
+                features[f"kw:{group}"] = math.log1p(matched)
+
+        explicit = [u for u in urls if u.explicit]
+        if explicit:
+            features["url:count"] = math.log1p(len(explicit))
+            features["url:ip_host"] = float(any(u.is_ip for u in explicit))
+            features["url:idn"] = float(any(u.is_idn for u in explicit))
+            features["url:mixed_script"] = float(any(u.mixed_script for u in explicit))
+            features["url:userinfo"] = float(any(u.userinfo for u in explicit))
+            features["url:port"] = float(any(u.port for u in explicit))
+            features["url:http"] = float(any(u.scheme == "http" for u in explicit))
+            features["url:query"] = float(any(u.query for u in explicit))
+            features["url:subdomains"] = max(u.host.count(".") for u in explicit) / 4.0
+            entropies = [u.host_entropy for u in explicit if u.host_entropy is not None]
+            if entropies:
+                features["url:host_entropy"] = max(entropies) / 4.0
+        if urls and not explicit:
+            features["url:bare_host"] = 1.0
+
+        length = len(content)
+        if length:
+            features["text:length"] = math.log1p(length) / 10.0
+            features["text:digits"] = sum(c.isdigit() for c in content) / length
+            features["text:upper"] = sum(c.isupper() for c in content) / length
+            features["text:exclaim"] = math.log1p(content.count("!"))
+        return features
+
+    # ---------------- HASHED N-GRAMS ----------------
+    @staticmethod
+    def _word_hashes(words: List[str]) -> np.ndarray:
+        unigrams = np.fromiter((_stable_hash(w) for w in words), dtype=np.uint64, count=len(words))
+        with np.errstate(over="ignore"):
+            bigrams = unigrams[:-1] * _PRIME + unigrams[1:] + np.uint64(1)
+        return _mix(np.concatenate([unigrams, bigrams]))
+
+    def _char_hashes(self, text: str) -> np.ndarray:
+        codes = np.frombuffer(text[:MAX_NGRAM_CHARS].encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        low, high = self.char_ngrams
+        parts = []
+        with np.errstate(over="ignore"):
+            for n in range(low, high + 1):
+                if codes.size < n:
+                    break
+                h = np.full(codes.size - n + 1, n, dtype=np.uint64)
+                for k in range(n):
+                    h = h * _PRIME + codes[k:codes.size - n + 1 + k]
+                parts.append(h)
+        if not parts:
+            return np.empty(0, np.uint64)
+        # Salted so char grams and word grams never share a hash
+        return _mix(np.concatenate(parts) ^ np.uint64(0x9E3779B97F4A7C15))
+
+    # ---------------- ROWS ----------------
+    def row(self, content: str, hits: KeywordHits, urls: List[URLFeatures]) -> Tuple[np.ndarray, np.ndarray]:
+        """One message -> (sorted unique columns, values)."""
+        words = _WORD_RE.findall(content.lower())
+        word_cols, word_vals = _tf_block(self._word_hashes(words), self.dim)
+        char_cols, char_vals = _tf_block(self._char_hashes(" ".join(words)), self.dim)
+
+        named = self.named_features(content, hits, urls)
+        named_cols = np.fromiter((self.named_column(n) for n in named), dtype=np.int64, count=len(named))
+        named_vals = np.fromiter(named.values(), dtype=np.float32, count=len(named))
+
+        columns = np.concatenate([word_cols, char_cols, named_cols])
+        values = np.concatenate([word_vals, char_vals, named_vals])
+        # Hash collisions between blocks add up, like any hashed vectorizer
+        merged, inverse = np.unique(columns, return_inverse=True)
+        return merged, np.bincount(inverse, weights=values, minlength=merged.size).astype(np.float32)
+
+    def transform(self, items: Iterable[MessageFeatures]) -> SparseBatch:
+        return SparseBatch.from_rows([self.row(*item) for item in items], self.dim)
+
+
+class LinearModel:
+    """Logistic regression over the hashed space: p = sigmoid(X @ w + b)."""
+
+    def __init__(self, weights: np.ndarray, bias: float, char_ngrams: Tuple[int, int] = (3, 5)):
+        self.weights = np.ascontiguousarray(weights, dtype=np.float32)
+        self.bias = float(bias)
+        self.char_ngrams = char_ngrams
+
+    @property
+    def dim(self) -> int:
+        return self.weights.size
+
+    @classmethod
+    def from_npz(cls, path: str) -> "LinearModel":
+        with np.load(path, allow_pickle=False) as archive:
+            version = int(archive["feature_version"])
+            if version != FEATURE_VERSION:
+                raise ValueError(f"{path}: feature version {version}, expected {FEATURE_VERSION}")
+            weights = archive["weights"]
+            if weights.ndim != 1 or not weights.size:
+                raise ValueError(f"{path}: weights must be a non-empty vector")
+            char_ngrams = tuple(int(n) for n in archive["char_ngrams"]) if "char_ngrams" in archive else (3, 5)
+            return cls(weights, float(archive["bias"]), char_ngrams)
+
+    def save(self, path: str):
+        np.savez_compressed(
+            path,
+            weights=self.weights,
+            bias=np.float64(self.bias),
+            feature_version=np.int64(FEATURE_VERSION),
+            char_ngrams=np.asarray(self.char_ngrams, dtype=np.int64)
+        )
+
+    def extractor(self) -> FeatureExtractor:
+        return FeatureExtractor(self.dim, self.char_ngrams)
+
+    def decision_function(self, batch: SparseBatch) -> np.ndarray:
+        if batch.dim != self.dim:
+            raise ValueError(f"Batch has {batch.dim} columns, model expects {self.dim}")
+        return batch.dot(self.weights) + self.bias
+
+    def predict_proba(self, batch: SparseBatch) -> np.ndarray:
+        margin = np.clip(self.decision_function(batch), -35.0, 35.0)
+        return 1.0 / (1.0 + np.exp(-margin))
+
+    def contributions(self, columns: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Per-column share of one row's margin."""
+        return self.weights[columns] * values
+
+
+def load_model(path: Optional[str]) -> Optional[LinearModel]:
+    """The model at path, or None when there is no file there."""
+    if not path:
+        return None
+    try:
+        return LinearModel.from_npz(path)
+    except FileNotFoundError:
+        return None
@@ -3,43 +3,57 @@ Natural Language Processing Engine for psychological manipulation detection
 (Offline-safe version – no external AI dependencies)
 """
 
-import re
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+from engines.keyword_registry import KEYWORDS, KeywordHits
+from engines.pattern_bank import PATTERNS, PatternHits
 
 class NLPEngine:
     """Detects psychological manipulation and deceptive intent"""
 
     def __init__(self):
-        self.manipulation_patterns = [
-            r'\b(urgent|immediately|act now|limited time|expires|hurry)\b',
-            r'\b(verify|confirm|update|suspend|lock|restrict)\b.*\b(account|payment|card)\b',
-            r'\b(congratulations|winner|prize|reward|claim)\b',
-            r'\b(click here|click below|tap here)\b',
-            r'\b(refund|reimburs|overpay)\b',
-            r'\b(security alert|unusual activity|suspicious)\b',
-        ]
-
-    async def analyze(self, content: str, mode: str) -> Dict:
+        self.manipulation_patterns = PATTERNS.register("nlp.manipulation", [
+            ('urgency', r'\b(urgent|immediately|act now|limited time|expires|hurry)\b'),
+            ('account_action', r'\b(verify|confirm|update|suspend|lock|restrict)\b.*\b(account|payment|card)\b'),
+            ('reward', r'\b(congratulations|winner|prize|reward|claim)\b'),
+            ('click_bait', r'\b(click here|click below|tap here)\b'),
+            ('refund', r'\b(refund|reimburs|overpay)\b'),
+            ('security_alert', r'\b(security alert|unusual activity|suspicious)\b'),
+        ])
+        self.urgency_words = KEYWORDS.register("nlp.urgency", [
+            'urgent', 'immediately', 'now', 'hurry', 'quick', 'fast'
+        ])
+        self.authority_terms = KEYWORDS.register("nlp.authority", [
+            'bank', 'paypal', 'amazon', 'irs', 'government', 'police', 'support'
+        ])
+
+    async def analyze(
+        self,
+        content: str,
+        mode: str,
+        hits: Optional[KeywordHits] = None,
+        patterns: Optional[PatternHits] = None
+    ) -> Dict:
         findings: List[str] = []
         risk_score = 0.0
-        content_lower = content.lower()
+        if hits is None or patterns is None:
+            content_lower = content.lower()
+            hits = hits if hits is not None else KEYWORDS.scan(content_lower)
+            patterns = patterns if patterns is not None else PATTERNS.scan(content_lower)
 
-        # Pattern-based detection
-        for pattern in self.manipulation_patterns:
-            if re.search(pattern, content_lower):
-                risk_score += 10
-                findings.append("Psychological manipulation trigger detected")
+        # Pattern-based detection (one merged scan)
+        for _ in patterns.matched(self.manipulation_patterns):
+            risk_score += 10
+            findings.append("Psychological manipulation trigger detected")
 
         # Excessive urgency
-        urgency_words = ['urgent', 'immediately', 'now', 'hurry', 'quick', 'fast']
-        urgency_count = sum(1 for w in urgency_words if w in content_lower)
+        urgency_count = hits.count_of(self.urgency_words)
         if urgency_count >= 2:
             risk_score += 15
             findings.append("High urgency pressure tactics detected")
 
         # Authority impersonation
-        authority_terms = ['bank', 'paypal', 'amazon', 'irs', 'government', 'police', 'support']
-        if any(term in content_lower for term in authority_terms):
+        if hits.any_of(self.authority_terms):
             risk_score += 15
             findings.append("Possible authority impersonation detected")
 
@@ -1,18 +1,25 @@
 # backend/engines/origin_engine.py
 
+from engines.keyword_registry import KEYWORDS
+
+GENERIC_GREETINGS = KEYWORDS.register("origin.greetings", ["dear customer", "valued user", "respected user"])
+SYNTHETIC_URGENCY = KEYWORDS.register("origin.urgency", ["act now", "limited time"])
+PERSONALIZATION = KEYWORDS.register("origin.personalization", ["your name", "order id", "last transaction"])
+
 class OriginEngine:
     """
     Determines whether a message is likely AI-generated or human-written.
     Uses linguistic and behavioral heuristics.
     """
 
-    def analyze(self, content: str):
+    def analyze(self, content: str, hits=None):
         score = 0
         signals = []
         text = content.lower()
+        hits = hits if hits is not None else KEYWORDS.scan(text)
 
         # Generic greeting patterns
-        if any(p in text for p in ["dear customer", "valued user", "respected user"]):
+        if hits.any_of(GENERIC_GREETINGS):
             score += 30
             signals.append("Generic impersonation greeting")
 
@@ -22,12 +29,12 @@ class OriginEngine:
             signals.append("Over-detailed generic phrasing")
 
         # Emotionally neutral but urgent
-        if "act now" in text or "limited time" in text:
+        if hits.any_of(SYNTHETIC_URGENCY):
             score += 20
             signals.append("Synthetic urgency pattern")
 
         # Lack of personalization
-        if not any(p in text for p in ["your name", "order id", "last transaction"]):
+        if not hits.any_of(PERSONALIZATION):
             score += 10
             signals.append("Lack of personalization")
 
@@ -0,0 +1,281 @@
+"""
+Shared Regex Pattern Bank
+Engines register named regex rules once at import; every rule is compiled
+a single time and one `scan()` call reports every triggered rule.
+
+Rules are split into gap-free "atoms" (the parts between top-level,
+unescaped `.*`; see split_atoms). `A.*B` rules are resolved by walking
+atom matches with forward-only cursors instead of regex backtracking, so
+a long line full of "click" with no "here" costs O(n), not O(n^2).
+
+Linear mode (max_gap): gaps between atoms are bounded to `max_gap`
+characters, which also bounds how far apart triggering words may be.
+
+Like the keyword registry, register() returns a live PatternGroup handle
+and rule packs may override a group's rules; PatternHits resolve handles
+against the bank that produced them.
+"""
+
+import os
+import re
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Constructs that need backtracking (not RE2-compatible) are rejected
+_UNSUPPORTED = re.compile(r"\(\?[=!<]|\\[1-9]|\(\?P=")
+
+Rules = Tuple[Tuple[str, str], ...]
+
+
+def split_atoms(pattern: str) -> Tuple[str, ...]:
+    """
+    Splits a rule on its top-level `.*` gaps (escaped dots and `.*` inside
+    character classes don't count). A `.*` inside a group, a top-level
+    `|` or a quantified `.*` makes the split ambiguous; the rule is then
+    kept whole as one atom and matched by plain `re`.
+    """
+    atoms: List[str] = []
+    start = i = depth = 0
+    size = len(pattern)
+    in_class = False
+    while i < size:
+        ch = pattern[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if in_class:
+            if ch == "]":
+                in_class = False
+        elif ch == "[":
+            in_class = True
+            # A "]" right after "[" or "[^" is a literal
+            if pattern.startswith("^", i + 1):
+                i += 1
+            if pattern.startswith("]", i + 1):
+                i += 1
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "|" and depth == 0:
+            return (pattern,)
+        elif pattern.startswith(".*", i):
+            end = i + 2
+            if pattern.startswith("?", end):
+                end += 1
+            if depth or pattern.startswith(("+", "?", "*", "{"), end):
+                return (pattern,)
+            atoms.append(pattern[start:i])
+            start = i = end
+            continue
+        i += 1
+    atoms.append(pattern[start:])
+    return tuple(atoms)
+
+
+class PatternGroup:
+    """Live handle on a registered group (iterates its current rule names)."""
+
+    __slots__ = ("name", "_registry")
+
+    def __init__(self, name: str, registry: "PatternRegistry"):
+        self.name = name
+        self._registry = registry
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(name for name, _ in self._registry.group(self.name))
+
+    def __len__(self) -> int:
+        return len(self._registry.group(self.name))
+
+    def __repr__(self) -> str:
+        return f"PatternGroup({self.name!r})"
+
+
+class PatternHits:
+    """Names of every rule triggered in one scanned text."""
+
+    __slots__ = ("_names", "_groups")
+
+    def __init__(self, names: Iterable[str], groups: Optional[Dict[str, Tuple[str, ...]]] = None):
+        self._names = frozenset(names)
+        # group -> rule names of the bank that produced these hits
+        self._groups = groups or {}
+
+    def _resolve(self, names: Iterable[str]) -> Iterable[str]:
+        if isinstance(names, PatternGroup):
+            return self._groups.get(names.name, ())
+        return names
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._names
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def matched(self, names: Iterable[str]) -> List[str]:
+        return [n for n in self._resolve(names) if n in self._names]
+
+    def count_of(self, names: Iterable[str]) -> int:
+        return sum(1 for n in self._resolve(names) if n in self._names)
+
+
+class PatternBank:
+    """Compiled form of a set of (name, pattern) rules."""
+
+    def __init__(
+        self,
+        rules: Sequence[Tuple[str, str]],
+        max_gap: Optional[int] = None,
+        groups: Optional[Dict[str, Tuple[str, ...]]] = None
+    ):
+        self.max_gap = max_gap
+        self.groups = groups or {}
+        self.rules: List[Tuple[str, Tuple["re.Pattern", ...]]] = []
+
+        # Atoms shared between rules are compiled once
+        compiled: Dict[str, "re.Pattern"] = {}
+        for name, pattern in rules:
+            atoms = split_atoms(pattern)
+            if any(not atom or _UNSUPPORTED.search(atom) for atom in atoms):
+                raise ValueError(f"Unsupported pattern for bank: {pattern!r}")
+            self.rules.append((
+                name,
+                tuple(compiled.setdefault(a, re.compile(a)) for a in atoms)
+            ))
+
+    # ---------------- SCAN ----------------
+    @classmethod
+    def from_groups(cls, groups: Dict[str, Rules], max_gap: Optional[int] = None) -> "PatternBank":
+        return cls(
+            [rule for rules in groups.values() for rule in rules],
+            max_gap,
+            {group: tuple(name for name, _ in rules) for group, rules in groups.items()}
+        )
+
+    def scan(self, text: str) -> PatternHits:
+        return PatternHits(
+            (name for name, atoms in self.rules if self._matched(atoms, text)),
+            self.groups
+        )
+
+    def _matched(self, atoms: Tuple["re.Pattern", ...], text: str) -> bool:
+        if len(atoms) == 1:
+            return atoms[0].search(text) is not None
+
+        max_gap = self.max_gap
+        size = len(text)
+        # Last match per later atom; cursors only ever move forward
+        cursors: List[Optional["re.Match"]] = [None] * len(atoms)
+        pos = 0
+
+        while pos <= size:
+            first = atoms[0].search(text, pos)
+            if first is None:
+                return False
+
+            # `.` never crosses a newline
+            line_end = text.find("\n", first.end())
+            if line_end == -1:
+                line_end = size
+
+            end = first.end()
+            for i in range(1, len(atoms)):
+                m = cursors[i]
+                if m is None or m.start() < end:
+                    m = atoms[i].search(text, end, line_end)
+                    cursors[i] = m
+                if m is None or (max_gap is not None and m.start() - end > max_gap):
+                    break
+                end = m.end()
+            else:
+                return True
+
+            if m is None:
+                # Later starts on this line end later too: skip the line
+                pos = line_end + 1
+            else:
+                pos = max(first.end(), first.start() + 1)
+
+        return False
+
+
+class PatternRegistry:
+    """
+    Named rule groups from every engine, compiled into one bank.
+    Re-registering a group triggers a recompile on the next scan.
+    Rule-pack overrides: build() off the request path, then install().
+    """
+
+    def __init__(self, max_gap: Optional[int] = None):
+        self.max_gap = max_gap
+        self._groups: Dict[str, Rules] = {}     # built-in rules
+        self._overrides: Dict[str, Rules] = {}  # rule-pack rules
+        self._bank: Optional[PatternBank] = None
+        self._pinned: ContextVar[Optional[PatternBank]] = ContextVar("pattern_bank", default=None)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def qualify(group: str, rules: Iterable[Tuple[str, str]]) -> Rules:
+        return tuple((f"{group}:{name}", pattern) for name, pattern in rules)
+
+    def register(self, group: str, rules: Iterable[Tuple[str, str]]) -> PatternGroup:
+        rules = self.qualify(group, rules)
+        PatternBank(rules, self.max_gap)  # validate eagerly
+        with self._lock:
+            if self._groups.get(group) != rules:
+                self._groups[group] = rules
+                if group not in self._overrides:
+                    self._bank = None
+        return PatternGroup(group, self)
+
+    def group(self, name: str) -> Rules:
+        overrides = self._overrides
+        return overrides[name] if name in overrides else self._groups[name]
+
+    def builtin(self, name: str) -> Rules:
+        return self._groups[name]
+
+    def build(self, overrides: Dict[str, Rules]) -> PatternBank:
+        """Compiles (and validates) built-ins + overrides without installing."""
+        unknown = overrides.keys() - self._groups.keys()
+        if unknown:
+            raise ValueError(f"Unknown pattern groups: {sorted(unknown)}")
+        return PatternBank.from_groups({**self._groups, **overrides}, self.max_gap)
+
+    def install(self, overrides: Dict[str, Rules], bank: PatternBank):
+        with self._lock:
+            self._overrides = dict(overrides)
+            self._bank = bank
+
+    def compile(self) -> PatternBank:
+        with self._lock:
+            if self._bank is None:
+                self._bank = PatternBank.from_groups({**self._groups, **self._overrides}, self.max_gap)
+            return self._bank
+
+    @contextmanager
+    def pinned(self, bank: PatternBank) -> Iterator[PatternBank]:
+        """Scans in this context use `bank`, whatever gets installed."""
+        token = self._pinned.set(bank)
+        try:
+            yield bank
+        finally:
+            self._pinned.reset(token)
+
+    def scan(self, text: str) -> PatternHits:
+        bank = self._pinned.get() or self._bank or self.compile()
+        return bank.scan(text)
+
+
+# Process-wide bank. PATTERN_MAX_GAP=<chars> enables bounded-gap linear mode.
+PATTERNS = PatternRegistry(
+    max_gap=int(os.environ.get("PATTERN_MAX_GAP", "0")) or None
+)
+
+
+def rule_name(qualified: str) -> str:
+    """Strip the group prefix from a registered rule name."""
+    return qualified.split(":", 1)[1]
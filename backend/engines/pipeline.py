@@ -0,0 +1,299 @@
+"""
+Engine Pipeline
+Engines register with a declared cost and dependencies. Per message the
+pipeline:
+  1. builds ONE immutable AnalysisContext; every derived representation
+     (normalized text, lowercase text, tokens with offsets, URL feature
+     records from the raw text, keyword hits, regex pattern hits) is
+     computed lazily on first use and memoized, so it exists exactly
+     once per message however many engines ask for it
+  2. runs engines cheapest-first (dependencies always run before the
+     engines that need them)
+  3. stops early as soon as a decisive engine fixes the verdict, so an
+     obvious scam never pays for the expensive engines
+
+A message analyzed in windows (services/streaming.py) passes the keyword
+phrases of the windows before it as `earlier`, so co-occurrence rules see
+every phrase read so far.
+
+Results are reported in registration order, whatever order they ran in.
+Every run records stage -> seconds timings (shared inputs and engines;
+an engine's time excludes shared inputs it happened to build first).
+"""
+
+import heapq
+import re
+import time
+from functools import cached_property
+from types import MappingProxyType
+from typing import Any, Callable, Dict, FrozenSet, List, NamedTuple, Optional, Sequence, Tuple
+
+from engines.keyword_registry import KEYWORDS, KeywordHits
+from engines.pattern_bank import PATTERNS, PatternHits
+from engines.url_features import URLFeatures
+
+
+def run_sync(coro):
+    """Drive a coroutine that never awaits anything to completion."""
+    try:
+        coro.send(None)
+    except StopIteration as done:
+        return done.value
+    coro.close()
+    raise RuntimeError("Engine coroutine suspended; cannot run synchronously")
+
+
+_TOKEN_RE = re.compile(r"\S+")
+
+
+# (phrases seen on the normalized text, on the lowercase text)
+EarlierPhrases = Tuple[FrozenSet[str], FrozenSet[str]]
+
+
+class Token(NamedTuple):
+    text: str
+    start: int  # offsets into AnalysisContext.lower
+    end: int
+
+
+class AnalysisContext:
+    """
+    Everything engines read about one message, built once per request.
+    Immutable: attributes cannot be rebound, and each derived property
+    is computed on first access and then memoized for the rest of the run.
+    """
+
+    def __init__(
+        self,
+        content: str,
+        mode: str,
+        headers: Optional[Dict[str, str]],
+        normalize: Callable[[str], str],
+        tokenize_urls: Callable[[str], List[URLFeatures]],
+        normalized: Optional[str] = None,
+        earlier: Optional[EarlierPhrases] = None,
+        urls: Optional[List[URLFeatures]] = None
+    ):
+        init = self.__dict__
+        init["content"] = content
+        init["mode"] = mode
+        init["headers"] = MappingProxyType(dict(headers)) if headers else None
+        init["_normalize"] = normalize
+        init["_tokenize_urls"] = tokenize_urls
+        init["_earlier"] = earlier
+        init["timings"] = {}
+        init["shared_seconds"] = 0.0
+        if normalized is not None:
+            init["normalized"] = normalized
+        if urls is not None:
+            init["urls"] = urls
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f"AnalysisContext is immutable (tried to set {name!r})")
+
+    def __delattr__(self, name: str):
+        raise AttributeError(f"AnalysisContext is immutable (tried to delete {name!r})")
+
+    def _timed(self, stage: str, fn: Callable, arg):
+        start = time.perf_counter()
+        value = fn(arg)
+        elapsed = time.perf_counter() - start
+        self.timings[stage] = self.timings.get(stage, 0.0) + elapsed
+        self.__dict__["shared_seconds"] += elapsed
+        return value
+
+    @cached_property
+    def normalized(self) -> str:
+        return self._timed("normalize", self._normalize, self.content)
+
+    @cached_property
+    def lower(self) -> str:
+        return self.content.lower()
+
+    @cached_property
+    def tokens(self) -> Tuple[Token, ...]:
+        """Whitespace-separated tokens of the lowercase text."""
+        return tuple(Token(m.group(), m.start(), m.end()) for m in _TOKEN_RE.finditer(self.lower))
+
+    @cached_property
+    def token_stream(self) -> str:
+        """Lowercase text with whitespace runs collapsed to one space."""
+        return " ".join(token.text for token in self.tokens)
+
+    @cached_property
+    def urls(self) -> List[URLFeatures]:
+        """Every URL candidate, tokenized from the RAW text."""
+        return self._timed("tokenize_urls", self._tokenize_urls, self.content)
+
+    @cached_property
+    def http_urls(self) -> List[URLFeatures]:
+        """URLs written with an http(s):// scheme."""
+        return [u for u in self.urls if u.scheme]
+
+    @cached_property
+    def hits(self) -> KeywordHits:
+        """Keyword hits on the normalized (anti-bypass) text."""
+        hits = self._timed("keyword_scan", KEYWORDS.scan, self.normalized)
+        return hits.after(self._earlier[0]) if self._earlier else hits
+
+    @cached_property
+    def lower_hits(self) -> KeywordHits:
+        """Keyword hits on the plain lowercase text (class engines)."""
+        hits = self._timed("keyword_scan", KEYWORDS.scan, self.lower)
+        return hits.after(self._earlier[1]) if self._earlier else hits
+
+    def phrases(self) -> EarlierPhrases:
+        """Every phrase seen so far: `earlier` for the next window."""
+        return self.hits.phrases(), self.lower_hits.phrases()
+
+    @cached_property
+    def patterns(self) -> PatternHits:
+        return self._timed("pattern_scan", PATTERNS.scan, self.lower)
+
+
+class EngineSpec:
+    __slots__ = ("name", "run", "cost", "depends_on", "decisive_at", "report", "order")
+
+    def __init__(self, name, run, cost, depends_on, decisive_at, report, order):
+        self.name = name
+        self.run = run
+        self.cost = cost
+        self.depends_on = depends_on
+        self.decisive_at = decisive_at
+        self.report = report
+        self.order = order
+
+
+class PipelineRun:
+    __slots__ = ("context", "results", "outputs", "stopped_by")
+
+    def __init__(self, context: AnalysisContext):
+        self.context = context
+        self.results: List[Dict[str, Any]] = []
+        self.outputs: Dict[str, Any] = {}  # engine name -> raw output
+        self.stopped_by: Optional[str] = None
+
+    @property
+    def timings(self) -> Dict[str, float]:
+        """stage -> seconds; engines are keyed "engine:<name>"."""
+        return self.context.timings
+
+
+class EnginePipeline:
+    def __init__(self, normalize: Callable[[str], str], tokenize_urls: Callable[[str], List[URLFeatures]]):
+        self._normalize = normalize
+        self._tokenize_urls = tokenize_urls
+        self._specs: Dict[str, EngineSpec] = {}
+        self._schedule: Optional[List[EngineSpec]] = None
+
+    def register(
+        self,
+        name: str,
+        run: Callable[[AnalysisContext, Dict[str, Any]], Any],
+        cost: float = 1.0,
+        depends_on: Sequence[str] = (),
+        decisive_at: Optional[float] = None,
+        report: bool = True
+    ):
+        """
+        run(context, upstream) returns an engine result dict or a list of
+        them; dependents see it as upstream[name].
+        decisive_at: stop the pipeline once this engine scores >= it.
+        report=False: support-only engine, output is not a result.
+        """
+        if name in self._specs:
+            raise ValueError(f"Engine already registered: {name}")
+        self._specs[name] = EngineSpec(
+            name, run, cost, tuple(depends_on), decisive_at, report, len(self._specs)
+        )
+        self._schedule = None
+
+    @property
+    def engine_names(self) -> List[str]:
+        return list(self._specs)
+
+    # ---------------- SCHEDULING ----------------
+    def schedule(self) -> List[EngineSpec]:
+        """Cheapest-first topological order (ties: registration order)."""
+        if self._schedule is not None:
+            return self._schedule
+
+        waiting = {name: set(spec.depends_on) for name, spec in self._specs.items()}
+        for name, deps in waiting.items():
+            missing = deps - self._specs.keys()
+            if missing:
+                raise ValueError(f"{name} depends on unknown engines: {sorted(missing)}")
+
+        ready = [
+            (spec.cost, spec.order, name)
+            for name, spec in self._specs.items() if not waiting[name]
+        ]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            _, _, name = heapq.heappop(ready)
+            order.append(self._specs[name])
+            for other, deps in waiting.items():
+                if name in deps:
+                    deps.discard(name)
+                    if not deps:
+                        spec = self._specs[other]
+                        heapq.heappush(ready, (spec.cost, spec.order, other))
+
+        if len(order) != len(self._specs):
+            raise ValueError("Engine dependency cycle detected")
+
+        self._schedule = order
+        return order
+
+    # ---------------- EXECUTION ----------------
+    def run(
+        self,
+        content: str,
+        mode: str,
+        headers: Optional[Dict[str, str]] = None,
+        normalized: Optional[str] = None,
+        early_exit: bool = True,
+        earlier: Optional[EarlierPhrases] = None,
+        urls: Optional[List[URLFeatures]] = None
+    ) -> PipelineRun:
+        """
+        early_exit=False runs every engine (offline training); stopped_by
+        still names the decisive engine that would have stopped the run.
+        earlier: keyword phrases of the preceding windows of this message.
+        normalized / urls: already computed by the caller (cache lookup),
+        so the context does not build them a second time.
+        """
+        context = AnalysisContext(
+            content, mode, headers, self._normalize, self._tokenize_urls, normalized, earlier, urls
+        )
+        run = PipelineRun(context)
+        produced: Dict[str, List[Dict[str, Any]]] = {}
+        clock = time.perf_counter
+        started = clock()
+
+        for spec in self.schedule():
+            shared_before = context.shared_seconds
+            start = clock()
+            output = spec.run(context, run.outputs)
+            context.timings["engine:" + spec.name] = (
+                clock() - start - (context.shared_seconds - shared_before)
+            )
+            run.outputs[spec.name] = output
+
+            if not spec.report:
+                continue
+            results = output if isinstance(output, list) else [output]
+            produced[spec.name] = results
+
+            if run.stopped_by is None and spec.decisive_at is not None and any(
+                r["risk_score"] >= spec.decisive_at for r in results
+            ):
+                run.stopped_by = spec.name
+                if early_exit:
+                    break
+
+        for name in self._specs:
+            run.results.extend(produced.get(name, ()))
+        context.timings["pipeline"] = clock() - started
+        return run
@@ -0,0 +1,254 @@
+"""
+Raw Email (RFC 5322 / MIME / mbox)
+Turns a raw .eml message into what the engines need, doing as little
+parsing as possible:
+
+  headers       only the header block is scanned, and only the fields
+                the header engine reads are unfolded and decoded
+                (From, Return-Path, Reply-To, Subject, Received,
+                Authentication-Results, Received-SPF)
+  authentication spf / dkim / dmarc results from Authentication-Results
+                (topmost header: the one our own MTA added)
+  received_hops the Received chain as structured hops, newest first
+  text()        text/plain and text/html parts, decoded on first use
+                (attachments are never decoded)
+
+MboxSplitter cuts an mbox byte stream into messages incrementally
+("From " separator lines, ">From " unquoting); a stream without any
+separator line is one message. mbox_spans does the same split over a
+memory-mapped file by offset, without copying it.
+"""
+
+import email
+import html
+import re
+from email import policy
+from email.header import decode_header, make_header
+from email.utils import parsedate_to_datetime
+from functools import cached_property
+from typing import Dict, Iterator, List, Optional, Tuple
+
+WANTED_HEADERS = frozenset({
+    "from", "return-path", "reply-to", "subject", "received",
+    "authentication-results", "received-spf"
+})
+
+_HEADER_END = re.compile(rb"\r?\n\r?\n")
+_AUTH_RESULT = re.compile(r"\b(spf|dkim|dmarc)\s*=\s*([a-z]+)", re.IGNORECASE)
+_HOP_FROM = re.compile(r"\bfrom\s+([^\s;()]+)", re.IGNORECASE)
+_HOP_BY = re.compile(r"\bby\s+([^\s;()]+)", re.IGNORECASE)
+_HOP_WITH = re.compile(r"\bwith\s+([^\s;()]+)", re.IGNORECASE)
+_HOP_IP = re.compile(r"\[((?:\d{1,3}\.){3}\d{1,3}|(?:ipv6:)?[0-9a-f:]+)\]", re.IGNORECASE)
+_QUOTED_FROM = re.compile(rb">+From ")
+_QUOTED_FROM_LINES = re.compile(rb"^>(>*From )", re.MULTILINE)
+_TAG = re.compile(r"<(script|style)\b.*?</\1\s*>|<[^>]+>", re.IGNORECASE | re.DOTALL)
+
+
+def _decode_words(value: str) -> str:
+    """RFC 2047 encoded words (=?utf-8?b?...?=) -> text."""
+    if "=?" not in value:
+        return value
+    try:
+        return str(make_header(decode_header(value)))
+    except (UnicodeError, LookupError, ValueError):
+        return value
+
+
+def html_to_text(markup: str) -> str:
+    return html.unescape(_TAG.sub(" ", markup))
+
+
+class ReceivedHop:
+    __slots__ = ("raw", "from_host", "by_host", "ip", "protocol", "timestamp")
+
+    def __init__(self, raw: str):
+        self.raw = raw
+        clauses, _, date = raw.rpartition(";")
+        if not _:
+            clauses, date = raw, ""
+
+        m = _HOP_FROM.search(clauses)
+        self.from_host = m.group(1).lower() if m else ""
+        m = _HOP_BY.search(clauses)
+        self.by_host = m.group(1).lower() if m else ""
+        m = _HOP_IP.search(clauses)
+        self.ip = m.group(1).lower() if m else ""
+        m = _HOP_WITH.search(clauses)
+        self.protocol = m.group(1).upper() if m else ""
+
+        try:
+            self.timestamp = parsedate_to_datetime(date.strip()) if date.strip() else None
+        except (TypeError, ValueError):
+            self.timestamp = None
+
+    def __repr__(self) -> str:
+        return f"ReceivedHop(from={self.from_host!r}, by={self.by_host!r}, ip={self.ip!r})"
+
+
+def split_received_chain(value: str) -> List[str]:
+    """
+    One string per hop from an engine "received" value: newline-separated
+    hops (raw ingestion) or "Received:"-prefixed lines pasted by clients.
+    """
+    hops = re.split(r"(?:^|\s)received:\s*|\n(?=\S)", value, flags=re.IGNORECASE)
+    return [" ".join(hop.split()) for hop in hops if hop.strip()]
+
+
+def parse_received_chain(value: str) -> List[ReceivedHop]:
+    return [ReceivedHop(hop) for hop in split_received_chain(value)]
+
+
+class RawEmail:
+    """Lazy view over one raw RFC 5322 message."""
+
+    def __init__(self, raw: bytes):
+        self.raw = raw
+        m = _HEADER_END.search(raw)
+        self._header_block = raw[:m.start()] if m else raw
+
+    @cached_property
+    def headers(self) -> Dict[str, List[str]]:
+        """Wanted header name (lowercase) -> unfolded, decoded values in order."""
+        found: Dict[str, List[str]] = {}
+        name, value = None, []
+
+        def flush():
+            if name in WANTED_HEADERS:
+                found.setdefault(name, []).append(_decode_words(" ".join(value).strip()))
+
+        for line in self._header_block.decode("utf-8", "replace").splitlines():
+            if line[:1] in (" ", "\t"):
+                if name is not None:
+                    value.append(line.strip())
+                continue
+            flush()
+            field, sep, rest = line.partition(":")
+            if not sep:
+                name, value = None, []
+                continue
+            name, value = field.strip().lower(), [rest.strip()]
+        flush()
+        return found
+
+    def header(self, name: str) -> str:
+        values = self.headers.get(name)
+        return values[0] if values else ""
+
+    @cached_property
+    def authentication(self) -> Dict[str, str]:
+        """spf / dkim / dmarc -> result (pass, fail, softfail, none...)."""
+        results: Dict[str, str] = {}
+        for value in self.headers.get("authentication-results", ()):
+            for method, result in _AUTH_RESULT.findall(value):
+                results.setdefault(method.lower(), result.lower())
+            if results:
+                break
+        spf = self.header("received-spf")
+        if "spf" not in results and spf:
+            results["spf"] = spf.split(None, 1)[0].lower()
+        return results
+
+    @cached_property
+    def received_hops(self) -> List[ReceivedHop]:
+        """Newest first (the order MTAs prepend them)."""
+        return [ReceivedHop(value) for value in self.headers.get("received", ())]
+
+    def engine_headers(self) -> Dict[str, str]:
+        """The Dict[str, str] shape EmailHeaderEngine / email_headers take."""
+        headers = {
+            name: self.header(name)
+            for name in ("from", "return-path", "reply-to", "subject")
+            if self.header(name)
+        }
+        headers.update(self.authentication)
+        if self.received_hops:
+            headers["received"] = "\n".join(hop.raw for hop in self.received_hops)
+        return headers
+
+    @cached_property
+    def _message(self) -> email.message.EmailMessage:
+        # Full MIME parse, only when the body is actually needed
+        return email.message_from_bytes(self.raw, policy=policy.default)
+
+    def text(self) -> str:
+        """Readable body: text/plain parts, HTML parts as text if there are none."""
+        plain, markup = [], []
+        for part in self._message.walk():
+            if part.is_multipart() or part.get_content_disposition() == "attachment":
+                continue
+            content_type = part.get_content_type()
+            if content_type not in ("text/plain", "text/html"):
+                continue
+            try:
+                content = part.get_content()
+            except (LookupError, UnicodeError):
+                payload = part.get_payload(decode=True) or b""
+                content = payload.decode("utf-8", "replace")
+            (plain if content_type == "text/plain" else markup).append(content)
+
+        if plain:
+            return "\n".join(plain)
+        return "\n".join(html_to_text(m) for m in markup)
+
+
+class MboxSplitter:
+    """Incremental mbox bytes -> raw messages."""
+
+    def __init__(self):
+        self._buffer = b""
+        self._current: List[bytes] = []
+
+    def feed(self, chunk: bytes) -> Iterator[bytes]:
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split(b"\n")
+        for line in lines:
+            message = self._line(line + b"\n")
+            if message is not None:
+                yield message
+
+    def finish(self) -> Iterator[bytes]:
+        if self._buffer:
+            message = self._line(self._buffer)
+            self._buffer = b""
+            if message is not None:
+                yield message
+        if self._current:
+            yield b"".join(self._current)
+            self._current = []
+
+    def _line(self, line: bytes) -> Optional[bytes]:
+        if line.startswith(b"From "):
+            done = b"".join(self._current) if self._current else None
+            self._current = []
+            return done
+        if _QUOTED_FROM.match(line):
+            # mboxrd: one ">" was added per level on write
+            line = line[1:]
+        self._current.append(line)
+        return None
+
+
+def unquote_mbox(raw: bytes) -> bytes:
+    """mboxrd: drop one ">" from every quoted ">From " line."""
+    if b">From " not in raw:
+        return raw
+    return _QUOTED_FROM_LINES.sub(rb"\1", raw)
+
+
+def mbox_spans(buffer, start: int = 0) -> Iterator[Tuple[int, int]]:
+    """
+    (message start, message end) byte offsets in an mbox buffer (bytes or
+    mmap), "From " separator lines excluded. start must be 0 or a
+    separator offset (a resume checkpoint).
+    """
+    size = len(buffer)
+    pos = start
+    while pos < size:
+        if buffer[pos:pos + 5] == b"From ":
+            line_end = buffer.find(b"\n", pos)
+            pos = size if line_end == -1 else line_end + 1
+        nxt = buffer.find(b"\nFrom ", pos)
+        end = size if nxt == -1 else nxt + 1
+        if end > pos:
+            yield pos, end
+        pos = end
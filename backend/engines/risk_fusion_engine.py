@@ -1,13 +1,30 @@
 # backend/engines/risk_fusion_engine.py
 
+from typing import Optional
+
+from engines.fusion_config import FUSION, FusionConfig
+
+# Built-in band, kept while no trained fusion config sets the threshold
+BUILTIN_MALICIOUS_AT = 60
+
+
 class RiskFusionEngine:
     """
     Combines all engine outputs into a final verdict.
     Uses rule-priority instead of simple averaging.
+
+    With a trained fusion config the "Malicious" band starts at its
+    phishing threshold, so this label agrees with the final verdict;
+    without one the built-in bands apply. The score floors are engine
+    rules: the fusion weights are fitted on the scores they produce.
     """
 
+    def __init__(self, config: Optional[FusionConfig] = None):
+        self.config = config or FUSION
+
     def calculate(self, base_score, intent, scam_type_detected):
         risk_score = base_score
+        malicious_at = self.config.phishing_threshold if self.config.trained else BUILTIN_MALICIOUS_AT
 
         # Hard rules override averages
         if intent.get("malicious_intent"):
@@ -17,11 +34,11 @@ class RiskFusionEngine:
             risk_score = max(risk_score, 80)
 
         # Verdict mapping
-        if risk_score >= 80:
+        if risk_score >= max(80, malicious_at):
             verdict = "Critical – Automated Scam"
-        elif risk_score >= 60:
+        elif risk_score >= malicious_at:
             verdict = "Malicious"
-        elif risk_score >= 35:
+        elif risk_score >= min(35, malicious_at):
             verdict = "Suspicious"
         else:
             verdict = "Clean"
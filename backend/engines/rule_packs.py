@@ -0,0 +1,430 @@
+"""
+Rule Packs (hot-reloadable rules)
+Keyword groups, regex pattern groups, domain lists (risky TLDs, URL
+shorteners), protected brands and scam workflows can be changed without
+a redeploy. A rule pack (YAML or JSON) edits the built-in rules the
+engines register at import:
+
+    version: "2026-10-17.1"
+    keywords:
+      server.market: {add: ["crypto giveaway"], remove: ["upi"]}
+      intent_density.threat: [suspend, terminate, lock]     # replace
+    patterns:
+      nlp.manipulation: {add: {refund: '\\b(refund|chargeback)\\b'}}
+    domains:
+      tlds.bad: {add: [".zip", ".mov"]}
+      url.shorteners: {add: ["cutt.ly"]}
+    brands: {add: ["examplebank.com"]}
+    workflows:
+      fake_invoice: {stages: [[invoice], [overdue, unpaid], [pay now]],
+                     base_score: 30, message: "Fake invoice workflow detected",
+                     max_gap: 20}                             # words, optional
+      job_fraud: null                                          # remove
+
+A list replaces, {add, remove} edits; unknown group / list names are
+rejected, so a typo never silently disables a rule.
+
+Engines register their built-ins at import; RULES.load() (server
+startup) then compiles built-ins + pack once. Registering different
+built-ins after that raises: the request path never compiles rules.
+
+A pack is compiled (automaton, pattern bank, tries, brand index) into a
+RuleSet OFF the request path, then installed by swapping references.
+RULES.pinned() fixes one RuleSet for a whole analysis, so a request
+that started before a swap finishes on the rules it started with. A
+pack that fails to compile is rejected and the running rules stay.
+
+RULE_PACK_FILE          path of a .yaml / .yml / .json pack  (default: unset)
+RULE_PACK_POLL_SECONDS  file change check interval, 0 = off  (default: 2)
+ADMIN_TOKEN             enables GET /api/admin/rules and POST
+                        /api/admin/rules/reload (X-Admin-Token header)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import yaml
+
+from engines.domain_index import LabelTrie
+from engines.keyword_registry import KEYWORDS, KeywordAutomaton
+from engines.lookalike_engine import BRAND_INDEX, BrandIndex, LookalikeMatch
+from engines.pattern_bank import PATTERNS, PatternBank, rule_name
+from engines.workflow_matcher import WorkflowMatcher, phrase
+
+logger = logging.getLogger("CyberSentinel")
+
+_SECTIONS = {"version", "keywords", "patterns", "domains", "brands", "workflows"}
+# Everything a bad pack can raise while being read or compiled
+_PACK_ERRORS = (OSError, ValueError, re.error, yaml.YAMLError)
+_PINNED: ContextVar[Optional["RuleSet"]] = ContextVar("rule_set", default=None)
+
+
+# --------------------------------------------------
+# PACK EDITS
+# --------------------------------------------------
+def _edit_list(base: Tuple[str, ...], spec: Any, where: str) -> Tuple[str, ...]:
+    """A list replaces base; {add, remove} edits it. Lowercase, deduplicated."""
+    if isinstance(spec, list):
+        items = spec
+    elif isinstance(spec, dict) and set(spec) <= {"add", "remove"}:
+        removed = {str(item).lower() for item in spec.get("remove") or ()}
+        items = [item for item in base if item not in removed] + list(spec.get("add") or ())
+    else:
+        raise ValueError(f"{where}: expected a list or {{add, remove}}")
+    if not all(isinstance(item, str) and item.strip() for item in items):
+        raise ValueError(f"{where}: entries must be non-empty strings")
+    return tuple(dict.fromkeys(item.strip().lower() for item in items))
+
+
+def _edit_patterns(group: str, spec: Any) -> Tuple[Tuple[str, str], ...]:
+    """{name: regex} / [[name, regex]] replace; {add: {...}, remove: [...]} edits."""
+    where = f"patterns.{group}"
+    if isinstance(spec, dict) and set(spec) <= {"add", "remove"}:
+        removed = set(spec.get("remove") or ())
+        rules = [(rule_name(name), regex) for name, regex in PATTERNS.builtin(group)
+                 if rule_name(name) not in removed]
+        added = spec.get("add") or {}
+        rules = [(name, regex) for name, regex in rules if name not in added] + list(added.items())
+    elif isinstance(spec, dict):
+        rules = list(spec.items())
+    elif isinstance(spec, list) and all(isinstance(r, (list, tuple)) and len(r) == 2 for r in spec):
+        rules = [tuple(r) for r in spec]
+    else:
+        raise ValueError(f"{where}: expected {{name: regex}}, [[name, regex]] or {{add, remove}}")
+    if not all(isinstance(n, str) and isinstance(r, str) and r for n, r in rules):
+        raise ValueError(f"{where}: names and patterns must be strings")
+    return PATTERNS.qualify(group, rules)
+
+
+def _compile_workflow(name: str, spec: Any) -> Dict[str, Any]:
+    where = f"workflows.{name}"
+    if not isinstance(spec, dict):
+        raise ValueError(f"{where}: expected {{stages, base_score, message}}")
+    stages = spec.get("stages")
+    if not isinstance(stages, list) or not stages or not all(
+        isinstance(stage, list) and stage and all(isinstance(k, str) and k.strip() for k in stage)
+        for stage in stages
+    ):
+        raise ValueError(f"{where}.stages: expected a list of non-empty keyword lists")
+    score = spec.get("base_score")
+    if not isinstance(score, (int, float)) or not 0 <= score <= 100:
+        raise ValueError(f"{where}.base_score: expected a number in 0..100")
+    if not isinstance(spec.get("message"), str):
+        raise ValueError(f"{where}.message: expected a string")
+    compiled = {
+        "stages": tuple(tuple(phrase(k) for k in stage) for stage in stages),
+        "base_score": score,
+        "message": spec["message"]
+    }
+    if "max_gap" in spec:
+        gap = spec["max_gap"]
+        if gap is not None and (not isinstance(gap, int) or gap < 0):
+            raise ValueError(f"{where}.max_gap: expected words >= 0 or null (unlimited)")
+        compiled["max_gap"] = gap
+    return compiled
+
+
+def read_pack(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        pack = json.load(f) if path.endswith(".json") else yaml.safe_load(f)
+    if pack is None:
+        return {}
+    if not isinstance(pack, dict):
+        raise ValueError(f"{path}: a rule pack is a mapping")
+    unknown = set(pack) - _SECTIONS
+    if unknown:
+        raise ValueError(f"{path}: unknown sections {sorted(unknown)}")
+    return pack
+
+
+# --------------------------------------------------
+# COMPILED SNAPSHOT
+# --------------------------------------------------
+class RuleSet:
+    """Every compiled rule structure of one pack version (never mutated)."""
+
+    __slots__ = (
+        "version", "source", "loaded_at",
+        "keyword_overrides", "keywords", "pattern_overrides", "patterns",
+        "domains", "brands", "workflows", "workflow_matcher"
+    )
+
+    def __init__(self, version: str, source: Optional[str], **compiled):
+        self.version = version
+        self.source = source
+        self.loaded_at = time.time()
+        self.keyword_overrides: Dict[str, Tuple[str, ...]] = compiled["keyword_overrides"]
+        self.keywords: KeywordAutomaton = compiled["keywords"]
+        self.pattern_overrides: Dict[str, Tuple[Tuple[str, str], ...]] = compiled["pattern_overrides"]
+        self.patterns: PatternBank = compiled["patterns"]
+        self.domains: Dict[str, LabelTrie] = compiled["domains"]
+        self.brands: BrandIndex = compiled["brands"]
+        self.workflows: Dict[str, Dict[str, Any]] = compiled["workflows"]
+        self.workflow_matcher = WorkflowMatcher(self.workflows)
+
+
+class DomainList:
+    """Live handle on a registered domain list: `host in handle`."""
+
+    __slots__ = ("name", "_manager")
+
+    def __init__(self, name: str, manager: "RuleManager"):
+        self.name = name
+        self._manager = manager
+
+    def __contains__(self, host: str) -> bool:
+        return host in self._manager.snapshot().domains[self.name]
+
+    def __repr__(self) -> str:
+        return f"DomainList({self.name!r})"
+
+
+class BrandList:
+    """Live handle on the protected brands: lookup() uses the snapshot's index."""
+
+    __slots__ = ("_manager",)
+
+    def __init__(self, manager: "RuleManager"):
+        self._manager = manager
+
+    def lookup(self, host: str) -> List[LookalikeMatch]:
+        return self._manager.snapshot().brands.lookup(host)
+
+    def __repr__(self) -> str:
+        return "BrandList()"
+
+
+class RuleManager:
+    def __init__(self, path: Optional[str] = None, poll_seconds: float = 2.0):
+        self.path = path
+        self.poll_seconds = poll_seconds
+        self._domains: Dict[str, Tuple[str, ...]] = {}     # built-in domain lists
+        self._workflows: Dict[str, Dict[str, Any]] = {}    # built-in workflows
+        self._pack: Dict[str, Any] = {}                    # last installed pack
+        self._current: Optional[RuleSet] = None
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[RuleSet], None]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._mtime: Optional[float] = None
+        self.brands = BrandList(self)
+
+        self.reloads = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "RuleManager":
+        return cls(
+            path=os.environ.get("RULE_PACK_FILE") or None,
+            poll_seconds=float(os.environ.get("RULE_PACK_POLL_SECONDS", "2"))
+        )
+
+    # ---------------- BUILT-INS ----------------
+    def register_domains(self, name: str, domains: List[str]) -> DomainList:
+        domains = tuple(d.lower() for d in domains)
+        with self._lock:
+            if self._domains.get(name) != domains:
+                self._check_open(f"domain list {name!r}")
+                self._domains[name] = domains
+        return DomainList(name, self)
+
+    def register_workflows(self, workflows: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        compiled = {name: _compile_workflow(name, spec) for name, spec in workflows.items()}
+        with self._lock:
+            changed = [name for name, spec in compiled.items() if self._workflows.get(name) != spec]
+            if changed:
+                self._check_open(f"workflows {changed}")
+                self._workflows.update(compiled)
+        return workflows
+
+    def _check_open(self, what: str):
+        """Built-ins are only compiled by load(); later changes would be lost."""
+        if self._current is not None:
+            raise RuntimeError(f"Rule {what} registered after RULES.load()")
+
+    def on_swap(self, listener: Callable[[RuleSet], None]):
+        """listener(new rule set) runs on the loop after every hot swap."""
+        self._listeners.append(listener)
+
+    # ---------------- COMPILE ----------------
+    def compile(self, pack: Dict[str, Any], source: Optional[str] = None) -> RuleSet:
+        """Builds every structure for built-ins + pack; installs nothing."""
+        keyword_overrides = {}
+        for group, spec in (pack.get("keywords") or {}).items():
+            try:
+                base = KEYWORDS.builtin(group)
+            except KeyError:
+                raise ValueError(f"Unknown keyword group: {group}") from None
+            keyword_overrides[group] = _edit_list(base, spec, f"keywords.{group}")
+
+        pattern_overrides = {}
+        for group, spec in (pack.get("patterns") or {}).items():
+            try:
+                PATTERNS.builtin(group)
+            except KeyError:
+                raise ValueError(f"Unknown pattern group: {group}") from None
+            pattern_overrides[group] = _edit_patterns(group, spec)
+
+        domain_specs = pack.get("domains") or {}
+        unknown = set(domain_specs) - self._domains.keys()
+        if unknown:
+            raise ValueError(f"Unknown domain lists: {sorted(unknown)}")
+        domains = {
+            name: LabelTrie(_edit_list(base, domain_specs[name], f"domains.{name}")
+                            if name in domain_specs else base)
+            for name, base in self._domains.items()
+        }
+
+        brands = BRAND_INDEX
+        if pack.get("brands") is not None:
+            base = tuple(dict.fromkeys(BrandIndex.read_files(*BrandIndex.env_files())))
+            brands = BrandIndex(_edit_list(base, pack["brands"], "brands"))
+
+        workflows = dict(self._workflows)
+        for name, spec in (pack.get("workflows") or {}).items():
+            if spec is None:
+                workflows.pop(name, None)
+            else:
+                workflows[name] = _compile_workflow(name, spec)
+
+        return RuleSet(
+            str(pack.get("version", "builtin" if not pack else "unversioned")),
+            source,
+            keyword_overrides=keyword_overrides,
+            keywords=KEYWORDS.build(keyword_overrides),
+            pattern_overrides=pattern_overrides,
+            patterns=PATTERNS.build(pattern_overrides),
+            domains=domains,
+            brands=brands,
+            workflows=workflows
+        )
+
+    def install(self, rules: RuleSet, pack: Dict[str, Any]):
+        """Atomic from a request's point of view: reference swaps only."""
+        with self._lock:
+            KEYWORDS.install(rules.keyword_overrides, rules.keywords)
+            PATTERNS.install(rules.pattern_overrides, rules.patterns)
+            self._pack = pack
+            self._current = rules
+
+    # ---------------- SNAPSHOTS ----------------
+    def snapshot(self) -> RuleSet:
+        """The pinned rule set of this analysis, else the current one."""
+        pinned = _PINNED.get()
+        if pinned is not None:
+            return pinned
+        current = self._current
+        if current is None:
+            raise RuntimeError("Rules are not compiled yet: RULES.load() runs at startup")
+        return current
+
+    @property
+    def version(self) -> str:
+        return self.snapshot().version
+
+    @contextmanager
+    def pinned(self) -> Iterator[RuleSet]:
+        rules = self.snapshot()
+        token = _PINNED.set(rules)
+        try:
+            with KEYWORDS.pinned(rules.keywords), PATTERNS.pinned(rules.patterns):
+                yield rules
+        finally:
+            _PINNED.reset(token)
+
+    # ---------------- LOADING ----------------
+    def load(self) -> bool:
+        """
+        Compiles built-ins + pack once at startup, after every engine has
+        registered; a bad pack leaves the built-ins.
+        """
+        if self.path:
+            try:
+                self._mtime = os.path.getmtime(self.path)
+                pack = read_pack(self.path)
+                self.install(self.compile(pack, self.path), pack)
+            except _PACK_ERRORS as e:
+                self._failed(e)
+            else:
+                logger.info("Rule pack %s loaded from %s", self.version, self.path)
+                return True
+        if self._current is None:
+            self.install(self.compile({}), {})
+        return False
+
+    async def reload(self) -> Dict[str, Any]:
+        """Recompiles the pack in a thread, then swaps it in on the loop."""
+        if not self.path:
+            raise ValueError("RULE_PACK_FILE is not set")
+        try:
+            self._mtime = os.path.getmtime(self.path)
+            pack = await asyncio.to_thread(read_pack, self.path)
+            rules = await asyncio.to_thread(self.compile, pack, self.path)
+        except _PACK_ERRORS as e:
+            self._failed(e)
+            raise ValueError(f"Rule pack rejected: {e}") from e
+        self.install(rules, pack)
+        self.reloads += 1
+        self.last_error = None
+        logger.info("Rule pack %s hot-swapped from %s", rules.version, self.path)
+        for listener in self._listeners:
+            listener(rules)
+        return self.stats()
+
+    def _failed(self, error: Exception):
+        self.errors += 1
+        self.last_error = str(error)
+        logger.error("Rule pack %s rejected, keeping rules %s: %s",
+                     self.path, self._current.version if self._current else "builtin", error)
+
+    # ---------------- WATCHER ----------------
+    def start(self):
+        """Starts the file watcher on the running loop (app startup)."""
+        if self.path and self.poll_seconds > 0 and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._watch())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                continue
+            if mtime != self._mtime:
+                try:
+                    await self.reload()
+                except ValueError:
+                    pass  # counted and logged; the running rules stay
+
+    def stats(self) -> Dict[str, Any]:
+        rules = self._current
+        return {
+            "version": rules.version if rules else "builtin",
+            "source": self.path,
+            "loaded_at": rules.loaded_at if rules else None,
+            "reloads": self.reloads,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "watching": self._task is not None
+        }
+
+
+# Process-wide rules
+RULES = RuleManager.from_env()
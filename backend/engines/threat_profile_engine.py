@@ -1,12 +1,21 @@
 # backend/engines/threat_profile_engine.py
 
+from engines.keyword_registry import KEYWORDS
+
+URGENCY_WORDS = KEYWORDS.register("threat.urgency", ["urgent", "act now", "limited time"])
+REWARD_WORDS = KEYWORDS.register("threat.reward", ["won", "congratulations", "reward", "prize"])
+AUTHORITY_WORDS = KEYWORDS.register("threat.authority", ["bank", "support team", "security team"])
+FINANCIAL_WORDS = KEYWORDS.register("threat.financial", ["fee", "payment", "transfer"])
+CREDENTIAL_WORDS = KEYWORDS.register("threat.credential", ["password", "otp", "verify account"])
+
 class ThreatProfileEngine:
     """
     Builds a psychological and impact-based threat profile.
     """
 
-    def analyze(self, content: str):
+    def analyze(self, content: str, hits=None):
         text = content.lower()
+        hits = hits if hits is not None else KEYWORDS.scan(text)
 
         manipulation = []
         impact = {
@@ -16,21 +25,21 @@ class ThreatProfileEngine:
         }
 
         # Manipulation techniques
-        if any(w in text for w in ["urgent", "act now", "limited time"]):
+        if hits.any_of(URGENCY_WORDS):
             manipulation.append("Urgency Pressure")
             impact["emotional_distress"] = True
 
-        if any(w in text for w in ["won", "congratulations", "reward", "prize"]):
+        if hits.any_of(REWARD_WORDS):
             manipulation.append("Reward Exploitation")
 
-        if any(w in text for w in ["bank", "support team", "security team"]):
+        if hits.any_of(AUTHORITY_WORDS):
             manipulation.append("Authority Impersonation")
 
         # Impact analysis
-        if any(w in text for w in ["fee", "payment", "transfer"]):
+        if hits.any_of(FINANCIAL_WORDS):
             impact["financial_loss"] = True
 
-        if any(w in text for w in ["password", "otp", "verify account"]):
+        if hits.any_of(CREDENTIAL_WORDS):
             impact["credential_compromise"] = True
 
         return {
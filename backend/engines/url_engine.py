@@ -4,34 +4,39 @@ Detects malicious, AI-generated, and scam URLs using
 heuristics + entropy + trust-floor logic.
 """
 
-import re
-import math
-from typing import List, Dict
-from urllib.parse import urlparse
+from typing import List, Dict, Optional
+
+from engines.domain_index import DOMAINS
+from engines.rule_packs import RULES
+from engines.url_features import URLFeatures, tokenize_urls
+
+# Registered at import, before RULES.load() compiles them
+SUSPICIOUS_TLDS = RULES.register_domains("url.suspicious_tlds", [
+    '.tk', '.ml', '.ga', '.cf', '.gq',
+    '.xyz', '.top', '.work', '.click', '.zip'
+])
+
+URL_SHORTENERS = RULES.register_domains("url.shorteners", [
+    'bit.ly', 'tinyurl.com', 't.co',
+    'goo.gl', 'ow.ly', 'is.gd'
+])
+
 
 class URLEngine:
     def __init__(self):
-        self.legitimate_domains = {
-            'google.com', 'facebook.com', 'amazon.com', 'paypal.com',
-            'microsoft.com', 'apple.com', 'netflix.com', 'linkedin.com'
-        }
+        # Protected brands (homoglyph / typo / combosquat index)
+        self.brands = RULES.brands
 
-        self.suspicious_tlds = {
-            '.tk', '.ml', '.ga', '.cf', '.gq',
-            '.xyz', '.top', '.work', '.click', '.zip'
-        }
-
-        self.url_shorteners = {
-            'bit.ly', 'tinyurl.com', 't.co',
-            'goo.gl', 'ow.ly', 'is.gd'
-        }
+        # Domain lists are rule-pack editable (engines/rule_packs.py)
+        self.suspicious_tlds = SUSPICIOUS_TLDS
+        self.url_shorteners = URL_SHORTENERS
 
     # ---------------- MAIN ENTRY ----------------
-    async def analyze(self, content: str, mode: str) -> Dict:
+    async def analyze(self, content: str, mode: str, urls: Optional[List[URLFeatures]] = None) -> Dict:
         findings = []
         risk_score = 0.0
 
-        urls = self._extract_urls(content)
+        urls = urls if urls is not None else tokenize_urls(content)
 
         # Trust floor: URL mode but no URL
         if mode == "url" and not urls:
@@ -48,8 +53,8 @@ class URLEngine:
                 0.4
             )
 
-        for url in urls[:5]:
-            risk_score += self._analyze_single_url(url, findings)
+        for features in urls[:5]:
+            risk_score += self._analyze_single_url(features, findings)
 
         # 🔥 Trust Floor: ANY external unknown URL
         if urls and risk_score < 25:
@@ -58,28 +63,22 @@ class URLEngine:
 
         return self._result(min(risk_score, 100), findings, 0.9)
 
-    # ---------------- URL EXTRACTION ----------------
-    def _extract_urls(self, content: str) -> List[str]:
-        pattern = r'(https?://[^\s<>"\']+|www\.[^\s<>"\']+|[a-zA-Z0-9-]+\.[a-z]{2,})'
-        return re.findall(pattern, content.lower())
-
     # ---------------- SINGLE URL ANALYSIS ----------------
-    def _analyze_single_url(self, url: str, findings: List[str]) -> float:
+    def _analyze_single_url(self, features: URLFeatures, findings: List[str]) -> float:
         score = 0.0
+        domain = features.host
 
-        if not url.startswith(("http://", "https://")):
-            url = "http://" + url
-
-        parsed = urlparse(url)
-        domain = parsed.netloc.lower()
+        if DOMAINS.is_denylisted(domain):
+            score += 60
+            findings.append("Domain is on the local denylist")
 
         # IP-based URL
-        if re.match(r'\d{1,3}(\.\d{1,3}){3}', domain):
+        if features.is_ip:
             score += 40
             findings.append("IP-based URL used (high risk)")
 
         # Suspicious TLD
-        if any(domain.endswith(tld) for tld in self.suspicious_tlds):
+        if domain in self.suspicious_tlds:
             score += 30
             findings.append("High-risk top-level domain detected")
 
@@ -89,7 +88,10 @@ class URLEngine:
             findings.append("URL shortener used (obfuscation)")
 
         # Look-alike domain
-        score += self._check_lookalike(domain, findings)
+        score += self._check_lookalike(features, findings)
+
+        # IDN homographs (scripts from the tokenizer, not the ASCII-folded text)
+        score += self._check_idn(features, findings)
 
         # Excessive subdomains
         if domain.count('.') > 3:
@@ -102,44 +104,46 @@ class URLEngine:
             findings.append("Machine-generated domain structure")
 
         # Randomness / entropy
-        if self._high_entropy(domain):
+        if self._high_entropy(features):
             score += 25
             findings.append("High entropy domain (AI-generated pattern)")
 
         return score
 
     # ---------------- LOOK-ALIKE CHECK ----------------
-    def _check_lookalike(self, domain: str, findings: List[str]) -> float:
-        score = 0
+    def _check_lookalike(self, features: URLFeatures, findings: List[str]) -> float:
+        if DOMAINS.is_allowlisted(features.host):
+            return 0
 
-        substitutions = {
-            'paypal': ['paypa1', 'paypai', 'paypa11'],
-            'amazon': ['amaz0n', 'arnazon'],
-            'google': ['g00gle', 'gooogle'],
-            'microsoft': ['micros0ft', 'rnicrosoft'],
-            'apple': ['app1e', 'appl3']
-        }
-
-        for legit, fakes in substitutions.items():
-            if any(fake in domain for fake in fakes):
-                findings.append(f"Look-alike domain mimicking {legit}")
+        score = 0
+        for match in self.brands.lookup(features.host):
+            if match.kind != "combosquat":
+                findings.append(f"Look-alike domain mimicking {match.brand}")
                 return 35
+            findings.append(f"Domain resembles {match.official}")
+            score += 30
 
-        for legit in self.legitimate_domains:
-            base = legit.split('.')[0]
-            if base in domain and legit not in domain:
-                findings.append(f"Domain resembles {legit}")
-                score += 30
+        return score
 
+    # ---------------- IDN / SCRIPT CHECK ----------------
+    def _check_idn(self, features: URLFeatures, findings: List[str]) -> float:
+        score = 0
+        if features.mixed_script:
+            score += 40
+            findings.append(f"Mixed-script domain: {features.unicode_host}")
+        if features.whole_script_spoof:
+            score += 35
+            findings.append(f"Non-Latin domain built from Latin look-alikes: {features.unicode_host}")
+        if features.bad_punycode:
+            score += 25
+            findings.append("Malformed punycode (xn--) label")
         return score
 
     # ---------------- ENTROPY CHECK ----------------
-    def _high_entropy(self, text: str) -> bool:
-        if len(text) < 10:
+    def _high_entropy(self, features: URLFeatures) -> bool:
+        if len(features.host) < 10:
             return False
-        probabilities = [text.count(c) / len(text) for c in set(text)]
-        entropy = -sum(p * math.log2(p) for p in probabilities)
-        return entropy > 4.0
+        return features.host_entropy > 4.0
 
     # ---------------- RESULT FORMAT ----------------
     def _result(self, score: float, findings: List[str], confidence: float):
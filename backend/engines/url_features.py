@@ -0,0 +1,213 @@
+"""
+URL Tokenizer & Feature Records
+One regex pass over the RAW message text (before anti-bypass
+normalization, which rewrites 0->o and would corrupt IP URLs) finds every
+URL candidate and turns it into a compact URLFeatures record: scheme,
+host, registrable domain, TLD, path, query, IP flag and precomputed
+host/path entropy and per-label IDN / script info. Engines consume these records instead of running their
+own URL regexes and urlparse calls.
+
+Candidates:
+  explicit  http(s)://... or www.... (scheme is "" for www.)
+  bare      dotted host names with a real TLD, e.g. paypa1-secure.tk/login
+            or раураl.com (node.js or file.txt are not URLs)
+
+tld is the public suffix ("co.uk", "github.io") and registrable_domain
+the eTLD+1, both from the bundled public suffix list. host keeps the
+written form (Unicode or xn--); unicode_host is always decoded and
+idn_labels holds engines.idn.LabelInfo for every non-ASCII / xn-- label.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Iterable, Iterator, List, Tuple
+
+from engines.domain_index import DOMAINS
+from engines.entropy import entropy_many, shannon_entropy
+from engines.idn import host_labels, unicode_host
+
+URL_CACHE_SIZE = 4096
+# Longer URLs are not worth pinning in memory
+MAX_CACHED_URL = 2048
+
+_URL_RE = re.compile(
+    r"""
+    (?P<explicit>(?:https?://|www\.)[^\s<>"']+)
+  | (?<![\w@.-])
+    (?P<bare>(?:[^\W_](?:[\w-]{0,61}[^\W_])?\.)+(?:[^\W\d_]{2,63}|xn--[a-z0-9-]{1,59}))
+    (?![\w@-])
+    (?P<rest>/[^\s<>"']*)?
+    """,
+    re.IGNORECASE | re.VERBOSE
+)
+
+_IPV4_RE = re.compile(r"\d{1,3}(?:\.\d{1,3}){3}")
+
+# Sentence punctuation glued to the end of a URL is not part of it
+_TRAILING = ".,;:!?)]}'\""
+
+
+class URLFeatures:
+    __slots__ = (
+        "raw", "url", "scheme", "host", "port", "userinfo",
+        "registrable_domain", "tld", "path", "query", "is_ip",
+        "unicode_host", "idn_labels", "host_entropy", "path_entropy"
+    )
+
+    def __init__(self, raw: str):
+        self.raw = raw
+        scheme, sep, rest = raw.partition("://")
+        if sep and scheme.lower() in ("http", "https"):
+            self.scheme = scheme.lower()
+        else:
+            self.scheme = ""
+            rest = raw
+        self.url = f"{self.scheme or 'http'}://{rest}"
+
+        # authority / path / query / fragment by plain splits
+        cut = len(rest)
+        for ch in "/?#":
+            i = rest.find(ch)
+            if i != -1 and i < cut:
+                cut = i
+        authority, tail = rest[:cut], rest[cut:]
+        tail = tail.split("#", 1)[0]
+        path, _, self.query = tail.partition("?")
+        self.path = path
+
+        userinfo, at, hostport = authority.rpartition("@")
+        self.userinfo = userinfo if at else ""
+        if hostport.startswith("["):
+            host, _, port = hostport[1:].partition("]")
+            port = port.lstrip(":")
+        else:
+            host, _, port = hostport.partition(":")
+        self.host = host.lower().rstrip(".")
+        self.port = port
+
+        self.is_ip = (
+            hostport.startswith("[")
+            or _IPV4_RE.fullmatch(self.host) is not None
+            or self.host.isdigit()  # decimal-encoded IPv4 (http://3232235777)
+        )
+
+        if self.is_ip:
+            self.unicode_host = self.host
+            self.idn_labels = ()
+        else:
+            self.unicode_host = unicode_host(self.host)
+            self.idn_labels = host_labels(self.host)
+
+        if self.is_ip or "." not in self.host:
+            self.tld = ""
+            self.registrable_domain = self.host
+        else:
+            psl = DOMAINS.psl
+            self.tld = psl.public_suffix(self.host)
+            self.registrable_domain = psl.registrable_domain(self.host) or self.host
+
+        self.host_entropy = None
+        self.path_entropy = None
+
+    @property
+    def explicit(self) -> bool:
+        """Written with a scheme or www. (not a bare host name)."""
+        return bool(self.scheme) or self.raw[:4].lower() == "www."
+
+    @property
+    def is_idn(self) -> bool:
+        return bool(self.idn_labels)
+
+    @property
+    def mixed_script(self) -> bool:
+        return any(label.mixed_script for label in self.idn_labels)
+
+    @property
+    def whole_script_spoof(self) -> bool:
+        return any(label.whole_script_spoof for label in self.idn_labels)
+
+    @property
+    def bad_punycode(self) -> bool:
+        return any(label.bad_punycode for label in self.idn_labels)
+
+    def __repr__(self) -> str:
+        return f"URLFeatures({self.raw!r})"
+
+
+_cache: "OrderedDict[str, URLFeatures]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _record(raw: str) -> URLFeatures:
+    with _lock:
+        features = _cache.get(raw)
+        if features is not None:
+            _cache.move_to_end(raw)
+            return features
+
+    features = URLFeatures(raw)
+    if len(raw) <= MAX_CACHED_URL:
+        with _lock:
+            _cache[raw] = features
+            if len(_cache) > URL_CACHE_SIZE:
+                _cache.popitem(last=False)
+    return features
+
+
+def _fill_entropy(records: List[URLFeatures]) -> List[URLFeatures]:
+    """All missing host/path entropies of a message or batch in one pass."""
+    pending: List[Tuple[URLFeatures, str, str]] = []
+    for record in records:
+        if record.host_entropy is None:
+            pending.append((record, "host_entropy", record.host))
+        if record.path_entropy is None:
+            pending.append((record, "path_entropy", record.path))
+
+    if pending:
+        values = entropy_many([text for _, _, text in pending])
+        for (record, slot, _), value in zip(pending, values):
+            setattr(record, slot, value)
+    return records
+
+
+def iter_url_spans(text: str) -> Iterator[str]:
+    """
+    Streaming pass: raw URL strings in order of appearance.
+    Every URL has an inner dot and no whitespace, so only whitespace
+    tokens with one are handed to the regex (5x faster than running it
+    over the whole text, which tries the bare-host branch at every word).
+    """
+    finditer = _URL_RE.finditer
+    for token in text.split():
+        if "." not in token.rstrip(_TRAILING):
+            continue
+        for m in finditer(token):
+            raw = m.group("explicit")
+            if raw is None:
+                bare = m.group("bare")
+                if not DOMAINS.psl.is_known_tld(bare.rsplit(".", 1)[1]):
+                    continue
+                raw = bare + (m.group("rest") or "")
+            raw = raw.rstrip(_TRAILING)
+            if raw and raw.lower() != "www":
+                yield raw
+
+
+def tokenize_urls(text: str) -> List[URLFeatures]:
+    """Every URL in the raw text as a feature record, entropies filled."""
+    records = [_record(raw) for raw in iter_url_spans(text)]
+    return _fill_entropy([r for r in records if r.host])
+
+
+def url_features(url: str) -> URLFeatures:
+    """Record for one already-extracted URL."""
+    record = _record(url)
+    if record.host_entropy is None:
+        record.host_entropy = shannon_entropy(record.host)
+        record.path_entropy = shannon_entropy(record.path)
+    return record
+
+
+def url_features_many(urls: Iterable[str]) -> List[URLFeatures]:
+    return _fill_entropy([_record(url) for url in urls])
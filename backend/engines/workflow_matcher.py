@@ -0,0 +1,118 @@
+"""
+Scam Workflow Matcher
+A workflow is an ordered list of stages; each stage is a list of
+keywords or phrases, and the workflow matches when one keyword of every
+stage occurs, in stage order, each in a later word than the previous
+stage ended in ("delivery ... failed ... confirm").
+
+Every stage phrase of every workflow is compiled into ONE Aho-Corasick
+automaton run over the whitespace-collapsed token stream, so a message
+is scanned once however many workflows exist. Each occurrence advances
+the workflows whose stages contain that phrase:
+
+  completed[w][s]  word indices where stages 0..s of workflow w last
+                   completed (a few per stage, enough for the longest
+                   next-stage phrase to look past overlapping matches)
+
+The latest completion that ends before an occurrence starts dominates
+every earlier one (same progress, smallest gap), so this is an exact
+parallel NFA simulation in O(text + occurrences) time.
+
+Keywords keep substring-in-word semantics ("link" matches "link:");
+multi-word phrases ("one time password") match across single spaces.
+
+SCAM_WORKFLOW_MAX_GAP  default max words between stages, 0 = unlimited
+                       (default: 0; a workflow's own max_gap wins)
+"""
+
+import os
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from engines.keyword_registry import KeywordAutomaton
+
+DEFAULT_MAX_GAP = int(os.environ.get("SCAM_WORKFLOW_MAX_GAP", "0")) or None
+
+
+def phrase(keyword: str) -> str:
+    """Lowercase, single-spaced form a stage keyword is matched in."""
+    return " ".join(keyword.lower().split())
+
+
+def token_stream(text: str) -> str:
+    """Text with whitespace runs collapsed to one space (matcher input)."""
+    return " ".join(text.split())
+
+
+class WorkflowMatcher:
+    def __init__(self, workflows: Dict[str, Dict[str, Any]], max_gap: Optional[int] = DEFAULT_MAX_GAP):
+        self.names: Tuple[str, ...] = tuple(workflows)
+        self._lengths: List[int] = []           # stages per workflow
+        self._max_gaps: List[Optional[int]] = []
+        self._keep: List[List[int]] = []        # completions kept per stage
+
+        phrases: Dict[str, int] = {}
+        targets: List[List[Tuple[int, int]]] = []  # phrase id -> (workflow, stage)
+        for w, data in enumerate(workflows.values()):
+            stages = [[phrase(k) for k in stage] for stage in data["stages"]]
+            self._lengths.append(len(stages))
+            self._max_gaps.append(data.get("max_gap", max_gap))
+            # Stage s must look back past every word stage s+1 can span
+            spans = [max(p.count(" ") for p in stage) + 1 for stage in stages]
+            self._keep.append([span + 1 for span in spans[1:]] + [1])
+            for s, stage in enumerate(stages):
+                for p in dict.fromkeys(stage):
+                    if not p:
+                        continue
+                    pid = phrases.setdefault(p, len(phrases))
+                    if pid == len(targets):
+                        targets.append([])
+                    targets[pid].append((w, s))
+
+        self._automaton = KeywordAutomaton(phrases)
+        self._targets = targets
+        self._spaces = [p.count(" ") for p in phrases]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def matched(self, stream: str) -> List[str]:
+        """Workflows found in a lowercase token stream, in registration order."""
+        spaces = [i for i, ch in enumerate(stream) if ch == " "]
+
+        completed: List[List[List[int]]] = [[[] for _ in range(n)] for n in self._lengths]
+        done = [False] * len(self.names)
+        remaining = len(self.names)
+        lengths, max_gaps, keep, targets = self._lengths, self._max_gaps, self._keep, self._targets
+
+        for end, pid in self._automaton.occurrences(stream):
+            end_word = bisect_left(spaces, end)
+            start_word = end_word - self._spaces[pid]
+            for w, s in targets[pid]:
+                if done[w]:
+                    continue
+                if s:
+                    prev = self._latest_before(completed[w][s - 1], start_word)
+                    gap = max_gaps[w]
+                    if prev is None or (gap is not None and start_word - prev - 1 > gap):
+                        continue
+                if s == lengths[w] - 1:
+                    done[w] = True
+                    remaining -= 1
+                    continue
+                ends = completed[w][s]
+                if not ends or ends[-1] != end_word:
+                    ends.append(end_word)
+                    if len(ends) > keep[w][s]:
+                        del ends[0]
+            if not remaining:
+                break
+
+        return [name for name, hit in zip(self.names, done) if hit]
+
+    @staticmethod
+    def _latest_before(ends: Sequence[int], word: int) -> Optional[int]:
+        for end in reversed(ends):
+            if end < word:
+                return end
+        return None
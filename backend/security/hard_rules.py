@@ -1,13 +1,13 @@
 import re
-from typing import Tuple
+from typing import Optional, Tuple
 
-def apply_hard_rules(text: str, current_score: float) -> Tuple[float, str | None]:
+def apply_hard_rules(text: str, current_score: float, lower: Optional[str] = None) -> Tuple[float, str | None]:
     """
     Absolute security overrides.
     If triggered → verdict MUST be phishing.
     """
 
-    t = text.lower()
+    t = lower if lower is not None else text.lower()
 
     # 🔥 ACCOUNT SUSPENSION + URGENCY + VERIFY (YOUR FAILURE CASE)
     if (
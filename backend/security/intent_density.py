@@ -1,16 +1,19 @@
 import re
 from typing import Tuple
 
-AUTHORITY = ["bank", "security team", "administrator", "support", "service"]
-URGENCY = ["immediately", "urgent", "now", "within 24 hours", "today"]
-THREAT = ["suspend", "terminate", "lock", "disable", "restrict"]
+from engines.keyword_registry import KEYWORDS, KeywordHits
 
-def intent_density_score(text: str) -> Tuple[float, str | None]:
-    t = text.lower()
+AUTHORITY = KEYWORDS.register("intent_density.authority", ["bank", "security team", "administrator", "support", "service"])
+URGENCY = KEYWORDS.register("intent_density.urgency", ["immediately", "urgent", "now", "within 24 hours", "today"])
+THREAT = KEYWORDS.register("intent_density.threat", ["suspend", "terminate", "lock", "disable", "restrict"])
 
-    authority = sum(1 for w in AUTHORITY if w in t)
-    urgency = sum(1 for w in URGENCY if w in t)
-    threat = sum(1 for w in THREAT if w in t)
+def intent_density_score(text: str, hits: KeywordHits | None = None) -> Tuple[float, str | None]:
+    if hits is None:
+        hits = KEYWORDS.scan(text.lower())
+
+    authority = hits.count_of(AUTHORITY)
+    urgency = hits.count_of(URGENCY)
+    threat = hits.count_of(THREAT)
 
     score = authority + urgency + threat
 
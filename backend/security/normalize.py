@@ -1,10 +1,10 @@
 import re
 import unicodedata
 
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
 def normalize_text(text: str) -> str:
     text = unicodedata.normalize("NFKD", text)
     text = text.encode("ascii", "ignore").decode("ascii")
-    text = text.lower()
-    text = re.sub(r"[^a-z0-9\s]", " ", text)
-    text = re.sub(r"\s+", " ", text)
-    return text.strip()
+    # One pass: every run of non-alphanumerics (whitespace included) -> " "
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
@@ -1,16 +1,271 @@
+"""
+Rate Limiting (GCRA)
+Generic cell rate algorithm: one "theoretical arrival time" per key
+instead of a list of request timestamps, so a check is O(1) in time and
+memory whatever the limit. Equivalent to a sliding window that allows
+`count` requests in any `period`, bursts included.
+
+Keys that went idle (their TAT is in the past) hold no information, so
+the memory store evicts them from the front of an LRU on every check;
+the mongo store lets a TTL index do the same.
+
+Clients are identified by API key (X-API-Key header) when it is known,
+otherwise by IP. Known keys get their tier's limit instead of the
+route's anonymous default on tiered routes (the analysis endpoints);
+routes limited with tiered=False (admin operations) keep their own limit
+for every caller, whatever the key's tier.
+
+RATE_LIMIT_BACKEND   memory | mongo  (default: memory; mongo shares limits
+                     across every uvicorn worker)
+RATE_LIMIT_API_KEYS  "key:tier,key:tier"
+RATE_LIMIT_TIERS     "standard=60/minute,bulk=5000/minute" (overrides defaults)
+RATE_LIMIT_MAX_KEYS  max keys held in memory   (default: 100000)
+"""
+
+import functools
+import hashlib
+import logging
+import os
 import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger("CyberSentinel")
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+DEFAULT_TIERS = {
+    "standard": "60/minute",
+    "bulk": "5000/minute"
+}
+
+
+def parse_rate(rate: str) -> Tuple[int, float]:
+    """"10/minute" -> (10, 60.0)."""
+    count, _, period = rate.partition("/")
+    period = period.strip().rstrip("s")
+    if period not in _PERIODS:
+        raise ValueError(f"Unknown rate period: {rate}")
+    return int(count), float(_PERIODS[period])
+
+
+class RateLimited(Exception):
+    """Raised by a limited endpoint (maps to HTTP 429 with Retry-After)."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Rate limit exceeded, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class Decision:
+    __slots__ = ("allowed", "remaining", "retry_after")
+
+    def __init__(self, allowed: bool, remaining: int, retry_after: float):
+        self.allowed = allowed
+        self.remaining = remaining
+        self.retry_after = retry_after
+
+
+def _decide(tat: Optional[float], now: float, count: int, period: float) -> Tuple[Decision, Optional[float]]:
+    """GCRA step: (decision, new TAT or None when the request is refused)."""
+    interval = period / count
+    new_tat = max(tat or now, now) + interval
+    backlog = new_tat - now
+    if backlog > period:
+        return Decision(False, 0, backlog - period), None
+    return Decision(True, int((period - backlog) // interval), 0.0), new_tat
+
+
+class MemoryRateStore:
+    """Per-process store: key -> TAT, least recently used first."""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._tat: "OrderedDict[str, float]" = OrderedDict()
+
+    async def hit(self, key: str, count: int, period: float) -> Decision:
+        return self.hit_sync(key, count, period)
+
+    def hit_sync(self, key: str, count: int, period: float) -> Decision:
+        now = time.monotonic()
+        tats = self._tat
+
+        # Idle eviction: a TAT in the past is the same as no entry
+        while tats:
+            oldest_key, oldest_tat = next(iter(tats.items()))
+            if oldest_tat > now and len(tats) < self.max_keys:
+                break
+            del tats[oldest_key]
+
+        decision, new_tat = _decide(tats.get(key), now, count, period)
+        if new_tat is not None:
+            tats[key] = new_tat
+            tats.move_to_end(key)
+        return decision
+
+    def __len__(self) -> int:
+        return len(self._tat)
 
-REQUEST_LOG = {}
+
+class MongoRateStore:
+    """
+    Shared store: one atomic find_one_and_update per check (GCRA as an
+    update pipeline), so concurrent workers never race on a key.
+    """
+
+    def __init__(self, url: str, db_name: str, collection: str = "rate_limits"):
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        self._client = AsyncIOMotorClient(url, serverSelectionTimeoutMS=2000)
+        self._coll = self._client[db_name][collection]
+        self._indexed = False
+
+    async def hit(self, key: str, count: int, period: float) -> Decision:
+        from pymongo import ReturnDocument
+
+        if not self._indexed:
+            await self._coll.create_index("expires_at", expireAfterSeconds=0)
+            self._indexed = True
+
+        now = time.time()
+        interval = period / count
+        new_tat = {"$add": [{"$max": [{"$ifNull": ["$tat", now]}, now]}, interval]}
+        doc = await self._coll.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"allowed": {"$lte": [{"$subtract": [new_tat, now]}, period]}}},
+                {"$set": {
+                    "tat": {"$cond": ["$allowed", new_tat, {"$ifNull": ["$tat", now]}]},
+                    "expires_at": datetime.now(timezone.utc) + timedelta(seconds=period)
+                }}
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        backlog = doc["tat"] - now
+        if doc["allowed"]:
+            return Decision(True, int((period - backlog) // interval), 0.0)
+        return Decision(False, 0, backlog + interval - period)
+
+    def close(self):
+        self._client.close()
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        store=None,
+        api_keys: Optional[Dict[str, str]] = None,
+        tiers: Optional[Dict[str, str]] = None
+    ):
+        self.store = store or MemoryRateStore()
+        self.enabled = True
+        # Keys are held hashed: limiter state never contains a usable key
+        self._api_keys = {self._digest(k): tier for k, tier in (api_keys or {}).items()}
+        self.tiers = {name: parse_rate(rate) for name, rate in {**DEFAULT_TIERS, **(tiers or {})}.items()}
+        unknown = set(self._api_keys.values()) - self.tiers.keys()
+        if unknown:
+            raise ValueError(f"API keys reference unknown tiers: {sorted(unknown)}")
+
+        self.allowed = 0
+        self.limited = 0
+        self.errors = 0
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        store = None
+        if os.environ.get("RATE_LIMIT_BACKEND", "memory") == "mongo":
+            store = MongoRateStore(
+                os.environ.get("MONGO_URL", "mongodb://localhost:27017"),
+                os.environ.get("DB_NAME", "cybersentinel")
+            )
+        else:
+            store = MemoryRateStore(int(os.environ.get("RATE_LIMIT_MAX_KEYS", "100000")))
+        return cls(
+            store=store,
+            api_keys=cls._pairs(os.environ.get("RATE_LIMIT_API_KEYS", ""), ":"),
+            tiers=cls._pairs(os.environ.get("RATE_LIMIT_TIERS", ""), "=")
+        )
+
+    @staticmethod
+    def _pairs(spec: str, sep: str) -> Dict[str, str]:
+        pairs = (item.split(sep, 1) for item in spec.split(",") if sep in item)
+        return {k.strip(): v.strip() for k, v in pairs}
+
+    @staticmethod
+    def _digest(api_key: str) -> str:
+        return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:32]
+
+    def identify(self, request) -> Tuple[str, Optional[str]]:
+        """(limiter identity, tier or None for anonymous)."""
+        api_key = request.headers.get("x-api-key")
+        if api_key:
+            digest = self._digest(api_key)
+            tier = self._api_keys.get(digest)
+            if tier is not None:
+                return f"key:{digest}", tier
+        client = request.client.host if request.client else "unknown"
+        return f"ip:{client}", None
+
+    async def check(self, request, scope: str, rate: Tuple[int, float], tiered: bool = True) -> Decision:
+        identity, tier = self.identify(request)
+        count, period = self.tiers[tier] if tier and tiered else rate
+        try:
+            decision = await self.store.hit(f"{scope}|{identity}", count, period)
+        except Exception:
+            # Shared store down: fail open rather than take the API down
+            self.errors += 1
+            logger.exception("Rate limit store failed; allowing request")
+            return Decision(True, count, 0.0)
+        if decision.allowed:
+            self.allowed += 1
+        else:
+            self.limited += 1
+        return decision
+
+    def limit(self, rate: str, tiered: bool = True) -> Callable:
+        """
+        Decorator for endpoints taking `request: Request` (slowapi-style).
+        tiered=False: API-key tiers never replace this route's limit.
+        """
+        parsed = parse_rate(rate)
+
+        def decorator(endpoint):
+            scope = endpoint.__name__
+
+            @functools.wraps(endpoint)
+            async def wrapper(*args, **kwargs):
+                if self.enabled:
+                    decision = await self.check(kwargs["request"], scope, parsed, tiered)
+                    if not decision.allowed:
+                        raise RateLimited(decision.retry_after)
+                return await endpoint(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "enabled": self.enabled,
+            "backend": "mongo" if isinstance(self.store, MongoRateStore) else "memory",
+            "keys": len(self.store) if isinstance(self.store, MemoryRateStore) else None,
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "errors": self.errors
+        }
+
+    def close(self):
+        if isinstance(self.store, MongoRateStore):
+            self.store.close()
+
+
+# Legacy helper: fixed 10/minute per IP, now O(1) and self-evicting
 MAX_REQUESTS = 10
 WINDOW = 60  # seconds
+_LEGACY = MemoryRateStore()
 
-def is_rate_limited(ip: str):
-    now = time.time()
-    REQUEST_LOG.setdefault(ip, [])
-    REQUEST_LOG[ip] = [t for t in REQUEST_LOG[ip] if now - t < WINDOW]
-
-    if len(REQUEST_LOG[ip]) >= MAX_REQUESTS:
-        return True
 
-    REQUEST_LOG[ip].append(now)
-    return False
+def is_rate_limited(ip: str) -> bool:
+    return not _LEGACY.hit_sync(ip, MAX_REQUESTS, WINDOW).allowed
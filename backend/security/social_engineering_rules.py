@@ -1,6 +1,8 @@
 from typing import Tuple
 
-PHISHING_PHRASES = [
+from engines.keyword_registry import KEYWORDS, KeywordHits
+
+PHISHING_PHRASES = KEYWORDS.register("social_engineering.phrases", [
     "verify your credentials",
     "verify your account",
     "account will be suspended",
@@ -16,15 +18,16 @@ PHISHING_PHRASES = [
     "validate your account",
     "unauthorized access detected",
     "account at risk",
-]
+])
 
-def social_engineering_score(text: str) -> Tuple[float, str | None]:
+def social_engineering_score(text: str, keyword_hits: KeywordHits | None = None) -> Tuple[float, str | None]:
     """
     Escalates risk if multiple real-world phishing phrases appear.
     """
 
-    t = text.lower()
-    hits = [p for p in PHISHING_PHRASES if p in t]
+    if keyword_hits is None:
+        keyword_hits = KEYWORDS.scan(text.lower())
+    hits = keyword_hits.matched(PHISHING_PHRASES)
 
     if len(hits) >= 3:
         return 95.0, f"Multiple social-engineering phrases detected: {hits}"
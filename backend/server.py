@@ -1,22 +1,51 @@
 from fastapi import FastAPI, APIRouter, HTTPException, Request
 from pydantic import BaseModel
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-from slowapi.middleware import SlowAPIMiddleware
-from slowapi.errors import RateLimitExceeded
-from fastapi.responses import JSONResponse
+from typing import Dict, Optional
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from starlette.middleware.cors import CORSMiddleware
 
-import re
+import os
+import hmac
 import math
+import json
+import time
 from datetime import datetime, timezone
-from urllib.parse import urlparse
 import logging
 
+from engines.domain_index import DOMAINS
+from engines.entropy import shannon_entropy
+from engines.fusion_config import FUSION
+from engines.keyword_registry import KEYWORDS
+from engines.pipeline import EnginePipeline, run_sync
+from engines.lookalike_engine import LookalikeEngine
+from engines.raw_email import MboxSplitter, RawEmail
+from engines.rule_packs import RULES
+from engines.url_engine import URLEngine
+from engines.url_features import tokenize_urls, url_features
+from engines.scam_pattern_engine import ScamPatternEngine
+from engines.behavioral_engine import BehavioralEngine
+from engines.nlp_engine import NLPEngine
+from engines.email_header_engine import EmailHeaderEngine
+from engines.ai_origin_engine import AIOriginEngine
+from engines.ml_engine import MLDetectionEngine
+from engines.intent_engine import IntentEngine
+from engines.risk_fusion_engine import RiskFusionEngine
+from security.hard_rules import apply_hard_rules
+from security.intent_density import intent_density_score
+from security.rate_limit import RateLimited, RateLimiter
+from security.social_engineering_rules import social_engineering_score
+from services.executor import EXECUTOR, ExecutorBusy
+from services.verdict_cache import CACHE, cache_key
+from services.verdict_log import VERDICTS
+from services.campaigns import CAMPAIGNS
+from services.metrics import METRICS
+from services.stats import STATS
+from services.streaming import ResultMerger, TextWindower, stream_max_bytes
+
 # --------------------------------------------------
-# RATE LIMITER
+# RATE LIMITER (GCRA, per API-key tier or IP; see security/rate_limit.py)
 # --------------------------------------------------
-limiter = Limiter(key_func=get_remote_address)
+limiter = RateLimiter.from_env()
 
 # --------------------------------------------------
 # APP
@@ -27,7 +56,6 @@ app = FastAPI(
 )
 
 app.state.limiter = limiter
-app.add_middleware(SlowAPIMiddleware)
 
 api = APIRouter(prefix="/api")
 
@@ -43,6 +71,7 @@ logger = logging.getLogger("CyberSentinel")
 class DetectionRequest(BaseModel):
     content: str
     mode: str = "general"
+    email_headers: Optional[Dict[str, str]] = None
 
 class EngineResult(BaseModel):
     engine_name: str
@@ -62,55 +91,89 @@ class DetectionResponse(BaseModel):
 # --------------------------------------------------
 # NORMALIZATION (ANTI-BYPASS)
 # --------------------------------------------------
+_LEET = str.maketrans({"0": "o", "1": "i", "@": "a"})
+
 def normalize_text(text: str) -> str:
-    text = text.lower()
-    text = re.sub(r"\s+", " ", text)
-    text = text.replace("0", "o").replace("1", "i").replace("@", "a")
-    return text.strip()
+    # lowercase + leetspeak folding in one translate, whitespace in one split
+    return " ".join(text.lower().translate(_LEET).split())
 
 # --------------------------------------------------
-# URL EXTRACTION
+# URL EXTRACTION (raw text: normalization corrupts IP URLs)
 # --------------------------------------------------
 def extract_urls(text):
-    return re.findall(r"https?://[^\s]+", text)
+    return [u.url for u in tokenize_urls(text) if u.scheme]
+
+def message_links(urls):
+    """(raw URL strings, host set) for cache keys and campaign matching."""
+    return tuple(u.raw for u in urls), frozenset(u.host for u in urls)
 
 # --------------------------------------------------
-# SHANNON ENTROPY
+# RISKY TLDS (rule-pack editable; brands: RULES.brands)
 # --------------------------------------------------
-def shannon_entropy(s):
-    if not s:
-        return 0
-    freq = {c: s.count(c) for c in set(s)}
-    return -sum((f/len(s)) * math.log2(f/len(s)) for f in freq.values())
+BAD_TLDS = RULES.register_domains("tlds.bad", [".xyz", ".tk", ".ml", ".ga", ".cf", ".top", ".click"])
 
 # --------------------------------------------------
-# BRAND LIST
+# KEYWORD GROUPS (compiled into one shared automaton)
 # --------------------------------------------------
-BRANDS = ["amazon", "paypal", "google", "facebook", "instagram", "microsoft"]
+MARKET_KEYWORDS = KEYWORDS.register("server.market", [
+    "gift card", "free reward", "won", "winner",
+    "claim now", "limited offer", "upi",
+    "telegram", "advance payment"
+])
+
+CREDENTIAL_KEYWORDS = KEYWORDS.register("server.credential", [
+    "verify", "confirm", "login", "account"
+])
+URGENCY_KEYWORDS = KEYWORDS.register("server.urgency", [
+    "urgent", "immediately", "expires", "act now"
+])
+OTP_KEYWORDS = KEYWORDS.register("server.otp", ["otp"])
+
+REWARD_KEYWORDS = KEYWORDS.register("server.reward", [
+    "won", "winner", "prize", "lottery", "gift", "reward"
+])
+MONEY_KEYWORDS = KEYWORDS.register("server.money", [
+    "processing fee", "small fee", "pay", "payment",
+    "bank details", "account number", "upi"
+])
+FEE_URGENCY_KEYWORDS = KEYWORDS.register("server.fee_urgency", [
+    "act now", "limited time", "expires", "immediately"
+])
 
 # --------------------------------------------------
 # ENGINE 1: URL INTELLIGENCE
 # --------------------------------------------------
-def url_engine(url):
+def url_engine(url, features=None):
     findings = []
     score = 0
-    parsed = urlparse(url)
-    domain = parsed.netloc
+    parsed = features or url_features(url)
+    domain = parsed.host
 
-    bad_tlds = [".xyz", ".tk", ".ml", ".ga", ".cf", ".top", ".click"]
-    if any(domain.endswith(tld) for tld in bad_tlds):
+    if DOMAINS.is_allowlisted(domain):
+        return EngineResult(
+            engine_name="URL Intelligence Engine",
+            risk_score=0,
+            findings=[f"Allowlisted domain: {parsed.registrable_domain}"],
+            confidence=0.9
+        )
+
+    if DOMAINS.is_denylisted(domain):
+        score += 100
+        findings.append(f"Denylisted domain: {parsed.registrable_domain}")
+
+    if domain in BAD_TLDS:
         score += 40
         findings.append(f"Suspicious TLD: {domain}")
 
-    if re.search(r"\d+\.\d+\.\d+\.\d+", domain):
+    if parsed.is_ip:
         score += 30
         findings.append("IP-based URL detected")
 
-    if len(domain.split(".")) > 3:
+    if not parsed.is_ip and len(domain.split(".")) > 3:
         score += 20
         findings.append("Randomized / deep subdomain")
 
-    if shannon_entropy(parsed.path) > 3.5 and len(parsed.path) > 15:
+    if len(parsed.path) > 15 and parsed.path_entropy > 3.5:
         score += 25
         findings.append("Obfuscated high-entropy URL path")
 
@@ -118,10 +181,13 @@ def url_engine(url):
         score += 15
         findings.append("Tracking / redirect parameters")
 
-    for brand in BRANDS:
-        if brand in domain and not domain.endswith(f"{brand}.com"):
-            score += 30
-            findings.append(f"Brand impersonation: {brand}")
+    if parsed.mixed_script or parsed.whole_script_spoof:
+        score += 35
+        findings.append(f"IDN homograph host: {parsed.unicode_host}")
+
+    for match in RULES.brands.lookup(domain):
+        score += 30
+        findings.append(f"Brand impersonation: {match.brand}")
 
     return EngineResult(
         engine_name="URL Intelligence Engine",
@@ -133,20 +199,14 @@ def url_engine(url):
 # --------------------------------------------------
 # ENGINE 2: MARKET / GIFT SCAM
 # --------------------------------------------------
-def market_scam_engine(text):
+def market_scam_engine(text, hits=None):
+    hits = hits if hits is not None else KEYWORDS.scan(text)
     score = 0
     findings = []
 
-    keywords = [
-        "gift card", "free reward", "won", "winner",
-        "claim now", "limited offer", "upi",
-        "telegram", "advance payment"
-    ]
-
-    for k in keywords:
-        if k in text:
-            score += 15
-            findings.append(f"Market scam keyword: {k}")
+    for k in hits.matched(MARKET_KEYWORDS):
+        score += 15
+        findings.append(f"Market scam keyword: {k}")
 
     return EngineResult(
         engine_name="Marketplace Scam Engine",
@@ -158,19 +218,20 @@ def market_scam_engine(text):
 # --------------------------------------------------
 # ENGINE 3: SOCIAL ENGINEERING
 # --------------------------------------------------
-def social_engineering_engine(text):
+def social_engineering_engine(text, hits=None):
+    hits = hits if hits is not None else KEYWORDS.scan(text)
     score = 0
     findings = []
 
-    if any(k in text for k in ["verify", "confirm", "login", "account"]):
+    if hits.any_of(CREDENTIAL_KEYWORDS):
         score += 25
         findings.append("Credential harvesting language")
 
-    if any(k in text for k in ["urgent", "immediately", "expires", "act now"]):
+    if hits.any_of(URGENCY_KEYWORDS):
         score += 20
         findings.append("Urgency manipulation")
 
-    if "otp" in text:
+    if hits.any_of(OTP_KEYWORDS):
         score += 40
         findings.append("OTP theft attempt")
 
@@ -184,19 +245,11 @@ def social_engineering_engine(text):
 # --------------------------------------------------
 # ENGINE 4: ADVANCE FEE / PRIZE SCAM (HARD RULE)
 # --------------------------------------------------
-def advance_fee_scam_engine(text):
-    reward = any(k in text for k in [
-        "won", "winner", "prize", "lottery", "gift", "reward"
-    ])
-
-    money = any(k in text for k in [
-        "processing fee", "small fee", "pay", "payment",
-        "bank details", "account number", "upi"
-    ])
-
-    urgency = any(k in text for k in [
-        "act now", "limited time", "expires", "immediately"
-    ])
+def advance_fee_scam_engine(text, hits=None):
+    hits = hits if hits is not None else KEYWORDS.scan(text)
+    reward = hits.any_of(REWARD_KEYWORDS)
+    money = hits.any_of(MONEY_KEYWORDS)
+    urgency = hits.any_of(FEE_URGENCY_KEYWORDS)
 
     if reward and money:
         return EngineResult(
@@ -225,77 +278,806 @@ def advance_fee_scam_engine(text):
 # AI vs AI CONSENSUS
 # --------------------------------------------------
 def ai_consensus(results):
-    high = sum(1 for r in results if r.risk_score >= 60)
-    if high >= 2:
-        return True, 95, "Multiple engines agree on phishing"
-    return False, None, None
+    # Thresholds come from the fusion config (built-in: 2 engines >= 60 -> 95)
+    return FUSION.consensus_vote(results)
+
+# --------------------------------------------------
+# RECOMMENDATIONS (shared, never mutated)
+# --------------------------------------------------
+PHISHING_RECOMMENDATIONS = [
+    "Do NOT click the link",
+    "Block sender/domain",
+    "Report as phishing",
+    "Never share OTP or credentials"
+]
+SAFE_RECOMMENDATIONS = ["No action required"]
+
+# --------------------------------------------------
+# ENGINE PIPELINE
+# --------------------------------------------------
+# core: the four inline engines above + email headers (default)
+# full: core + every class-based engine and security rule layer
+PIPELINE_PROFILE = os.environ.get("PIPELINE_PROFILE", "core")
+
+
+def _engine_result(raw: dict) -> dict:
+    """Class engines return loose dicts; keep the EngineResult shape."""
+    return EngineResult(
+        engine_name=raw["engine_name"],
+        risk_score=raw["risk_score"],
+        findings=raw.get("findings") or ["No indicators detected"],
+        confidence=raw.get("confidence", 0.5)
+    ).model_dump()
+
+
+def _rule_result(name: str, score: float, reason) -> dict:
+    """security/* rules return (score, reason) tuples."""
+    return EngineResult(
+        engine_name=name,
+        risk_score=score,
+        findings=[reason] if reason else ["Rule not triggered"],
+        confidence=1.0 if reason else 0.3
+    ).model_dump()
+
+
+def _register_core_engines(pipeline: EnginePipeline):
+    # Keyword engines are cheap and run first; the hard rule's 95 is the
+    # highest score fusion can produce, so it settles the verdict
+    pipeline.register(
+        "URL Intelligence",
+        lambda i, up: [{**url_engine(u.url, u).model_dump(), "url": u.url} for u in i.http_urls],
+        cost=3
+    )
+    pipeline.register(
+        "Marketplace Scam",
+        lambda i, up: market_scam_engine(i.normalized, i.hits).model_dump(),
+        cost=1
+    )
+    pipeline.register(
+        "Social Engineering",
+        lambda i, up: social_engineering_engine(i.normalized, i.hits).model_dump(),
+        cost=1
+    )
+    pipeline.register(
+        "Advance Fee Scam (Hard Rule)",
+        lambda i, up: advance_fee_scam_engine(i.normalized, i.hits).model_dump(),
+        cost=1, decisive_at=95
+    )
+
+    # Parsed .eml / mbox headers (SPF/DKIM/DMARC, sender, routing) must
+    # count in every profile; other messages get no header result at all
+    headers = EmailHeaderEngine()
+    pipeline.register(
+        "Email Header Analysis",
+        lambda i, up: (
+            [_engine_result(run_sync(headers.analyze(i.content, i.mode, i.headers)))]
+            if i.mode == "email" and i.headers else []
+        ),
+        cost=1
+    )
+
+
+def _register_full_engines(pipeline: EnginePipeline):
+    url = URLEngine()
+    lookalike = LookalikeEngine(RULES.brands)
+    scam = ScamPatternEngine()
+    behavioral = BehavioralEngine()
+    nlp = NLPEngine()
+    origin = AIOriginEngine()
+    ml = MLDetectionEngine()
+    intent = IntentEngine()
+    fusion = RiskFusionEngine(FUSION)
+
+    pipeline.register(
+        "Hard Rules",
+        lambda i, up: _rule_result("Hard Rules", *apply_hard_rules(i.content, 0.0, i.lower)),
+        cost=1, decisive_at=90
+    )
+    pipeline.register(
+        "Social Engineering Phrases",
+        lambda i, up: _rule_result(
+            "Social Engineering Phrases", *social_engineering_score(i.lower, i.lower_hits)
+        ),
+        cost=1
+    )
+    pipeline.register(
+        "Intent Density",
+        lambda i, up: _rule_result("Intent Density", *intent_density_score(i.lower, i.lower_hits)),
+        cost=1
+    )
+    pipeline.register(
+        "Machine Learning",
+        lambda i, up: _engine_result(run_sync(ml.analyze(i.content, i.mode, i.lower_hits, i.urls))),
+        cost=1
+    )
+    pipeline.register(
+        "NLP",
+        lambda i, up: _engine_result(run_sync(nlp.analyze(i.content, i.mode, i.lower_hits, i.patterns))),
+        cost=2
+    )
+    pipeline.register(
+        "Behavioral Analysis",
+        lambda i, up: _engine_result(run_sync(behavioral.analyze(i.content, i.mode, i.lower_hits, i.patterns))),
+        cost=2
+    )
+    pipeline.register(
+        "Scam Pattern",
+        lambda i, up: _engine_result(run_sync(scam.analyze(i.content, i.mode, i.lower_hits, i.lower, i.token_stream))),
+        cost=2
+    )
+    pipeline.register(
+        "AI Origin",
+        lambda i, up: _engine_result(run_sync(origin.analyze(i.content, i.mode, i.lower_hits, i.lower))),
+        cost=2
+    )
+    pipeline.register(
+        "Look-alike Domains",
+        lambda i, up: _engine_result(run_sync(lookalike.analyze(i.content, i.mode, i.urls))),
+        cost=2
+    )
+    pipeline.register(
+        "URL Intelligence (Senior)",
+        lambda i, up: _engine_result(run_sync(url.analyze(i.content, i.mode, i.urls))),
+        cost=3
+    )
+
+    # Support-only engine: feeds Risk Fusion, not reported itself
+    pipeline.register(
+        "Intent",
+        lambda i, up: intent.analyze(i.content, i.lower_hits),
+        cost=1, report=False
+    )
+
+    def risk_fusion(i, up):
+        scam_score = up["Scam Pattern"]["risk_score"]
+        fused = fusion.calculate(scam_score, up["Intent"], scam_score >= 70)
+        return EngineResult(
+            engine_name="Risk Fusion Engine",
+            risk_score=fused["final_risk_score"],
+            findings=[fused["verdict"]],
+            confidence=up["Intent"]["confidence"] or 0.5
+        ).model_dump()
+
+    pipeline.register("Risk Fusion", risk_fusion, cost=0.5, depends_on=("Intent", "Scam Pattern"))
+
+
+def build_pipeline(profile: str) -> EnginePipeline:
+    pipeline = EnginePipeline(normalize_text, tokenize_urls)
+    _register_core_engines(pipeline)
+    if profile == "full":
+        _register_full_engines(pipeline)
+    elif profile != "core":
+        raise ValueError(f"Unknown PIPELINE_PROFILE: {profile}")
+    pipeline.schedule()  # validate dependencies at startup
+    return pipeline
+
+
+PIPELINE = build_pipeline(PIPELINE_PROFILE)
+
+# Every rule is registered now: compile the rule pack (RULE_PACK_FILE) once
+RULES.load()
 
 # --------------------------------------------------
 # ANALYSIS CORE
 # --------------------------------------------------
+def prepare_message(content: str) -> tuple:
+    """
+    Worker side of the cache lookup: (normalized text, URL records,
+    normalize seconds). The loop only hashes the key; on a miss the same
+    URL records go to the pipeline, so a message is tokenized once.
+    """
+    started = time.perf_counter()
+    normalized = normalize_text(content)
+    return normalized, tokenize_urls(content), time.perf_counter() - started
+
+
+def prepare_many(contents: list) -> list:
+    """prepare_message for a whole batch chunk in one job."""
+    return [prepare_message(content) for content in contents]
+
+
+def run_analysis(
+    content: str,
+    mode: str,
+    normalized: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+    urls: Optional[list] = None
+) -> dict:
+    """
+    Runs the engine pipeline for one message.
+    Returns a plain dict (DetectionResponse fields minus timestamp)
+    so batch callers skip per-message model validation.
+    """
+    return run_analysis_timed(content, mode, normalized, headers, urls)[0]
+
+
+def run_analysis_timed(
+    content: str,
+    mode: str,
+    normalized: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+    urls: Optional[list] = None
+) -> tuple:
+    """run_analysis plus its stage timings, measured in the worker."""
+    with RULES.pinned():
+        run = PIPELINE.run(content, mode, headers, normalized, urls=urls)
+    return _finalize(run.results, bool(run.context.http_urls), mode, run.stopped_by), run.timings
+
+
+def run_window(
+    content: str,
+    mode: str,
+    headers: Optional[Dict[str, str]] = None,
+    earlier: Optional[tuple] = None
+) -> tuple:
+    """
+    Worker side of streaming analysis: one window's raw engine results,
+    plus the keyword phrases seen so far (`earlier` of the next window).
+    """
+    with RULES.pinned():
+        run = PIPELINE.run(content, mode, headers, earlier=earlier)
+        phrases = run.context.phrases()
+    return run.results, bool(run.context.http_urls), run.stopped_by, run.timings, phrases
+
+
+def _finalize(engines: list, has_urls: bool, mode: str, stopped_by: Optional[str]) -> dict:
+    """Fusion, zero-trust floor, consensus and verdict over the engine results."""
+    max_score = max(e["risk_score"] for e in engines)
+    fused = FUSION.trained and not stopped_by
+    if fused:
+        # Calibrated weights replace the plain maximum (decisive runs keep it)
+        max_score = FUSION.score(engines, has_urls)
+
+    # Zero-trust URL floor
+    floor = FUSION.url_floor
+    if has_urls and floor is not None and max_score < floor:
+        max_score = floor
+        engines.append(EngineResult(
+            engine_name="Zero Trust Policy",
+            risk_score=floor,
+            findings=["Unknown URLs treated as high risk"],
+            confidence=1.0
+        ).model_dump())
+
+    triggered, forced, reason = ai_consensus(engines)
+    if triggered:
+        max_score = forced
+        engines.append(EngineResult(
+            engine_name="AI-vs-AI Consensus",
+            risk_score=forced,
+            findings=[reason],
+            confidence=1.0
+        ).model_dump())
+
+    verdict = "Phishing Detected" if max_score >= FUSION.phishing_threshold else "Likely Safe"
+
+    summary = {
+        "overall_intent": verdict,
+        "analysis_engines_used": len(engines),
+        "ai_vs_ai": triggered
+    }
+    if stopped_by:
+        summary["early_exit"] = stopped_by
+    if fused:
+        summary["fusion"] = FUSION.version
+
+    return {
+        "risk_score": int(max_score),
+        "verdict": verdict,
+        "mode": mode,
+        "engine_results": engines,
+        "summary": summary,
+        "recommendations": (
+            PHISHING_RECOMMENDATIONS if verdict == "Phishing Detected"
+            else SAFE_RECOMMENDATIONS
+        )
+    }
+
+
 @api.post("/analyze", response_model=DetectionResponse)
 @limiter.limit("10/minute")
 async def analyze(request: Request, payload: DetectionRequest):
     try:
-        text = normalize_text(payload.content)
-        urls = extract_urls(text)
-
-        engines = []
-
-        for url in urls:
-            engines.append(url_engine(url))
-
-        engines.append(market_scam_engine(text))
-        engines.append(social_engineering_engine(text))
-        engines.append(advance_fee_scam_engine(text))
-
-        max_score = max(e.risk_score for e in engines)
-
-        # Zero-trust URL floor
-        if urls and max_score < 70:
-            max_score = 70
-            engines.append(EngineResult(
-                engine_name="Zero Trust Policy",
-                risk_score=70,
-                findings=["Unknown URLs treated as high risk"],
-                confidence=1.0
-            ))
-
-        triggered, forced, reason = ai_consensus(engines)
-        if triggered:
-            max_score = forced
-            engines.append(EngineResult(
-                engine_name="AI-vs-AI Consensus",
-                risk_score=forced,
-                findings=[reason],
-                confidence=1.0
-            ))
-
-        verdict = "Phishing Detected" if max_score >= 70 else "Likely Safe"
-
+        result = await _analyze_one(payload.content, payload.mode, payload.email_headers)
         return DetectionResponse(
-            risk_score=int(max_score),
-            verdict=verdict,
-            mode=payload.mode,
-            engine_results=[e.model_dump() for e in engines],
-            summary={
-                "overall_intent": verdict,
-                "analysis_engines_used": len(engines),
-                "ai_vs_ai": triggered
-            },
-            recommendations=[
-                "Do NOT click the link",
-                "Block sender/domain",
-                "Report as phishing",
-                "Never share OTP or credentials"
-            ] if verdict == "Phishing Detected" else ["No action required"],
+            **result,
             timestamp=datetime.now(timezone.utc)
         )
 
+    except ExecutorBusy:
+        raise
+
     except Exception as e:
+        METRICS.record_error()
         logger.exception("Analysis failed")
         raise HTTPException(status_code=500, detail=str(e))
 
+
+async def _analyze_one(
+    content: str,
+    mode: str,
+    headers: Optional[Dict[str, str]],
+    source: str = "api"
+) -> dict:
+    """Cache -> campaign index -> executor, with metrics and the verdict log."""
+    started = time.perf_counter()
+    normalized, urls, seconds = await EXECUTOR.run(prepare_message, content)
+    METRICS.observe("normalize", mode, seconds)
+    links, hosts = message_links(urls)
+    key = cache_key(normalized, mode, headers, links, RULES.version)
+
+    result = await CACHE.get(key)
+    if result is None:
+        result = _campaign_verdict(normalized, hosts, mode, headers)
+    if result is None:
+        result, timings = await EXECUTOR.run(
+            run_analysis_timed, content, mode, normalized, headers, urls
+        )
+        METRICS.record_timings(mode, timings)
+        _remember(key, normalized, hosts, mode, headers, result)
+
+    _record_outcome(mode, result, hosts)
+    METRICS.observe("request", mode, time.perf_counter() - started)
+    await _log_verdict(key, mode, result, source)
+    return result
+
+
+def _record_outcome(mode: str, result: dict, hosts=()):
+    """Verdict counters (metrics) and dashboard aggregates (stats)."""
+    METRICS.record_verdict(mode, result)
+    STATS.record(mode, result, {DOMAINS.psl.registrable_domain(h) or h for h in hosts})
+
+
+async def _log_verdict(key: Optional[str], mode: str, result: dict, source: str):
+    """Write-behind: buffered here, bulk-inserted by the verdict log's flusher."""
+    if not VERDICTS.enabled:
+        return
+    await VERDICTS.record({
+        "key": key,
+        "source": source,
+        "mode": mode,
+        "risk_score": result["risk_score"],
+        "verdict": result["verdict"],
+        "engines": {e["engine_name"]: e["risk_score"] for e in result["engine_results"]},
+        "early_exit": result["summary"].get("early_exit"),
+        "timestamp": datetime.now(timezone.utc)
+    })
+
+# --------------------------------------------------
+# RAW EMAIL INGESTION (.eml / MIME, mbox)
+# --------------------------------------------------
+def _email_item(message: RawEmail) -> dict:
+    """Parsed message -> batch item: subject + readable body, engine headers."""
+    subject = message.header("subject")
+    body = message.text()
+    return {
+        "content": f"{subject}\n{body}" if subject else body,
+        "mode": "email",
+        "email_headers": message.engine_headers() or None
+    }
+
+
+def _parse_email(raw: bytes) -> tuple:
+    """Worker side: MIME parse of one message -> (batch item, received hops)."""
+    message = RawEmail(raw)
+    return _email_item(message), len(message.received_hops)
+
+
+def _parse_emails(raws: list) -> list:
+    """Worker side: MIME parse of several messages -> batch items."""
+    return [_email_item(RawEmail(raw)) for raw in raws]
+
+
+@api.post("/analyze/email", response_model=DetectionResponse)
+@limiter.limit("10/minute")
+async def analyze_email(request: Request):
+    """One raw RFC 5322 message (message/rfc822 body, e.g. an .eml file)."""
+    raw = await request.body()
+    if not raw.strip():
+        raise HTTPException(status_code=400, detail="Empty message")
+    try:
+        # Decoding every MIME part is engine-sized work: keep it off the loop
+        item, hops = await EXECUTOR.run(_parse_email, raw)
+        result = dict(await _analyze_one(item["content"], "email", item["email_headers"], "email"))
+        result["summary"] = {**result["summary"], "received_hops": hops}
+        return DetectionResponse(
+            **result,
+            timestamp=datetime.now(timezone.utc)
+        )
+
+    except ExecutorBusy:
+        raise
+
+    except Exception as e:
+        METRICS.record_error()
+        logger.exception("Email analysis failed")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _mbox_items(request: Request):
+    """
+    Batch items from an mbox upload, split while it streams in; the
+    messages completed by each upload chunk are parsed in ONE executor job.
+    """
+    splitter = MboxSplitter()
+    async for chunk in request.stream():
+        raws = list(splitter.feed(chunk))
+        if raws:
+            for item in await EXECUTOR.run(_parse_emails, raws, wait=True):
+                yield item
+    raws = list(splitter.finish())
+    if raws:
+        for item in await EXECUTOR.run(_parse_emails, raws, wait=True):
+            yield item
+
+
+@api.post("/analyze/mbox")
+@limiter.limit("5/minute")
+async def analyze_mbox(request: Request):
+    """mbox upload; NDJSON results in message order, like /analyze/batch."""
+    items = _mbox_items(request)
+    try:
+        first = await items.__anext__()
+    except StopAsyncIteration:
+        first = None
+    return StreamingResponse(_stream_batch(first, items, "mbox"), media_type="application/x-ndjson")
+
+# --------------------------------------------------
+# STREAMING ANALYSIS (very large bodies, bounded memory)
+# --------------------------------------------------
+@api.post("/analyze/stream", response_model=DetectionResponse)
+@limiter.limit("5/minute")
+async def analyze_stream(request: Request, mode: str = "general"):
+    """
+    Raw text/HTML body, analyzed window by window as it arrives (see
+    services/streaming.py). Stops reading as soon as a decisive engine
+    fixes the verdict. Not cached: the full text is never assembled.
+    """
+    started = time.perf_counter()
+    windower = TextWindower.from_env()
+    merger = ResultMerger()
+    max_bytes = stream_max_bytes()
+    has_urls = False
+    stopped_by = None
+    truncated = False
+    earlier = None  # keyword phrases of the windows read so far
+
+    async def analyze_window(window: str) -> Optional[str]:
+        nonlocal has_urls, earlier
+        results, window_urls, stopped, timings, earlier = await EXECUTOR.run(
+            run_window, window, mode, None, earlier
+        )
+        METRICS.record_timings(mode, timings)
+        merger.add(results)
+        has_urls = has_urls or window_urls
+        return stopped
+
+    try:
+        async for chunk in request.stream():
+            for window in windower.feed(chunk):
+                stopped_by = await analyze_window(window)
+                if stopped_by:
+                    break
+            if stopped_by:
+                break
+            if windower.bytes_read > max_bytes:
+                truncated = True
+                break
+
+        if not stopped_by:
+            for window in windower.finish():
+                stopped_by = await analyze_window(window)
+
+        result = _finalize(merger.results, has_urls, mode, stopped_by)
+        result["summary"].update(
+            windows=windower.windows,
+            bytes_read=windower.bytes_read,
+            truncated=truncated
+        )
+        _record_outcome(mode, result)
+        METRICS.observe("request", mode, time.perf_counter() - started)
+        await _log_verdict(None, mode, result, "stream")
+        return DetectionResponse(
+            **result,
+            timestamp=datetime.now(timezone.utc)
+        )
+
+    except ExecutorBusy:
+        raise
+
+    except Exception as e:
+        METRICS.record_error()
+        logger.exception("Streaming analysis failed")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# --------------------------------------------------
+# VERDICT REUSE (exact cache + near-duplicate campaigns)
+# --------------------------------------------------
+def _campaign_scope(mode: str, headers: Optional[Dict[str, str]]) -> str:
+    return mode if not headers else mode + json.dumps(headers, sort_keys=True)
+
+
+def _campaign_verdict(
+    normalized: str,
+    hosts: frozenset,
+    mode: str,
+    headers: Optional[Dict[str, str]]
+) -> Optional[dict]:
+    match = CAMPAIGNS.lookup(normalized, _campaign_scope(mode, headers), hosts)
+    return match.tagged_result() if match else None
+
+
+def _remember(
+    key: str,
+    normalized: str,
+    hosts: frozenset,
+    mode: str,
+    headers: Optional[Dict[str, str]],
+    result: dict
+):
+    CACHE.put(key, result)
+    CAMPAIGNS.add(normalized, _campaign_scope(mode, headers), hosts, result)
+
+# --------------------------------------------------
+# BATCH ANALYSIS (bulk mailbox / SMS-log scanning)
+# --------------------------------------------------
+BATCH_CHUNK_SIZE = 256
+BATCH_MAX_MESSAGES = 10000
+
+
+def _parse_batch_item(raw) -> tuple:
+    """Lightweight stand-in for DetectionRequest validation."""
+    if isinstance(raw, str):
+        raw = json.loads(raw)
+    content = raw.get("content") if isinstance(raw, dict) else None
+    if not isinstance(content, str):
+        raise ValueError("content must be a string")
+    mode = raw.get("mode", "general")
+    if not isinstance(mode, str):
+        raise ValueError("mode must be a string")
+    headers = raw.get("email_headers")
+    if headers is not None and not isinstance(headers, dict):
+        raise ValueError("email_headers must be an object")
+    return content, mode, headers
+
+
+async def _batch_items(request: Request):
+    """
+    Yields raw batch items without buffering NDJSON uploads:
+    - application/x-ndjson: one DetectionRequest JSON object per line
+    - application/json: {"messages": [DetectionRequest, ...]}
+    """
+    content_type = request.headers.get("content-type", "")
+
+    if "ndjson" in content_type:
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield line.decode("utf-8")
+        if buffer.strip():
+            yield buffer.decode("utf-8")
+        return
+
+    body = await request.json()
+    messages = body.get("messages") if isinstance(body, dict) else body
+    if not isinstance(messages, list):
+        raise HTTPException(status_code=422, detail="Expected {'messages': [...]}")
+    for item in messages:
+        yield item
+
+
+def _analyze_many(jobs: list) -> list:
+    """
+    Worker side: runs the pipeline for (content, mode, normalized, headers,
+    urls) jobs and returns (result, timings) pairs.
+    """
+    results = []
+    for content, mode, normalized, headers, urls in jobs:
+        try:
+            results.append(run_analysis_timed(content, mode, normalized, headers, urls))
+        except Exception as e:
+            results.append(({"error": str(e)}, {}))
+    return results
+
+
+async def _analyze_chunk(chunk: list, start: int, source: str = "batch") -> str:
+    """
+    Analyzes one chunk: normalization and URL tokenization run in the
+    executor as one job, cache hits and duplicates inside the chunk are
+    resolved on the loop, the rest go to the executor as ONE job.
+    A single timestamp covers the whole chunk.
+    """
+    stamp = datetime.now(timezone.utc).isoformat()
+    results = [None] * len(chunk)
+    keys = [None] * len(chunk)
+    jobs, job_keys = [], []
+    waiting = {}  # cache key -> chunk offsets
+
+    parsed = []
+    for offset, raw in enumerate(chunk):
+        try:
+            parsed.append((offset, *_parse_batch_item(raw)))
+        except Exception as e:
+            results[offset] = {"error": str(e)}
+    prepared = []
+    if parsed:
+        prepared = await EXECUTOR.run(prepare_many, [item[1] for item in parsed], wait=True)
+
+    for (offset, content, mode, headers), (normalized, urls, seconds) in zip(parsed, prepared):
+        METRICS.observe("normalize", mode, seconds)
+        links, hosts = message_links(urls)
+        key = cache_key(normalized, mode, headers, links, RULES.version)
+        keys[offset] = key
+        if key in waiting:
+            waiting[key].append(offset)
+            continue
+
+        cached = await CACHE.get(key)
+        if cached is None:
+            cached = _campaign_verdict(normalized, hosts, mode, headers)
+        if cached is not None:
+            results[offset] = cached
+            _record_outcome(mode, cached, hosts)
+        else:
+            waiting[key] = [offset]
+            jobs.append((content, mode, normalized, headers, urls))
+            job_keys.append((key, normalized, hosts, mode, headers))
+
+    if jobs:
+        computed = await EXECUTOR.run(_analyze_many, jobs, wait=True)
+        for (key, normalized, hosts, mode, headers), (result, timings) in zip(job_keys, computed):
+            if "error" in result:
+                METRICS.record_error()
+            else:
+                METRICS.record_timings(mode, timings)
+                _remember(key, normalized, hosts, mode, headers, result)
+            for offset in waiting[key]:
+                results[offset] = result
+                if "error" not in result:
+                    _record_outcome(mode, result, hosts)
+
+    lines = []
+    for offset, result in enumerate(results):
+        if "error" not in result:
+            await _log_verdict(keys[offset], result["mode"], result, source)
+        line = dict(result)
+        if "error" not in line:
+            line["timestamp"] = stamp
+        line["index"] = start + offset
+        lines.append(json.dumps(line))
+
+    return "\n".join(lines) + "\n"
+
+
+@api.post("/analyze/batch")
+@limiter.limit("5/minute")
+async def analyze_batch(request: Request):
+    items = _batch_items(request)
+
+    # Fail fast on an unreadable body before the stream starts
+    try:
+        first = await items.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch body: {e}")
+
+    return StreamingResponse(_stream_batch(first, items), media_type="application/x-ndjson")
+
+
+async def _stream_batch(first, items, source: str = "batch"):
+    """NDJSON lines for a batch item stream, BATCH_CHUNK_SIZE at a time."""
+    if first is None:
+        return
+
+    chunk = [first]
+    start = 0
+    truncated = False
+    async for item in items:
+        if start + len(chunk) >= BATCH_MAX_MESSAGES:
+            truncated = True
+            break
+        chunk.append(item)
+        if len(chunk) == BATCH_CHUNK_SIZE:
+            yield await _analyze_chunk(chunk, start, source)
+            start += len(chunk)
+            chunk = []
+    if chunk:
+        yield await _analyze_chunk(chunk, start, source)
+    if truncated:
+        yield json.dumps({
+            "error": f"Batch limit of {BATCH_MAX_MESSAGES} messages reached; remaining input ignored"
+        }) + "\n"
+
+# --------------------------------------------------
+# RULE PACKS (hot reload; see engines/rule_packs.py)
+# --------------------------------------------------
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+
+def _require_admin(request: Request):
+    # Admin routes are disabled unless ADMIN_TOKEN is set
+    token = request.headers.get("x-admin-token", "")
+    if not ADMIN_TOKEN or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+def _rules_swapped(rules):
+    # Remembered verdicts came from the old rules; cache keys carry the
+    # version, the campaign index is cleared; process workers re-fork
+    CAMPAIGNS.clear()
+    EXECUTOR.recycle()
+
+
+RULES.on_swap(_rules_swapped)
+
+
+@api.get("/admin/rules")
+@limiter.limit("30/minute", tiered=False)
+async def rules_status(request: Request):
+    _require_admin(request)
+    return RULES.stats()
+
+
+@api.post("/admin/rules/reload")
+@limiter.limit("5/minute", tiered=False)
+async def reload_rules(request: Request):
+    """Recompiles RULE_PACK_FILE off the request path and swaps it in."""
+    _require_admin(request)
+    try:
+        return await RULES.reload()
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+# --------------------------------------------------
+# METRICS / STATS
+# --------------------------------------------------
+@api.get("/metrics")
+async def metrics(format: str = "prometheus"):
+    """
+    Per-stage latency (p50/p95/p99 per engine and mode), verdict counts
+    and cache / executor health. format=json for the dashboard shape.
+    """
+    cache = CACHE.stats()
+    campaigns = CAMPAIGNS.stats()
+    executor = EXECUTOR.stats()
+    verdict_log = VERDICTS.stats()
+
+    if format == "json":
+        snapshot = METRICS.snapshot()
+        snapshot.update(
+            cache=cache, campaigns=campaigns, executor=executor, verdict_log=verdict_log,
+            rate_limit=limiter.stats(), rules=RULES.stats()
+        )
+        return snapshot
+
+    return PlainTextResponse(
+        METRICS.render_prometheus({
+            "cache_hit_rate": cache["hit_rate"],
+            "cache_entries": cache["size"],
+            "campaign_near_duplicate_hits": campaigns["near_duplicate_hits"],
+            "executor_pending": executor["pending"],
+            "executor_rejected": executor["rejected"],
+            "verdict_log_buffered": verdict_log["buffered"],
+            "verdict_log_dropped": verdict_log["dropped"],
+            "rule_pack_reloads": RULES.reloads,
+            "rule_pack_errors": RULES.errors
+        }),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
+@api.get("/stats")
+async def stats():
+    """
+    Dashboard statistics from incremental aggregates (services/stats.py):
+    totals, per mode / engine, 1m-1h-24h windows, top findings and domains.
+    """
+    return STATS.snapshot()
+
 # --------------------------------------------------
 # ROOT
 # --------------------------------------------------
@@ -304,11 +1086,9 @@ async def health():
     return {
         "status": "RUNNING",
         "security_level": "ENTERPRISE+",
-        "engines": [
-            "URL Intelligence",
-            "Marketplace Scam",
-            "Social Engineering",
-            "Advance Fee Scam (Hard Rule)",
+        "pipeline_profile": PIPELINE_PROFILE,
+        "engines": PIPELINE.engine_names + [
+            "Zero Trust Policy",
             "AI-vs-AI Consensus"
         ]
     }
@@ -322,9 +1102,37 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.exception_handler(RateLimitExceeded)
+@app.exception_handler(RateLimited)
 async def rate_limit_handler(request, exc):
     return JSONResponse(
         status_code=429,
-        content={"error": "Too many requests"}
+        content={"error": "Too many requests"},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+    )
+
+@app.exception_handler(ExecutorBusy)
+async def executor_busy_handler(request, exc):
+    return JSONResponse(
+        status_code=503,
+        content={"error": "Analysis queue full, retry shortly"},
+        headers={"Retry-After": "1"}
     )
+
+@app.on_event("startup")
+async def compile_keywords():
+    # Build the shared keyword automaton before the first request
+    KEYWORDS.compile()
+    # Pool workers fork after compilation and inherit the automaton
+    EXECUTOR.start()
+    VERDICTS.start()
+    STATS.load()
+    RULES.start()
+
+@app.on_event("shutdown")
+async def stop_executor():
+    await RULES.stop()
+    await VERDICTS.stop()
+    STATS.save()
+    EXECUTOR.shutdown()
+    CACHE.close()
+    limiter.close()
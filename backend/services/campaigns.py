@@ -0,0 +1,246 @@
+"""
+Campaign Clustering (MinHash + LSH)
+Exact-hash caching misses campaign variants that only change the
+recipient name, an order number or a URL token. Messages are reduced to
+MinHash signatures over word shingles of the normalized text and indexed
+with locality-sensitive hashing, so a near-duplicate of a recently scored
+message is found in O(bands) and reuses its verdict. Volatile tokens
+(anything with a digit, URL paths) are masked before shingling.
+
+A verdict is only reused when the link hosts are IDENTICAL: swapping a
+benign newsletter's link for a malicious host must never inherit "safe".
+Only phishing verdicts are indexed at all: a benign note with one lure
+sentence appended is still a near-duplicate, and must reach the engines.
+
+CAMPAIGN_INDEX_SIZE   max indexed messages, 0 disables  (default: 20000)
+CAMPAIGN_THRESHOLD    min estimated Jaccard similarity  (default: 0.8)
+CAMPAIGN_TTL          seconds a message stays indexed   (default: 3600)
+"""
+
+import os
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional
+
+import numpy as np
+
+from services.metrics import PHISHING_VERDICT
+
+_PRIME = (1 << 31) - 1
+
+
+class CampaignMatch:
+    __slots__ = ("campaign_id", "similarity", "size", "result")
+
+    def __init__(self, campaign_id: str, similarity: float, size: int, result: Dict[str, Any]):
+        self.campaign_id = campaign_id
+        self.similarity = similarity
+        self.size = size
+        self.result = result
+
+    def tagged_result(self) -> Dict[str, Any]:
+        """Copy of the reused verdict with the campaign noted in summary."""
+        result = dict(self.result)
+        result["summary"] = dict(
+            result.get("summary", {}),
+            campaign_id=self.campaign_id,
+            campaign_size=self.size,
+            campaign_similarity=round(self.similarity, 3)
+        )
+        return result
+
+
+class _Entry:
+    __slots__ = ("signature", "bands", "campaign_id", "scope", "hosts", "result", "expires_at")
+
+
+class CampaignIndex:
+    def __init__(
+        self,
+        max_entries: int = 20000,
+        threshold: float = 0.8,
+        ttl: float = 3600.0,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 2,
+        min_words: int = 8,
+        seed: int = 1
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl = ttl
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.min_words = min_words
+
+        # Universal hash family h(x) = (a*x + b) mod p, fixed seed so
+        # signatures are stable across restarts and workers
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._buckets: Dict[bytes, set] = {}
+        self._campaigns: Dict[str, List[int]] = {}  # id -> [members seen, entries indexed]
+        self._next_id = 0
+
+        self.lookups = 0
+        self.matches = 0
+
+    @classmethod
+    def from_env(cls) -> "CampaignIndex":
+        return cls(
+            max_entries=int(os.environ.get("CAMPAIGN_INDEX_SIZE", "20000")),
+            threshold=float(os.environ.get("CAMPAIGN_THRESHOLD", "0.8")),
+            ttl=float(os.environ.get("CAMPAIGN_TTL", "3600"))
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    # ---------------- SIGNATURES ----------------
+    def signature(self, normalized: str) -> Optional[np.ndarray]:
+        words = [self._mask(w) for w in normalized.split()]
+        if len(words) < self.min_words:
+            return None
+
+        k = self.shingle_size
+        shingles = {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8", "surrogatepass")) for s in shingles),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+        # a < 2^31 and hash < 2^32, so a*x + b never overflows uint64
+        return ((self._a * hashes + self._b) % _PRIME).min(axis=1)
+
+    @staticmethod
+    def _mask(word: str) -> str:
+        if word.startswith(("http://", "https://")):
+            return word.split("/", 3)[2]
+        if any(ch.isdigit() for ch in word):
+            return "#"
+        return word
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        rows = self.rows
+        return [
+            bytes([band]) + signature[band * rows:(band + 1) * rows].tobytes()
+            for band in range(self.bands)
+        ]
+
+    # ---------------- LOOKUP ----------------
+    def lookup(self, normalized: str, scope: str, hosts: FrozenSet[str]) -> Optional[CampaignMatch]:
+        """
+        scope: everything besides the body that affects the verdict
+        (mode, headers); only entries with the same scope can match.
+        """
+        if not self.enabled:
+            return None
+        signature = self.signature(normalized)
+        if signature is None:
+            return None
+
+        self._expire()
+        self.lookups += 1
+
+        best, best_sim = None, 0.0
+        seen = set()
+        for key in self._band_keys(signature):
+            for entry_id in self._buckets.get(key, ()):
+                if entry_id in seen:
+                    continue
+                seen.add(entry_id)
+                entry = self._entries[entry_id]
+                if entry.scope != scope or entry.hosts != hosts:
+                    continue
+                sim = float(np.count_nonzero(entry.signature == signature)) / self.num_perm
+                if sim >= self.threshold and sim > best_sim:
+                    best, best_sim = entry, sim
+
+        if best is None:
+            return None
+
+        self.matches += 1
+        counts = self._campaigns[best.campaign_id]
+        counts[0] += 1
+        return CampaignMatch(best.campaign_id, best_sim, counts[0], best.result)
+
+    # ---------------- INSERT ----------------
+    def add(self, normalized: str, scope: str, hosts: FrozenSet[str], result: Dict[str, Any]) -> Optional[str]:
+        if not self.enabled or result.get("verdict") != PHISHING_VERDICT:
+            return None
+        signature = self.signature(normalized)
+        if signature is None:
+            return None
+
+        entry = _Entry()
+        entry.signature = signature
+        entry.bands = self._band_keys(signature)
+        entry.campaign_id = f"cmp-{uuid.uuid4().hex[:12]}"
+        entry.scope = scope
+        entry.hosts = hosts
+        entry.result = result
+        entry.expires_at = time.monotonic() + self.ttl
+
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = entry
+        self._campaigns[entry.campaign_id] = [1, 1]
+        for key in entry.bands:
+            self._buckets.setdefault(key, set()).add(entry_id)
+
+        while len(self._entries) > self.max_entries:
+            self._evict_oldest()
+        return entry.campaign_id
+
+    # ---------------- EVICTION ----------------
+    def _expire(self):
+        now = time.monotonic()
+        while self._entries:
+            entry = next(iter(self._entries.values()))
+            if entry.expires_at > now:
+                break
+            self._evict_oldest()
+
+    def _evict_oldest(self):
+        entry_id, entry = self._entries.popitem(last=False)
+        for key in entry.bands:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+        counts = self._campaigns.get(entry.campaign_id)
+        if counts is not None:
+            counts[1] -= 1
+            if counts[1] <= 0:
+                del self._campaigns[entry.campaign_id]
+
+    def clear(self):
+        """Drops every entry (their verdicts came from superseded rules)."""
+        self._entries.clear()
+        self._buckets.clear()
+        self._campaigns.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "indexed": len(self._entries),
+            "campaigns": len(self._campaigns),
+            "lookups": self.lookups,
+            "near_duplicate_hits": self.matches,
+            "threshold": self.threshold
+        }
+
+
+# Process-wide index
+CAMPAIGNS = CampaignIndex.from_env()
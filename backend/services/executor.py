@@ -0,0 +1,118 @@
+"""
+Engine Executor
+Runs CPU-bound engine work off the event loop so one large message
+cannot stall every other request on the same uvicorn worker.
+
+ENGINE_EXECUTOR   auto | process | thread | inline   (default: auto)
+ENGINE_WORKERS    pool size                          (default: CPU count)
+ENGINE_MAX_PENDING  running + queued jobs before backpressure kicks in
+"""
+
+import asyncio
+import os
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class ExecutorBusy(Exception):
+    """Raised when the pending-job cap is reached (maps to HTTP 503)."""
+
+
+def _gil_disabled() -> bool:
+    # Free-threaded builds (3.13t+) can run engines in threads in parallel
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+class EngineExecutor:
+    def __init__(self, kind: str = "auto", workers: Optional[int] = None, max_pending: Optional[int] = None):
+        if kind == "auto":
+            kind = "thread" if _gil_disabled() else "process"
+        if kind not in ("process", "thread", "inline"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+
+        self.kind = kind
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 4
+
+        self._pool: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._pending = 0
+        self._rejected = 0
+
+    @classmethod
+    def from_env(cls) -> "EngineExecutor":
+        return cls(
+            kind=os.environ.get("ENGINE_EXECUTOR", "auto"),
+            workers=int(os.environ.get("ENGINE_WORKERS", "0")) or None,
+            max_pending=int(os.environ.get("ENGINE_MAX_PENDING", "0")) or None
+        )
+
+    # ---------------- LIFECYCLE ----------------
+    def start(self):
+        self.start_pool()
+        self._slots = asyncio.Semaphore(self.max_pending)
+
+    def start_pool(self):
+        if self._pool is None and self.kind != "inline":
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="engine"
+                )
+
+    def recycle(self):
+        """
+        Replaces a process pool; new workers fork from the current state
+        (e.g. freshly swapped rules). Jobs already on the old pool finish
+        there, with the state they started with. Threads share state.
+        """
+        if self.kind == "process" and self._pool is not None:
+            old, self._pool = self._pool, None
+            self.start_pool()
+            old.shutdown(wait=False)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    # ---------------- EXECUTION ----------------
+    async def run(self, fn: Callable, *args, wait: bool = False) -> Any:
+        """
+        Runs fn(*args) on the pool.
+        wait=False: reject immediately when full (interactive requests)
+        wait=True:  queue for a free slot (batch streams)
+        """
+        if self._slots is None:
+            self.start()
+
+        if not wait and self._slots.locked():
+            self._rejected += 1
+            raise ExecutorBusy(f"{self._pending} engine jobs pending")
+
+        async with self._slots:
+            self._pending += 1
+            try:
+                if self._pool is None:
+                    return fn(*args)
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._pool, fn, *args)
+            finally:
+                self._pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "rejected": self._rejected
+        }
+
+
+# Process-wide executor, started/stopped with the app
+EXECUTOR = EngineExecutor.from_env()
@@ -0,0 +1,192 @@
+"""
+Latency Metrics
+Per-stage timings (normalization, URL extraction, keyword/pattern scans,
+every engine) aggregated into fixed-bucket histograms per stage and mode,
+plus verdict counters. Recording is O(log buckets) and memory is constant,
+so it stays on for every request.
+
+Timings are measured where the work runs (possibly a pool process) and
+recorded here on the event loop, so no locking is needed.
+"""
+
+import bisect
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Log-spaced upper bounds: 10us .. ~10s, four buckets per doubling
+BUCKET_BOUNDS: Tuple[float, ...] = tuple(1e-5 * 2 ** (i / 4) for i in range(81))
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+VERDICT_BUCKETS = ("safe", "suspicious", "phishing", "scam")
+
+PHISHING_VERDICT = "Phishing Detected"
+SUSPICIOUS_SCORE = 40
+
+# Modes offered by the frontend; anything else is labelled "other" so
+# client-supplied strings cannot grow the label set without bound
+KNOWN_MODES = frozenset({"email", "sms", "whatsapp", "url", "market", "general"})
+
+
+def mode_label(mode: str) -> str:
+    return mode if mode in KNOWN_MODES else "other"
+
+
+def verdict_bucket(result: Dict[str, Any]) -> str:
+    """
+    Maps an analysis result onto the dashboard's four verdict buckets.
+    The verdict (cut at the fusion config's phishing threshold) decides
+    phishing vs not; scores in SUSPICIOUS_SCORE.. of a "safe" verdict
+    are shown as suspicious.
+    """
+    if result.get("verdict") == PHISHING_VERDICT:
+        hard_rule = any(
+            e.get("engine_name") == "Advance Fee Scam Engine (Hard Rule)"
+            for e in result.get("engine_results", ())
+        )
+        return "scam" if hard_rule else "phishing"
+    if result.get("risk_score", 0) >= SUSPICIOUS_SCORE:
+        return "suspicious"
+    return "safe"
+
+
+class LatencyHistogram:
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)  # last slot: +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Estimate, interpolated linearly inside the target bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = BUCKET_BOUNDS[i - 1] if i else 0.0
+                upper = BUCKET_BOUNDS[i] if i < len(BUCKET_BOUNDS) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / n, self.max)
+            seen += n
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        out = {f"p{int(q * 100)}_ms": round(self.quantile(q) * 1000, 3) for q in QUANTILES}
+        out["mean_ms"] = round(self.total / self.count * 1000, 3) if self.count else 0.0
+        out["max_ms"] = round(self.max * 1000, 3)
+        out["count"] = self.count
+        return out
+
+
+class Metrics:
+    def __init__(self):
+        self.started_at = time.time()
+        self._latency: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self.verdicts = dict.fromkeys(VERDICT_BUCKETS, 0)
+        self.verdicts_by_mode: Dict[str, Dict[str, int]] = {}
+        self.errors = 0
+
+    # ---------------- RECORDING ----------------
+    def observe(self, stage: str, mode: str, seconds: float):
+        mode = mode_label(mode)
+        histogram = self._latency.get((stage, mode))
+        if histogram is None:
+            histogram = self._latency[(stage, mode)] = LatencyHistogram()
+        histogram.observe(seconds)
+
+    def record_timings(self, mode: str, timings: Dict[str, float]):
+        for stage, seconds in timings.items():
+            self.observe(stage, mode, seconds)
+
+    def record_verdict(self, mode: str, result: Dict[str, Any]):
+        bucket = verdict_bucket(result)
+        self.verdicts[bucket] += 1
+        mode = mode_label(mode)
+        by_mode = self.verdicts_by_mode.get(mode)
+        if by_mode is None:
+            by_mode = self.verdicts_by_mode[mode] = dict.fromkeys(VERDICT_BUCKETS, 0)
+        by_mode[bucket] += 1
+
+    def record_error(self):
+        self.errors += 1
+
+    @property
+    def total_analyses(self) -> int:
+        return sum(self.verdicts.values())
+
+    # ---------------- EXPORT ----------------
+    def latency(self, mode: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """stage -> quantile summary; all modes merged unless one is given."""
+        merged: Dict[str, LatencyHistogram] = {}
+        for (stage, stage_mode), histogram in self._latency.items():
+            if mode is not None and stage_mode != mode:
+                continue
+            target = merged.get(stage)
+            if target is None:
+                target = merged[stage] = LatencyHistogram()
+            for i, n in enumerate(histogram.counts):
+                target.counts[i] += n
+            target.count += histogram.count
+            target.total += histogram.total
+            target.max = max(target.max, histogram.max)
+        return {stage: h.summary() for stage, h in sorted(merged.items())}
+
+    def snapshot(self) -> Dict[str, Any]:
+        modes = sorted({mode for _, mode in self._latency})
+        return {
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "total_analyses": self.total_analyses,
+            "errors": self.errors,
+            "verdicts": dict(self.verdicts),
+            "verdicts_by_mode": {m: dict(v) for m, v in self.verdicts_by_mode.items()},
+            "latency": self.latency(),
+            "latency_by_mode": {m: self.latency(m) for m in modes}
+        }
+
+    def render_prometheus(self, gauges: Optional[Dict[str, float]] = None) -> str:
+        """Prometheus text exposition (summary quantiles from the histograms)."""
+        lines: List[str] = [
+            "# TYPE cybersentinel_stage_latency_seconds summary"
+        ]
+        for (stage, mode), h in sorted(self._latency.items()):
+            labels = f'stage="{_escape(stage)}",mode="{_escape(mode)}"'
+            for q in QUANTILES:
+                lines.append(
+                    f'cybersentinel_stage_latency_seconds{{{labels},quantile="{q}"}} {h.quantile(q):.6g}'
+                )
+            lines.append(f"cybersentinel_stage_latency_seconds_sum{{{labels}}} {h.total:.6g}")
+            lines.append(f"cybersentinel_stage_latency_seconds_count{{{labels}}} {h.count}")
+
+        lines.append("# TYPE cybersentinel_verdicts_total counter")
+        for mode, counts in sorted(self.verdicts_by_mode.items()):
+            for bucket, n in counts.items():
+                lines.append(
+                    f'cybersentinel_verdicts_total{{mode="{_escape(mode)}",verdict="{bucket}"}} {n}'
+                )
+
+        lines.append("# TYPE cybersentinel_analysis_errors_total counter")
+        lines.append(f"cybersentinel_analysis_errors_total {self.errors}")
+
+        for name, value in sorted((gauges or {}).items()):
+            lines.append(f"# TYPE cybersentinel_{name} gauge")
+            lines.append(f"cybersentinel_{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Process-wide metrics (only the event-loop process records into it)
+METRICS = Metrics()
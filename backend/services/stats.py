@@ -0,0 +1,268 @@
+"""
+Detection Statistics
+Incrementally maintained aggregates behind /api/stats; nothing is ever
+recomputed by scanning stored verdicts:
+
+  counts        verdict bucket totals, per mode and per triggered engine
+  windows       1m / 1h / 24h verdict counts in ring buffers of time slots
+                (a stale slot is reset when the ring comes back round)
+  top findings  count-min sketch + min-heap of heavy hitters: findings
+                embed domains and numbers, so exact counting is unbounded
+  top domains   same, over registrable domains of phishing/scam messages
+
+Every update is O(1) (O(log k) for the heaps, k fixed). Lives on the
+event loop like METRICS, so no locking. The whole state is JSON and is
+saved on shutdown / restored on startup when STATS_SNAPSHOT_FILE is set.
+
+STATS_SNAPSHOT_FILE  path of the JSON snapshot   (default: unset, no snapshot)
+STATS_TOP_K          entries per top list        (default: 20)
+"""
+
+import hashlib
+import heapq
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from services.metrics import VERDICT_BUCKETS, mode_label, verdict_bucket
+
+logger = logging.getLogger("CyberSentinel")
+
+# name -> (slot seconds, slots)
+WINDOWS = {
+    "1m": (1, 60),
+    "1h": (60, 60),
+    "24h": (900, 96)
+}
+
+THREAT_BUCKETS = frozenset({"phishing", "scam"})
+
+# Sketch cell hashing; snapshots of another scheme are not restored
+SKETCH_HASH = "blake2b"
+
+
+class RollingWindow:
+    """Verdict counts over the last slots * slot_seconds, in a ring buffer."""
+
+    def __init__(self, slot_seconds: int, slots: int):
+        self.slot_seconds = slot_seconds
+        self.slots = slots
+        self.counts = np.zeros((slots, len(VERDICT_BUCKETS)), dtype=np.int64)
+        self.epochs = np.full(slots, -1, dtype=np.int64)  # absolute slot number held
+
+    def add(self, bucket_index: int, now: float):
+        epoch = int(now // self.slot_seconds)
+        i = epoch % self.slots
+        if self.epochs[i] != epoch:
+            self.counts[i] = 0
+            self.epochs[i] = epoch
+        self.counts[i, bucket_index] += 1
+
+    def totals(self, now: float) -> Dict[str, int]:
+        epoch = int(now // self.slot_seconds)
+        live = self.epochs > epoch - self.slots
+        summed = self.counts[live].sum(axis=0)
+        return dict(zip(VERDICT_BUCKETS, (int(n) for n in summed)))
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"counts": self.counts.tolist(), "epochs": self.epochs.tolist()}
+
+    def load(self, state: Dict[str, Any]):
+        counts = np.asarray(state["counts"], dtype=np.int64)
+        if counts.shape == self.counts.shape:
+            self.counts = counts
+            self.epochs = np.asarray(state["epochs"], dtype=np.int64)
+
+
+class CountMinSketch:
+    """Approximate counts in fixed memory (overestimates only)."""
+
+    def __init__(self, width: int = 4096, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+
+    def _cells(self, item: str) -> List[int]:
+        # One blake2b digest, 4 bytes per row: stable across processes,
+        # unlike hash(), and independent per row (crc32 with per-row seeds
+        # is affine, so same-length items colliding in one row collided
+        # in every row)
+        digest = hashlib.blake2b(item.encode("utf-8", "surrogatepass"), digest_size=4 * self.depth).digest()
+        return [
+            int.from_bytes(digest[4 * row:4 * row + 4], "little") % self.width
+            for row in range(self.depth)
+        ]
+
+    def add(self, item: str, count: int = 1) -> int:
+        """Adds and returns the new estimate."""
+        table = self.table
+        estimate = None
+        for row, cell in enumerate(self._cells(item)):
+            table[row, cell] += count
+            value = table[row, cell]
+            estimate = value if estimate is None or value < estimate else estimate
+        return int(estimate)
+
+    def estimate(self, item: str) -> int:
+        return int(min(self.table[row, cell] for row, cell in enumerate(self._cells(item))))
+
+
+class HeavyHitters:
+    """Top-k items by count-min estimate (min-heap with lazy deletion)."""
+
+    def __init__(self, k: int = 20, sketch: Optional[CountMinSketch] = None):
+        self.k = k
+        self.sketch = sketch or CountMinSketch()
+        self._top: Dict[str, int] = {}
+        self._heap: List[Tuple[int, str]] = []
+
+    def add(self, item: str):
+        estimate = self.sketch.add(item)
+        top = self._top
+        if item in top:
+            top[item] = estimate
+            heapq.heappush(self._heap, (estimate, item))
+        elif len(top) < self.k:
+            top[item] = estimate
+            heapq.heappush(self._heap, (estimate, item))
+        elif estimate > self._min():
+            heapq.heappush(self._heap, (estimate, item))
+            evicted = self._pop_min()
+            del top[evicted]
+            top[item] = estimate
+        # Stale heap entries are bounded: rebuild when they dominate
+        if len(self._heap) > 4 * self.k:
+            self._heap = [(n, i) for i, n in top.items()]
+            heapq.heapify(self._heap)
+
+    def _min(self) -> int:
+        heap, top = self._heap, self._top
+        while heap and top.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0]
+
+    def _pop_min(self) -> str:
+        self._min()
+        return heapq.heappop(self._heap)[1]
+
+    def items(self) -> List[Tuple[str, int]]:
+        return sorted(self._top.items(), key=lambda kv: (-kv[1], kv[0]))
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"hash": SKETCH_HASH, "table": self.sketch.table.tolist(), "top": self._top}
+
+    def load(self, state: Dict[str, Any]):
+        table = np.asarray(state["table"], dtype=np.int64)
+        if table.shape == self.sketch.table.shape and state.get("hash") == SKETCH_HASH:
+            self.sketch.table = table
+            self._top = dict(sorted(state["top"].items(), key=lambda kv: -kv[1])[:self.k])
+            self._heap = [(n, i) for i, n in self._top.items()]
+            heapq.heapify(self._heap)
+
+
+class DetectionStats:
+    def __init__(self, top_k: int = 20, snapshot_path: Optional[str] = None):
+        self.snapshot_path = snapshot_path
+        self.since = time.time()
+        self.verdicts = dict.fromkeys(VERDICT_BUCKETS, 0)
+        self.by_mode: Dict[str, Dict[str, int]] = {}
+        self.engines: Dict[str, int] = {}  # engine -> times it scored > 0
+        self.windows = {name: RollingWindow(*spec) for name, spec in WINDOWS.items()}
+        self.findings = HeavyHitters(top_k)
+        self.domains = HeavyHitters(top_k)
+
+    @classmethod
+    def from_env(cls) -> "DetectionStats":
+        return cls(
+            top_k=int(os.environ.get("STATS_TOP_K", "20")),
+            snapshot_path=os.environ.get("STATS_SNAPSHOT_FILE") or None
+        )
+
+    # ---------------- RECORDING ----------------
+    def record(self, mode: str, result: Dict[str, Any], domains: Iterable[str] = ()):
+        bucket = verdict_bucket(result)
+        self.verdicts[bucket] += 1
+
+        mode = mode_label(mode)
+        by_mode = self.by_mode.get(mode)
+        if by_mode is None:
+            by_mode = self.by_mode[mode] = dict.fromkeys(VERDICT_BUCKETS, 0)
+        by_mode[bucket] += 1
+
+        now = time.time()
+        index = VERDICT_BUCKETS.index(bucket)
+        for window in self.windows.values():
+            window.add(index, now)
+
+        for engine in result.get("engine_results", ()):
+            if engine["risk_score"] > 0:
+                name = engine["engine_name"]
+                self.engines[name] = self.engines.get(name, 0) + 1
+                for finding in engine["findings"]:
+                    self.findings.add(finding)
+
+        if bucket in THREAT_BUCKETS:
+            for domain in domains:
+                self.domains.add(domain)
+
+    @property
+    def total_analyses(self) -> int:
+        return sum(self.verdicts.values())
+
+    # ---------------- EXPORT ----------------
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "total_analyses": self.total_analyses,
+            "verdicts": dict(self.verdicts),
+            "verdicts_by_mode": {m: dict(v) for m, v in self.by_mode.items()},
+            "engines_triggered": dict(sorted(self.engines.items(), key=lambda kv: -kv[1])),
+            "windows": {name: window.totals(now) for name, window in self.windows.items()},
+            "top_findings": [{"finding": f, "count": n} for f, n in self.findings.items()],
+            "top_domains": [{"domain": d, "count": n} for d, n in self.domains.items()],
+            "since": self.since
+        }
+
+    # ---------------- PERSISTENCE ----------------
+    def save(self):
+        if not self.snapshot_path:
+            return
+        state = {
+            "since": self.since,
+            "verdicts": self.verdicts,
+            "by_mode": self.by_mode,
+            "engines": self.engines,
+            "windows": {name: window.to_json() for name, window in self.windows.items()},
+            "findings": self.findings.to_json(),
+            "domains": self.domains.to_json()
+        }
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.snapshot_path)
+
+    def load(self):
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path) as f:
+                state = json.load(f)
+            self.since = state["since"]
+            self.verdicts.update(state["verdicts"])
+            self.by_mode = state["by_mode"]
+            self.engines = state["engines"]
+            for name, window in self.windows.items():
+                if name in state["windows"]:
+                    window.load(state["windows"][name])
+            self.findings.load(state["findings"])
+            self.domains.load(state["domains"])
+        except (OSError, ValueError, KeyError):
+            logger.exception("Ignoring unreadable stats snapshot %s", self.snapshot_path)
+
+
+# Process-wide statistics
+STATS = DetectionStats.from_env()
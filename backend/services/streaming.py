@@ -0,0 +1,155 @@
+"""
+Streaming Analysis
+Very large bodies (multi-megabyte HTML newsletters, attachments sent as
+text) are never held as one string. The body is decoded incrementally and
+cut into fixed-size windows at whitespace; each window carries the tail
+of the previous one (overlap) so a phrase or URL split by a chunk
+boundary is still seen whole. The engine pipeline runs per window and
+results are merged per engine, and per URL for per-URL results (highest
+score wins, findings are unioned), so peak memory is bounded by the
+window size, not the message size.
+
+Keyword hits are carried forward: each window is analyzed together with
+the phrases of every window before it (engines/pipeline.py `earlier`),
+so rules that need two signals anywhere in the message (reward + money,
+threat + action) fire however far apart the signals are. Ordered
+workflows and regex patterns stay window-local (within the overlap).
+
+Normalization is per window too: every normalize_text step is local to a
+word, so windows cut at whitespace normalize exactly like the whole text.
+
+STREAM_WINDOW_CHARS   characters per window            (default: 65536)
+STREAM_OVERLAP_CHARS  tail carried into the next window (default: 512)
+STREAM_MAX_BYTES      stop reading after this many bytes (default: 50 MB)
+"""
+
+import codecs
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+
+class TextWindower:
+    """Incremental bytes/str -> overlapping text windows."""
+
+    def __init__(self, window_chars: int = 65536, overlap_chars: int = 512, encoding: str = "utf-8"):
+        if overlap_chars >= window_chars:
+            raise ValueError("overlap must be smaller than the window")
+        self.window_chars = window_chars
+        self.overlap_chars = overlap_chars
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self._pending: List[str] = []
+        self._pending_chars = 0
+        self._tail = ""
+        self.bytes_read = 0
+        self.windows = 0
+
+    @classmethod
+    def from_env(cls) -> "TextWindower":
+        return cls(
+            window_chars=int(os.environ.get("STREAM_WINDOW_CHARS", "65536")),
+            overlap_chars=int(os.environ.get("STREAM_OVERLAP_CHARS", "512"))
+        )
+
+    def feed(self, chunk: Union[bytes, str]) -> Iterator[str]:
+        """Windows completed by this chunk."""
+        if isinstance(chunk, bytes):
+            self.bytes_read += len(chunk)
+            chunk = self._decoder.decode(chunk)
+        else:
+            self.bytes_read += len(chunk)
+        if not chunk:
+            return
+
+        self._pending.append(chunk)
+        self._pending_chars += len(chunk)
+        while self._pending_chars >= self.window_chars:
+            text = "".join(self._pending)
+            cut = self._cut(text)
+            self._pending = [text[cut:]]
+            self._pending_chars = len(text) - cut
+            yield self._emit(text[:cut])
+
+    def finish(self) -> Iterator[str]:
+        """The last (possibly short) window."""
+        rest = "".join(self._pending) + self._decoder.decode(b"", final=True)
+        self._pending, self._pending_chars = [], 0
+        if rest.strip() or not self.windows:
+            yield self._emit(rest)
+
+    def _cut(self, text: str) -> int:
+        """Just after the last space/newline in the window's second half."""
+        limit = min(self.window_chars, len(text))
+        start = limit // 2
+        cut = max(text.rfind(" ", start, limit), text.rfind("\n", start, limit))
+        return cut + 1 if cut != -1 else limit
+
+    def _emit(self, body: str) -> str:
+        window = self._tail + body
+        self.windows += 1
+        tail = window[-self.overlap_chars:] if self.overlap_chars else ""
+        # Start the overlap on a word boundary
+        space = next((i for i, ch in enumerate(tail) if ch.isspace()), -1)
+        self._tail = tail[space + 1:] if space != -1 else tail
+        return window
+
+
+def iter_windows(chunks: Iterable[Union[bytes, str]], windower: Optional[TextWindower] = None) -> Iterator[str]:
+    """Synchronous convenience wrapper (files, CLI)."""
+    windower = windower or TextWindower.from_env()
+    for chunk in chunks:
+        yield from windower.feed(chunk)
+    yield from windower.finish()
+
+
+HARD_RULE_SUFFIX = " (Hard Rule)"
+
+
+def merge_key(result: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    """
+    Per-URL results (those naming a `url`) are kept per engine + URL; an
+    engine's "(Hard Rule)" variant is the same engine, not a second one.
+    """
+    name = result["engine_name"]
+    if name.endswith(HARD_RULE_SUFFIX):
+        name = name[:-len(HARD_RULE_SUFFIX)]
+    return name, result.get("url")
+
+
+class ResultMerger:
+    """Folds per-window engine results into one result per engine (and URL)."""
+
+    def __init__(self):
+        self._results: Dict[Tuple[str, Optional[str]], Dict[str, Any]] = {}
+
+    def add(self, results: Iterable[Dict[str, Any]]):
+        merged = self._results
+        for result in results:
+            key = merge_key(result)
+            current = merged.get(key)
+            if current is None:
+                merged[key] = {**result, "findings": list(result["findings"])}
+                continue
+            if result["risk_score"] and not current["risk_score"]:
+                # Drop "nothing found" placeholders of quiet windows
+                merged[key] = {**result, "findings": list(result["findings"])}
+                continue
+            if not result["risk_score"]:
+                continue
+            if result["risk_score"] > current["risk_score"]:
+                # The strongest window names the result (hard-rule variant)
+                current["engine_name"] = result["engine_name"]
+                current["risk_score"] = result["risk_score"]
+                current["confidence"] = result["confidence"]
+            findings = current["findings"]
+            for finding in result["findings"]:
+                if finding not in findings:
+                    findings.append(finding)
+
+    @property
+    def results(self) -> List[Dict[str, Any]]:
+        """Engine order of first appearance."""
+        return list(self._results.values())
+
+
+def stream_max_bytes() -> int:
+    return int(os.environ.get("STREAM_MAX_BYTES", str(50 * 1024 * 1024)))
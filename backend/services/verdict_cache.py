@@ -0,0 +1,218 @@
+"""
+Verdict Cache
+Campaigns send the same body to thousands of recipients, so verdicts are
+cached by a hash of (normalized text, mode, email headers, raw links,
+rule pack version).
+Raw links are part of the key because URL analysis runs on the raw text:
+"http://10.0.0.1" and "http://io.o.o.i" normalize to the same body.
+
+Local tier: bounded LRU with per-entry TTL (lives on the event loop).
+Shared tier (optional): MongoDB collection with a TTL index, so every
+uvicorn worker benefits from hits computed by the others.
+
+VERDICT_CACHE_SIZE     max local entries, 0 disables   (default: 10000)
+VERDICT_CACHE_TTL      seconds                         (default: 600)
+VERDICT_CACHE_BACKEND  memory | mongo                  (default: memory)
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Sequence
+
+logger = logging.getLogger("CyberSentinel")
+
+
+def cache_key(
+    normalized: str,
+    mode: str,
+    headers: Optional[Dict[str, str]] = None,
+    links: Sequence[str] = (),
+    rules_version: Optional[str] = None
+) -> str:
+    digest = hashlib.sha256()
+    digest.update(normalized.encode("utf-8", "surrogatepass"))
+    digest.update(b"\0")
+    digest.update(mode.encode("utf-8"))
+    if headers:
+        digest.update(b"\0")
+        digest.update(json.dumps(headers, sort_keys=True).encode("utf-8"))
+    if links:
+        digest.update(b"\1")
+        digest.update("\n".join(links).encode("utf-8", "surrogatepass"))
+    if rules_version:
+        # Verdicts from an older rule pack are never served after a swap
+        digest.update(b"\2")
+        digest.update(rules_version.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class MongoVerdictStore:
+    """Shared tier backed by the bundled Motor driver."""
+
+    def __init__(self, url: str, db_name: str, collection: str = "verdict_cache"):
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        self._client = AsyncIOMotorClient(url)
+        self._coll = self._client[db_name][collection]
+        self._indexed = False
+
+    async def _ensure_index(self):
+        if not self._indexed:
+            # Mongo removes documents once expires_at has passed
+            await self._coll.create_index("expires_at", expireAfterSeconds=0)
+            self._indexed = True
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        doc = await self._coll.find_one({
+            "_id": key,
+            "expires_at": {"$gt": datetime.now(timezone.utc)}
+        })
+        return doc["value"] if doc else None
+
+    async def put(self, key: str, value: Dict[str, Any], ttl: float):
+        await self._ensure_index()
+        await self._coll.replace_one(
+            {"_id": key},
+            {
+                "value": value,
+                "expires_at": datetime.now(timezone.utc) + timedelta(seconds=ttl)
+            },
+            upsert=True
+        )
+
+    def close(self):
+        self._client.close()
+
+
+class VerdictCache:
+    def __init__(self, max_entries: int = 10000, ttl: float = 600.0, shared: Optional[MongoVerdictStore] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared = shared
+
+        # key -> (expires_at monotonic, value)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._pending_writes = set()
+
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.shared_errors = 0
+
+    @classmethod
+    def from_env(cls) -> "VerdictCache":
+        shared = None
+        if os.environ.get("VERDICT_CACHE_BACKEND", "memory") == "mongo":
+            shared = MongoVerdictStore(
+                os.environ.get("MONGO_URL", "mongodb://localhost:27017"),
+                os.environ.get("DB_NAME", "cybersentinel")
+            )
+        return cls(
+            max_entries=int(os.environ.get("VERDICT_CACHE_SIZE", "10000")),
+            ttl=float(os.environ.get("VERDICT_CACHE_TTL", "600")),
+            shared=shared
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    # ---------------- LOCAL TIER ----------------
+    def _get_local(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _put_local(self, key: str, value: Dict[str, Any], ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    # ---------------- PUBLIC API ----------------
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+
+        value = self._get_local(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        if self.shared is not None:
+            try:
+                value = await self.shared.get(key)
+            except Exception:
+                self.shared_errors += 1
+                logger.exception("Shared verdict cache read failed")
+                value = None
+            if value is not None:
+                self.shared_hits += 1
+                self._put_local(key, value, self.ttl)
+                return value
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: Dict[str, Any], ttl: Optional[float] = None):
+        if not self.enabled:
+            return
+        ttl = ttl if ttl is not None else self.ttl
+        self._put_local(key, value, ttl)
+
+        if self.shared is not None:
+            # Write-behind: the request never waits on the shared tier
+            task = asyncio.get_running_loop().create_task(self._put_shared(key, value, ttl))
+            self._pending_writes.add(task)
+            task.add_done_callback(self._pending_writes.discard)
+
+    async def _put_shared(self, key: str, value: Dict[str, Any], ttl: float):
+        try:
+            await self.shared.put(key, value, ttl)
+        except Exception:
+            self.shared_errors += 1
+            logger.exception("Shared verdict cache write failed")
+
+    def clear(self):
+        self._entries.clear()
+
+    def close(self):
+        if self.shared is not None:
+            self.shared.close()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "backend": "mongo" if self.shared is not None else "memory",
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "shared_errors": self.shared_errors,
+            "hit_rate": round((self.hits + self.shared_hits) / lookups, 4) if lookups else 0.0
+        }
+
+
+# Process-wide cache
+CACHE = VerdictCache.from_env()
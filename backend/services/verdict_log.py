@@ -0,0 +1,230 @@
+"""
+Verdict Log (write-behind persistence)
+Every verdict is recorded without the request ever waiting on storage:
+the request path appends a small document to a bounded in-process buffer
+and returns; a background task flushes the buffer with ONE bulk insert
+every VERDICT_LOG_BATCH documents or VERDICT_LOG_FLUSH_MS milliseconds,
+whichever comes first.
+
+When the buffer is full (storage down or too slow):
+  drop   the new document is discarded and counted (default; the request
+         path never blocks)
+  block  the caller awaits free space (bounded latency impact); a batch
+         stays buffered until its insert succeeds and is retried on the
+         next flush, so nothing is lost while the process runs (only what
+         is still unsent when it stops with storage down is dropped)
+
+Documents hold the verdict, scores and cache key, not the message text.
+
+VERDICT_LOG          mongo | memory | off   (default: mongo if MONGO_URL is set)
+VERDICT_LOG_BATCH    documents per bulk insert       (default: 200)
+VERDICT_LOG_FLUSH_MS max milliseconds before a flush (default: 500)
+VERDICT_LOG_BUFFER   max buffered documents          (default: 20000)
+VERDICT_LOG_POLICY   drop | block                    (default: drop)
+"""
+
+import asyncio
+import logging
+import os
+from collections import deque
+from itertools import islice
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger("CyberSentinel")
+
+
+class MemoryVerdictSink:
+    """In-memory stand-in for tests and local runs (keeps the newest documents)."""
+
+    name = "memory"
+
+    def __init__(self, max_documents: int = 100000):
+        self.documents: Deque[Dict[str, Any]] = deque(maxlen=max_documents)
+
+    async def insert_many(self, documents: List[Dict[str, Any]]):
+        self.documents.extend(documents)
+
+    def close(self):
+        pass
+
+
+class MongoVerdictSink:
+    """Bulk inserts through the bundled Motor driver."""
+
+    name = "mongo"
+
+    def __init__(self, url: str, db_name: str, collection: str = "verdicts"):
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        # Fail a flush fast instead of hanging the flusher when mongod is down
+        self._client = AsyncIOMotorClient(url, serverSelectionTimeoutMS=5000)
+        self._coll = self._client[db_name][collection]
+        self._indexed = False
+
+    async def insert_many(self, documents: List[Dict[str, Any]]):
+        if not self._indexed:
+            await self._coll.create_index("timestamp")
+            await self._coll.create_index([("verdict", 1), ("timestamp", -1)])
+            self._indexed = True
+        # Unordered: one bad document does not stop the rest of the batch
+        await self._coll.insert_many(documents, ordered=False)
+
+    def close(self):
+        self._client.close()
+
+
+class VerdictLog:
+    def __init__(
+        self,
+        sink=None,
+        batch_size: int = 200,
+        flush_ms: float = 500,
+        max_buffer: int = 20000,
+        policy: str = "drop"
+    ):
+        if policy not in ("drop", "block"):
+            raise ValueError(f"Unknown verdict log policy: {policy}")
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_seconds = flush_ms / 1000
+        self.max_buffer = max_buffer
+        self.policy = policy
+
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Condition] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.errors = 0
+
+    @classmethod
+    def from_env(cls) -> "VerdictLog":
+        backend = os.environ.get("VERDICT_LOG", "mongo" if "MONGO_URL" in os.environ else "off")
+        sink = None
+        if backend == "mongo":
+            sink = MongoVerdictSink(
+                os.environ.get("MONGO_URL", "mongodb://localhost:27017"),
+                os.environ.get("DB_NAME", "cybersentinel")
+            )
+        elif backend == "memory":
+            sink = MemoryVerdictSink()
+        elif backend != "off":
+            raise ValueError(f"Unknown VERDICT_LOG backend: {backend}")
+        return cls(
+            sink=sink,
+            batch_size=int(os.environ.get("VERDICT_LOG_BATCH", "200")),
+            flush_ms=float(os.environ.get("VERDICT_LOG_FLUSH_MS", "500")),
+            max_buffer=int(os.environ.get("VERDICT_LOG_BUFFER", "20000")),
+            policy=os.environ.get("VERDICT_LOG_POLICY", "drop")
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.sink is not None
+
+    # ---------------- LIFECYCLE ----------------
+    def start(self):
+        """Starts the flusher on the running loop (app startup)."""
+        if self.enabled and self._task is None:
+            self._wakeup = asyncio.Event()
+            self._space = asyncio.Condition()
+            self._task = asyncio.get_running_loop().create_task(self._flusher())
+
+    async def stop(self):
+        """Flushes everything still buffered, then closes the sink."""
+        if self._task is not None:
+            # Not cancelled: a batch being inserted must not be lost
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        if self.sink is not None:
+            self.sink.close()
+
+    # ---------------- REQUEST PATH ----------------
+    async def record(self, document: Dict[str, Any]):
+        """Buffers one document; awaits only under the block policy when full."""
+        if self._task is None:
+            return
+        if len(self._buffer) >= self.max_buffer:
+            if self.policy == "drop":
+                self.dropped += 1
+                return
+            async with self._space:
+                await self._space.wait_for(lambda: len(self._buffer) < self.max_buffer)
+        self._buffer.append(document)
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    # ---------------- FLUSHER ----------------
+    async def _flusher(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._buffer:
+                if not await self._flush() and not self._stopping:
+                    break  # storage trouble: retry on the next tick
+                if len(self._buffer) < self.batch_size and not self._stopping:
+                    break
+            if self._stopping and not self._buffer:
+                return
+
+    async def _flush(self) -> bool:
+        count = min(len(self._buffer), self.batch_size)
+        keep = self.policy == "block"
+        if keep:
+            # Only the flusher pops: the batch leaves the buffer once stored
+            batch = list(islice(self._buffer, count))
+        else:
+            batch = [self._buffer.popleft() for _ in range(count)]
+            await self._notify_space()
+        try:
+            await self.sink.insert_many(batch)
+        except Exception:
+            self.errors += 1
+            if keep and not self._stopping:
+                logger.exception("Verdict log flush failed (%d documents kept for retry)", count)
+                return False
+            # drop: storage trouble must not grow the buffer without bound
+            if keep:
+                await self._release(count)
+            self.dropped += count
+            logger.exception("Verdict log flush failed (%d documents dropped)", count)
+            return False
+        if keep:
+            await self._release(count)
+        self.written += count
+        self.batches += 1
+        return True
+
+    async def _release(self, count: int):
+        for _ in range(count):
+            self._buffer.popleft()
+        await self._notify_space()
+
+    async def _notify_space(self):
+        async with self._space:
+            self._space.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "backend": self.sink.name if self.sink is not None else "off",
+            "policy": self.policy,
+            "buffered": len(self._buffer),
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "errors": self.errors
+        }
+
+
+# Process-wide log
+VERDICTS = VerdictLog.from_env()
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Offline Benchmark Suite for the CyberSentinel AI Detection Pipeline
+Generates a seeded synthetic corpus across modes and size classes, drives
+the pipeline in-process and reports messages/sec, per-engine cost and
+peak memory. Results are stored as a JSON baseline that later runs can be
+diffed against.
+
+    python backend_benchmark.py                       # run, write baseline
+    python backend_benchmark.py --driver http         # through /api/analyze
+    python backend_benchmark.py --baseline old.json   # fail on regressions
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List
+
+# In-process, uncached, unthrottled: measure the engines, not the caches
+os.environ.setdefault("ENGINE_EXECUTOR", "inline")
+os.environ.setdefault("VERDICT_CACHE_SIZE", "0")
+os.environ.setdefault("CAMPAIGN_INDEX_SIZE", "0")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+MODES = ["general", "email", "sms", "whatsapp", "url"]
+
+SIZE_CLASSES = {
+    "100B": 100,
+    "1KB": 1_000,
+    "10KB": 10_000,
+    "100KB": 100_000,
+    "1MB": 1_000_000
+}
+
+# Bytes generated per (mode, size class); small classes get more messages
+BYTES_PER_CLASS = 2_000_000
+MIN_MESSAGES = 3
+MAX_MESSAGES = 500
+
+PHISHING_SENTENCES = [
+    "Your account has been suspended, verify your login immediately.",
+    "Congratulations! You won a gift card, claim now before it expires.",
+    "Pay a small processing fee via UPI to release your prize.",
+    "Share the OTP sent to your phone to confirm the transfer.",
+    "Urgent: unusual sign-in detected, confirm your bank details.",
+    "Limited offer: guaranteed returns, message us on telegram.",
+    "Act now or your parcel will be returned to sender."
+]
+
+BENIGN_SENTENCES = [
+    "Hi team, the quarterly review is moved to Thursday afternoon.",
+    "Thanks for the update, I will send the slides tomorrow.",
+    "Lunch is on the third floor today, see you there.",
+    "The build passed and the release notes are in the wiki.",
+    "Can we reschedule our call to next week?",
+    "Please find the meeting minutes attached below."
+]
+
+PHISHING_URLS = [
+    "http://paypa1-secure.tk/login?session=a8f3k2",
+    "http://192.168.10.4/verify/account",
+    "https://amazon.gift-rewards.xyz/claim/x9Qz7LpR2mVw4KtY",
+    "http://secure.login.update.microsoft-support.top/auth?id=77"
+]
+
+BENIGN_URLS = [
+    "https://google.com/search",
+    "https://github.com/org/repo/pull/12",
+    "https://docs.python.org/3/library/json.html"
+]
+
+EMAIL_HEADERS = [
+    {"from": "security@paypal-support.xyz", "spf": "fail", "dkim": "none"},
+    {"from": "noreply@github.com", "spf": "pass", "dkim": "pass"}
+]
+
+
+class CorpusGenerator:
+    """Deterministic synthetic messages (same seed -> same corpus)."""
+
+    def __init__(self, seed: int = 1337, phishing_ratio: float = 0.5):
+        self.seed = seed
+        self.phishing_ratio = phishing_ratio
+
+    def generate(self, mode: str, size: int, count: int) -> List[Dict]:
+        rng = random.Random(f"{self.seed}:{mode}:{size}")
+        return [self._message(rng, mode, size) for _ in range(count)]
+
+    def _message(self, rng: random.Random, mode: str, size: int) -> Dict:
+        phishing = rng.random() < self.phishing_ratio
+        sentences = PHISHING_SENTENCES if phishing else BENIGN_SENTENCES
+        urls = PHISHING_URLS if phishing else BENIGN_URLS
+
+        parts, length = [], 0
+        if mode == "url":
+            first = rng.choice(urls)
+            parts.append(first)
+            length += len(first) + 1
+        while length < size:
+            if rng.random() < 0.1:
+                part = rng.choice(urls)
+            else:
+                # Mix in benign filler so scam signals are not every sentence
+                part = rng.choice(sentences if rng.random() < 0.4 else BENIGN_SENTENCES)
+            parts.append(part)
+            length += len(part) + 1
+
+        message = {"content": " ".join(parts)[:max(size, len(parts[0]))], "mode": mode}
+        if mode == "email":
+            message["email_headers"] = EMAIL_HEADERS[0 if phishing else 1]
+        return message
+
+
+class DirectDriver:
+    """Calls the analysis core in-process and collects stage timings."""
+
+    name = "direct"
+
+    def __init__(self):
+        import server
+        self.server = server
+
+    def analyze(self, message: Dict) -> Dict[str, float]:
+        _, timings = self.server.run_analysis_timed(
+            message["content"], message["mode"], None, message.get("email_headers")
+        )
+        return timings
+
+
+class HTTPDriver:
+    """Drives POST /api/analyze through FastAPI's test client."""
+
+    name = "http"
+
+    def __init__(self):
+        from fastapi.testclient import TestClient
+        import server
+        server.limiter.enabled = False
+        self.server = server
+        self.client = TestClient(server.app)
+        self.client.__enter__()
+
+    def analyze(self, message: Dict) -> Dict[str, float]:
+        response = self.client.post("/api/analyze", json=message)
+        response.raise_for_status()
+        return {}
+
+    def close(self):
+        self.client.__exit__(None, None, None)
+
+
+class CyberSentinelBenchmark:
+    def __init__(self, driver, modes: List[str], sizes: List[str], seed: int, scale: float):
+        self.driver = driver
+        self.modes = modes
+        self.sizes = sizes
+        self.scale = scale
+        self.corpus = CorpusGenerator(seed)
+        self.results = []
+
+    def message_count(self, size: int) -> int:
+        count = int(BYTES_PER_CLASS * self.scale) // size
+        return max(MIN_MESSAGES, min(MAX_MESSAGES, count))
+
+    def run_case(self, mode: str, size_class: str) -> Dict:
+        size = SIZE_CLASSES[size_class]
+        messages = self.corpus.generate(mode, size, self.message_count(size))
+
+        # Warm-up: compile automata / banks outside the timed loop
+        self.driver.analyze(messages[0])
+
+        stage_totals: Dict[str, float] = {}
+        start = time.perf_counter()
+        for message in messages:
+            for stage, seconds in self.driver.analyze(message).items():
+                stage_totals[stage] = stage_totals.get(stage, 0.0) + seconds
+        elapsed = time.perf_counter() - start
+
+        # Separate pass: tracemalloc slows allocation-heavy code down
+        tracemalloc.start()
+        self.driver.analyze(messages[0])
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        total_bytes = sum(len(m["content"]) for m in messages)
+        result = {
+            "mode": mode,
+            "size_class": size_class,
+            "messages": len(messages),
+            "seconds": round(elapsed, 4),
+            "messages_per_sec": round(len(messages) / elapsed, 2),
+            "mb_per_sec": round(total_bytes / elapsed / 1e6, 3),
+            "peak_memory_kb": round(peak / 1024, 1),
+            "stage_ms": {
+                stage: round(total / len(messages) * 1000, 4)
+                for stage, total in sorted(stage_totals.items())
+            }
+        }
+        print(
+            f"⏱️  {mode:<9}{size_class:>6}  {result['messages_per_sec']:>10.1f} msg/s  "
+            f"{result['mb_per_sec']:>8.2f} MB/s  peak {result['peak_memory_kb']:>9.1f} KB"
+        )
+        return result
+
+    def run_all(self) -> List[Dict]:
+        print("🚀 Running CyberSentinel AI pipeline benchmark")
+        print(f"🔧 Driver: {self.driver.name}")
+        print("=" * 60)
+        for mode in self.modes:
+            for size_class in self.sizes:
+                self.results.append(self.run_case(mode, size_class))
+        print("=" * 60)
+        return self.results
+
+
+def compare(results: List[Dict], baseline: Dict, tolerance: float) -> List[str]:
+    """Regressions: throughput dropped by more than `tolerance` (0.15 = 15%)."""
+    previous = {(r["mode"], r["size_class"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        old = previous.get((result["mode"], result["size_class"]))
+        if old is None:
+            continue
+        change = result["messages_per_sec"] / old["messages_per_sec"] - 1
+        marker = "❌" if change < -tolerance else "✅"
+        print(f"{marker} {result['mode']:<9}{result['size_class']:>6}  {change:+.1%} msg/s")
+        if change < -tolerance:
+            regressions.append(
+                f"{result['mode']}/{result['size_class']}: "
+                f"{old['messages_per_sec']} -> {result['messages_per_sec']} msg/s ({change:+.1%})"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmark")
+    parser.add_argument("--driver", choices=["direct", "http"], default="direct")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--sizes", default=",".join(SIZE_CLASSES))
+    parser.add_argument("--seed", type=int, default=1337)
+    parser.add_argument("--scale", type=float, default=1.0, help="corpus size multiplier")
+    parser.add_argument("--output", default="backend_benchmark_results.json")
+    parser.add_argument("--baseline", help="previous results JSON to diff against")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    modes = args.modes.split(",")
+    sizes = args.sizes.split(",")
+    unknown = [s for s in sizes if s not in SIZE_CLASSES]
+    if unknown:
+        parser.error(f"Unknown size classes: {unknown}")
+
+    driver = DirectDriver() if args.driver == "direct" else HTTPDriver()
+    try:
+        benchmark = CyberSentinelBenchmark(driver, modes, sizes, args.seed, args.scale)
+        results = benchmark.run_all()
+    finally:
+        if hasattr(driver, "close"):
+            driver.close()
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "timestamp": datetime.now().isoformat(),
+            "driver": args.driver,
+            "seed": args.seed,
+            "scale": args.scale,
+            "pipeline_profile": driver.server.PIPELINE_PROFILE,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results
+        }, f, indent=2)
+    print(f"💾 Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("driver") != args.driver:
+            print(f"⚠️  Baseline used the {baseline.get('driver')} driver; not comparable")
+            return 1
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\n❌ Regressions:")
+            for regression in regressions:
+                print(f"  • {regression}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
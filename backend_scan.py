@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Offline Mailbox Scanner for incident response
+Walks an mbox file or a Maildir tree, fans messages out to a process pool
+running the engine pipeline and writes one NDJSON verdict per message,
+in input order, with progress and throughput on stderr.
+
+The mbox is memory-mapped and split by offset, so a multi-gigabyte
+export is never loaded whole. After every written chunk a checkpoint
+records where to continue (mbox byte offset / last Maildir file) and how
+long the output was; rerun the same command to resume after an
+interruption. Lines written after the last checkpoint are truncated
+away on resume, so no verdict is ever written twice.
+
+    python backend_scan.py export.mbox -o verdicts.ndjson
+    python backend_scan.py ~/Maildir -o verdicts.ndjson --workers 8
+    python backend_scan.py export.mbox -o out.ndjson --restart   # ignore checkpoint
+"""
+
+import argparse
+import json
+import mmap
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+# Workers run the pipeline directly: no executor pool inside the pool
+os.environ.setdefault("ENGINE_EXECUTOR", "inline")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from engines.raw_email import RawEmail, mbox_spans, unquote_mbox  # noqa: E402
+
+PROGRESS_EVERY = 2.0  # seconds
+
+# (source id, raw message) -> source id is "mbox@<offset>" or a Maildir path
+Job = Tuple[str, bytes]
+
+
+# --------------------------------------------------
+# INPUT
+# --------------------------------------------------
+class MboxSource:
+    """Memory-mapped mbox; position = byte offset of the next separator."""
+
+    kind = "mbox"
+
+    def __init__(self, path: str):
+        self.path = path
+        self.size = os.path.getsize(path)
+
+    def messages(self, position: Optional[int]) -> Iterator[Tuple[Job, int, int]]:
+        """(job, position after it, input bytes consumed) triples."""
+        if not self.size:
+            return
+        previous = position or 0
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            for start, end in mbox_spans(buffer, previous):
+                yield (f"mbox@{start}", unquote_mbox(buffer[start:end])), end, end - previous
+                previous = end
+
+    def consumed_before(self, position: Optional[int]) -> int:
+        return position or 0
+
+
+class MaildirSource:
+    """Every message under cur/ and new/ (sub-folders too), by sorted path."""
+
+    kind = "maildir"
+
+    def __init__(self, path: str):
+        self.path = path
+        self.files = sorted(self._walk(path))
+        self.size = sum(os.path.getsize(p) for p in self.files)
+
+    @staticmethod
+    def _walk(root: str) -> Iterator[str]:
+        for directory, subdirs, files in os.walk(root):
+            subdirs.sort()
+            if os.path.basename(directory) in ("cur", "new"):
+                for name in files:
+                    if not name.startswith("."):
+                        yield os.path.join(directory, name)
+
+    def messages(self, position: Optional[str]) -> Iterator[Tuple[Job, str, int]]:
+        for path in self.files:
+            # Sorted order: everything up to the checkpoint is done
+            if position is not None and path <= position:
+                continue
+            with open(path, "rb") as f:
+                raw = f.read()
+            yield (path, raw), path, len(raw)
+
+    def consumed_before(self, position: Optional[str]) -> int:
+        if position is None:
+            return 0
+        return sum(os.path.getsize(p) for p in self.files if p <= position)
+
+
+def open_source(path: str):
+    if os.path.isdir(path):
+        return MaildirSource(path)
+    return MboxSource(path)
+
+
+# --------------------------------------------------
+# WORKER
+# --------------------------------------------------
+_server = None
+
+
+def init_worker():
+    """Pool initializer: builds the engines (imports server) once per worker."""
+    global _server
+    import server
+    _server = server
+
+
+def scan_chunk(jobs: List[Job]) -> List[Dict]:
+    """Runs in a pool worker: parse + pipeline for every message."""
+    if _server is None:
+        init_worker()
+    server = _server
+
+    lines = []
+    for source, raw in jobs:
+        try:
+            message = RawEmail(raw)
+            subject = message.header("subject")
+            body = message.text()
+            content = f"{subject}\n{body}" if subject else body
+            result = server.run_analysis(content, "email", None, message.engine_headers() or None)
+            lines.append({
+                "source": source,
+                "from": message.header("from"),
+                "subject": subject,
+                "received_hops": len(message.received_hops),
+                **result
+            })
+        except Exception as e:
+            lines.append({"source": source, "error": str(e)})
+    return lines
+
+
+# --------------------------------------------------
+# CHECKPOINT
+# --------------------------------------------------
+class Checkpoint:
+    """JSON sidecar, replaced atomically after every written chunk."""
+
+    def __init__(self, path: str, source):
+        self.path = path
+        self.source = source
+
+    def load(self) -> Tuple[Optional[object], int, Optional[int]]:
+        """(position, messages already written, output bytes) for this input, if any."""
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None, 0, None
+        if state.get("input") != os.path.abspath(self.source.path) or state.get("kind") != self.source.kind:
+            return None, 0, None
+        return state.get("position"), state.get("messages", 0), state.get("output_bytes")
+
+    def save(self, position, messages: int, output_bytes: int):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({
+                "input": os.path.abspath(self.source.path),
+                "kind": self.source.kind,
+                "position": position,
+                "messages": messages,
+                "output_bytes": output_bytes,
+                "updated": time.time()
+            }, f)
+        os.replace(tmp, self.path)
+
+
+# --------------------------------------------------
+# SCANNER
+# --------------------------------------------------
+class MailboxScanner:
+    def __init__(self, source, output: str, checkpoint: Checkpoint, workers: int, chunk_size: int):
+        self.source = source
+        self.output = output
+        self.checkpoint = checkpoint
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.messages = 0
+        self.bytes = 0
+        self.resumed_bytes = 0
+        self.phishing = 0
+        self.errors = 0
+
+    def _chunks(self, position) -> Iterator[Tuple[List[Job], object, int]]:
+        chunk: List[Job] = []
+        size = 0
+        for job, after, consumed in self.source.messages(position):
+            chunk.append(job)
+            size += consumed
+            if len(chunk) == self.chunk_size:
+                yield chunk, after, size
+                chunk, size = [], 0
+        if chunk:
+            yield chunk, after, size
+
+    def _open_output(self, position, output_bytes: Optional[int]):
+        """
+        The output file positioned where the checkpoint left it: lines
+        flushed after the checkpoint was saved are cut off.
+        """
+        if position is None:
+            return open(self.output, "wb")
+        out = open(self.output, "r+b" if os.path.exists(self.output) else "wb")
+        if output_bytes is None:
+            # Checkpoint from an older scanner: append as it did
+            out.seek(0, os.SEEK_END)
+            return out
+        if out.seek(0, os.SEEK_END) < output_bytes:
+            out.close()
+            raise RuntimeError(
+                f"{self.output} is shorter than its checkpoint ({output_bytes} bytes); "
+                "rerun with --restart"
+            )
+        out.truncate(output_bytes)
+        out.seek(output_bytes)
+        return out
+
+    def run(self, restart: bool = False) -> int:
+        position, written, output_bytes = (None, 0, None) if restart else self.checkpoint.load()
+        if position is not None:
+            print(f"↩️  Resuming after {written} messages (checkpoint: {position})", file=sys.stderr)
+        self.messages = written
+        self.bytes = self.resumed_bytes = self.source.consumed_before(position)
+
+        started = last_report = time.perf_counter()
+        # Bounded in-flight chunks: the reader never runs far ahead of the pool
+        pending: Deque[Tuple[Future, object, int]] = deque()
+
+        with self._open_output(position, output_bytes) as out, \
+                ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker) as pool:
+            def drain_one():
+                future, after, size = pending.popleft()
+                for line in future.result():
+                    if "error" in line:
+                        self.errors += 1
+                    elif line["verdict"] == "Phishing Detected":
+                        self.phishing += 1
+                    out.write(json.dumps(line).encode("utf-8") + b"\n")
+                    self.messages += 1
+                self.bytes += size
+                out.flush()
+                self.checkpoint.save(after, self.messages, out.tell())
+
+            for chunk, after, size in self._chunks(position):
+                pending.append((pool.submit(scan_chunk, chunk), after, size))
+                if len(pending) >= self.workers * 2:
+                    drain_one()
+                now = time.perf_counter()
+                if now - last_report >= PROGRESS_EVERY:
+                    self.report(now - started)
+                    last_report = now
+            while pending:
+                drain_one()
+
+        self.report(time.perf_counter() - started, final=True)
+        return 0 if not self.errors else 1
+
+    def report(self, elapsed: float, final: bool = False):
+        elapsed = max(elapsed, 1e-9)
+        print(
+            f"{'✅' if final else '⏱️ '} {self.messages} messages  "
+            f"{self.phishing} phishing  {self.errors} errors  "
+            f"{self.bytes / max(self.source.size, 1):6.1%} of input  "
+            f"{(self.bytes - self.resumed_bytes) / elapsed / 1e6:.2f} MB/s",
+            file=sys.stderr
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan an mbox file or Maildir tree offline")
+    parser.add_argument("input", help="mbox file or Maildir directory")
+    parser.add_argument("-o", "--output", default="scan_verdicts.ndjson")
+    parser.add_argument("--checkpoint", help="checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=64, help="messages per worker job")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        parser.error(f"No such file or directory: {args.input}")
+
+    source = open_source(args.input)
+    checkpoint = Checkpoint(args.checkpoint or args.output + ".checkpoint", source)
+    scanner = MailboxScanner(source, args.output, checkpoint, args.workers, args.chunk_size)
+    try:
+        return scanner.run(restart=args.restart)
+    except KeyboardInterrupt:
+        print(f"\n⏸️  Interrupted; rerun the same command to resume from {checkpoint.path}", file=sys.stderr)
+        return 130
+    except RuntimeError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Offline Training and Calibration
+Fits the fusion layer (and optionally the ML engine) from a labelled
+corpus, NumPy only. Engines are expensive and fusion is cheap, so the
+two steps are split: engines run ONCE per corpus and their per-engine
+scores are cached in a columnar .npz; retuning reads only that file.
+
+    # 1. (optional) train the ML engine's linear model
+    python backend_train.py train-ml corpus.ndjson -o backend/data/ml_model.npz
+    # 2. run every engine once (no early exit), cache the score columns
+    python backend_train.py extract corpus.ndjson -o scores.npz --workers 8
+    # 3. fit weights, calibration and thresholds -> versioned config (seconds)
+    python backend_train.py fit scores.npz -o backend/data/fusion_config.json
+
+Corpus: NDJSON, one {"content", "label", "mode"?, "email_headers"?} per
+line; label is 1/0, true/false or "phishing"/"scam" vs anything else.
+Engines run with the server's PIPELINE_PROFILE, which extract records.
+Re-run extract after changing engines, keyword lists or the ML model.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Workers run the pipeline directly: no executor pool inside the pool
+os.environ.setdefault("ENGINE_EXECUTOR", "inline")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from engines.fusion_config import HAS_URLS, Calibration, FusionConfig, engine_scores  # noqa: E402
+
+POSITIVE_LABELS = {"1", "true", "phishing", "scam", "malicious", "spam"}
+
+# Consensus rules tried by fit (None = no consensus rule)
+CONSENSUS_GRID = [None] + [
+    {"engine_score": float(score), "min_engines": engines, "forced_score": 95.0}
+    for score in (50, 60, 70, 80) for engines in (2, 3, 4)
+]
+URL_FLOOR_GRID = [None, 70.0]
+THRESHOLD_GRID = np.arange(5.0, 96.0, 1.0)
+
+
+# --------------------------------------------------
+# CORPUS
+# --------------------------------------------------
+def parse_label(value) -> int:
+    return int(str(value).strip().lower() in POSITIVE_LABELS)
+
+
+def read_corpus(path: str) -> Iterator[Dict]:
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if "content" not in item or "label" not in item:
+                raise ValueError(f"{path}:{number}: needs content and label")
+            yield item
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def split(labels: np.ndarray, validation: float, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Stratified (train rows, validation rows)."""
+    rng = np.random.default_rng(seed)
+    train, held = [], []
+    for label in (0, 1):
+        rows = rng.permutation(np.flatnonzero(labels == label))
+        cut = int(round(len(rows) * validation))
+        held.append(rows[:cut])
+        train.append(rows[cut:])
+    return np.sort(np.concatenate(train)), np.sort(np.concatenate(held))
+
+
+# --------------------------------------------------
+# EXTRACT: engines once -> score columns
+# --------------------------------------------------
+def extract_chunk(items: List[Dict]) -> List[Tuple[Dict[str, float], bool, bool]]:
+    """Runs in a pool worker: every engine, no early exit."""
+    import server
+
+    rows = []
+    for item in items:
+        run = server.PIPELINE.run(
+            item["content"], item.get("mode", "email"), item.get("email_headers"), early_exit=False
+        )
+        rows.append((engine_scores(run.results), bool(run.context.http_urls), run.stopped_by is not None))
+    return rows
+
+
+def _chunks(items: List[Dict], size: int) -> Iterator[List[Dict]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def extract(args) -> int:
+    items = list(read_corpus(args.corpus))
+    started = time.perf_counter()
+    rows = []
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for chunk_rows in pool.map(extract_chunk, _chunks(items, args.chunk_size)):
+            rows.extend(chunk_rows)
+            print(f"⏱️  {len(rows)}/{len(items)} messages", file=sys.stderr, end="\r")
+
+    columns = sorted({name for scores, _, _ in rows for name in scores})
+    index = {name: i for i, name in enumerate(columns)}
+    matrix = np.zeros((len(rows), len(columns)), dtype=np.float32)
+    for r, (scores, _, _) in enumerate(rows):
+        for name, score in scores.items():
+            matrix[r, index[name]] = score
+
+    np.savez_compressed(
+        args.output,
+        scores=matrix,
+        columns=np.asarray(columns, dtype=str),
+        has_urls=np.asarray([has for _, has, _ in rows], dtype=bool),
+        decisive=np.asarray([dec for _, _, dec in rows], dtype=bool),
+        labels=np.asarray([parse_label(item["label"]) for item in items], dtype=np.int8),
+        modes=np.asarray([item.get("mode", "email") for item in items], dtype=str),
+        profile=np.asarray(os.environ.get("PIPELINE_PROFILE", "core")),
+        corpus_sha256=np.asarray(file_digest(args.corpus))
+    )
+    print(
+        f"\n✅ {len(rows)} messages x {len(columns)} engine columns in "
+        f"{time.perf_counter() - started:.1f}s -> {args.output}",
+        file=sys.stderr
+    )
+    return 0
+
+
+# --------------------------------------------------
+# FIT: weights, calibration, thresholds
+# --------------------------------------------------
+def fit_logistic(x: np.ndarray, y: np.ndarray, l2: float, iterations: int = 50) -> Tuple[np.ndarray, float]:
+    """Newton / IRLS on a small dense matrix; returns (weights, bias)."""
+    design = np.hstack([x, np.ones((len(x), 1))])
+    theta = np.zeros(design.shape[1])
+    penalty = np.full(design.shape[1], l2)
+    penalty[-1] = 0.0  # bias is not regularized
+    for _ in range(iterations):
+        p = 1.0 / (1.0 + np.exp(-np.clip(design @ theta, -35.0, 35.0)))
+        gradient = design.T @ (p - y) + penalty * theta
+        hessian = (design * (p * (1 - p))[:, None]).T @ design + np.diag(penalty + 1e-9)
+        step = np.linalg.solve(hessian, gradient)
+        theta -= step
+        if np.abs(step).max() < 1e-8:
+            break
+    return theta[:-1], float(theta[-1])
+
+
+def fit_platt(margin: np.ndarray, y: np.ndarray) -> Calibration:
+    # Platt's smoothed targets keep a separable set from diverging
+    positives, negatives = y.sum(), len(y) - y.sum()
+    targets = np.where(y == 1, (positives + 1) / (positives + 2), 1 / (negatives + 2))
+    (a,), b = fit_logistic(margin[:, None], targets, l2=0.0)
+    return Calibration("platt", a=float(a), b=b)
+
+
+def fit_isotonic(margin: np.ndarray, y: np.ndarray) -> Calibration:
+    """Pool-adjacent-violators; knots at the mean margin of each block."""
+    order = np.argsort(margin, kind="stable")
+    blocks: List[List[float]] = []  # [sum y, count, sum margin]
+    for m, target in zip(margin[order], y[order]):
+        blocks.append([float(target), 1.0, float(m)])
+        while len(blocks) > 1 and blocks[-2][0] / blocks[-2][1] >= blocks[-1][0] / blocks[-1][1]:
+            total, count, margins = blocks.pop()
+            blocks[-1][0] += total
+            blocks[-1][1] += count
+            blocks[-1][2] += margins
+    x = [margins / count for _, count, margins in blocks]
+    p = [total / count for total, count, _ in blocks]
+    if len(x) < 2:
+        x, p = [x[0] - 1.0, x[0] + 1.0], [p[0], p[0]]
+    return Calibration("isotonic", x=x, y=p)
+
+
+def final_scores(config: FusionConfig, data: Dict[str, np.ndarray], rows: np.ndarray) -> np.ndarray:
+    """What _finalize would score for each row (consensus per engine column)."""
+    raw = data["scores"][rows]
+    has_urls = data["has_urls"][rows]
+    scores = raw.max(axis=1) if raw.shape[1] else np.zeros(len(rows))
+    if config.trained:
+        fused = config.probability(feature_matrix(data, rows, config.columns)) * 100.0
+        scores = np.where(data["decisive"][rows], scores, fused)
+    if config.url_floor is not None:
+        scores = np.where(has_urls & (scores < config.url_floor), config.url_floor, scores)
+    if config.consensus is not None:
+        agree = (raw >= config.consensus["engine_score"]).sum(axis=1) >= config.consensus["min_engines"]
+        scores = np.where(agree, config.consensus["forced_score"], scores)
+    return scores
+
+
+def feature_matrix(data: Dict[str, np.ndarray], rows: np.ndarray, columns: List[str]) -> np.ndarray:
+    """Score columns / 100 plus has_urls, in config column order."""
+    index = {name: i for i, name in enumerate(data["columns"].tolist())}
+    x = np.zeros((len(rows), len(columns)))
+    for j, name in enumerate(columns):
+        if name == HAS_URLS:
+            x[:, j] = data["has_urls"][rows]
+        elif name in index:
+            x[:, j] = data["scores"][rows, index[name]] / 100.0
+    return x
+
+
+def classification_metrics(predicted: np.ndarray, labels: np.ndarray) -> Dict[str, float]:
+    tp = int((predicted & (labels == 1)).sum())
+    fp = int((predicted & (labels == 0)).sum())
+    fn = int((~predicted & (labels == 1)).sum())
+    tn = int((~predicted & (labels == 0)).sum())
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {
+        "precision": round(precision, 4),
+        "recall": round(recall, 4),
+        "f1": round(f1, 4),
+        "false_positive_rate": round(fp / (fp + tn), 4) if fp + tn else 0.0,
+        "accuracy": round((tp + tn) / max(len(labels), 1), 4)
+    }
+
+
+def _objective(metrics: Dict[str, float], target_precision: Optional[float]) -> Tuple[float, float]:
+    if target_precision is None:
+        return metrics["f1"], metrics["precision"]
+    if metrics["precision"] < target_precision:
+        return -1.0, metrics["precision"]
+    return metrics["recall"], metrics["precision"]
+
+
+def fit(args) -> int:
+    started = time.perf_counter()
+    with np.load(args.scores, allow_pickle=False) as archive:
+        data = {name: archive[name] for name in archive.files}
+    labels = data["labels"].astype(np.int64)
+    if labels.min() == labels.max():
+        print("❌ The corpus needs both phishing and safe examples", file=sys.stderr)
+        return 1
+
+    columns = data["columns"].tolist() + [HAS_URLS]
+    train, held = split(labels, args.validation, args.seed)
+    # Decisive runs keep their score at serving time: fit on the rest
+    fused_train = train[~data["decisive"][train]]
+    fused_held = held[~data["decisive"][held]]
+
+    weights, bias = fit_logistic(
+        feature_matrix(data, fused_train, columns), labels[fused_train].astype(float), args.l2
+    )
+    margin = feature_matrix(data, fused_held, columns) @ weights + bias
+    fit_calibration = fit_isotonic if args.calibration == "isotonic" else fit_platt
+    calibration = fit_calibration(margin, labels[fused_held].astype(float))
+
+    # Thresholds: grid over URL floor x consensus rule x verdict cut-off
+    best, best_key = None, None
+    held_labels = labels[held]
+    for floor in URL_FLOOR_GRID:
+        for consensus in CONSENSUS_GRID:
+            config = FusionConfig(columns, weights, bias, calibration, url_floor=floor, consensus=consensus)
+            scores = final_scores(config, data, held)
+            for threshold in THRESHOLD_GRID:
+                metrics = classification_metrics(scores >= threshold, held_labels)
+                # Ties: prefer the cut-off nearest the middle of the scale
+                key = _objective(metrics, args.target_precision) + (-abs(threshold - 50.0),)
+                if best_key is None or key > best_key:
+                    best_key = key
+                    best = (floor, consensus, float(threshold), metrics)
+
+    floor, consensus, threshold, metrics = best
+    builtin = FusionConfig()
+    baseline = classification_metrics(final_scores(builtin, data, held) >= builtin.phishing_threshold, held_labels)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    config = FusionConfig(
+        columns, weights, bias, calibration,
+        phishing_threshold=threshold,
+        url_floor=floor,
+        consensus=consensus,
+        version=f"{stamp}-{str(data['corpus_sha256'])[:8]}",
+        metrics={
+            "validation": metrics,
+            "builtin_rules": baseline,
+            "rows": {"train": int(len(train)), "validation": int(len(held))},
+            "profile": str(data["profile"]),
+            "calibration": args.calibration
+        }
+    )
+    config.save(args.output)
+
+    print(f"✅ fusion config {config.version} -> {args.output} ({time.perf_counter() - started:.2f}s)", file=sys.stderr)
+    print(f"   threshold {threshold:g}  url floor {floor}  consensus {consensus}", file=sys.stderr)
+    print(f"   validation {metrics}", file=sys.stderr)
+    print(f"   built-in   {baseline}", file=sys.stderr)
+    return 0
+
+
+# --------------------------------------------------
+# TRAIN-ML: the ML engine's hashed linear model
+# --------------------------------------------------
+def train_ml(args) -> int:
+    import server  # noqa: F401  (registers every keyword group the engines use)
+    from engines.keyword_registry import KEYWORDS
+    from engines.ml_features import FeatureExtractor, LinearModel
+    from engines.url_features import tokenize_urls
+
+    started = time.perf_counter()
+    items = list(read_corpus(args.corpus))
+    labels = np.asarray([parse_label(item["label"]) for item in items], dtype=np.int64)
+    extractor = FeatureExtractor(1 << args.bits)
+    batch = extractor.transform(
+        (item["content"], KEYWORDS.scan(item["content"].lower()), tokenize_urls(item["content"]))
+        for item in items
+    )
+    train, held = split(labels, args.validation, args.seed)
+
+    # Mini-batch AdaGrad over the sparse rows (X.T @ residual via rdot)
+    rng = np.random.default_rng(args.seed)
+    weights = np.zeros(extractor.dim)
+    squared = np.full(extractor.dim, 1e-8)
+    bias, bias_squared = 0.0, 1e-8
+    for _ in range(args.epochs):
+        order = rng.permutation(train)
+        for start in range(0, len(order), args.batch_size):
+            rows = order[start:start + args.batch_size]
+            part = batch.take(rows)
+            p = 1.0 / (1.0 + np.exp(-np.clip(part.dot(weights) + bias, -35.0, 35.0)))
+            residual = p - labels[rows]
+            gradient = part.rdot(residual) / len(rows) + args.l2 * weights
+            squared += gradient * gradient
+            weights -= args.lr * gradient / np.sqrt(squared)
+            bias_gradient = residual.mean()
+            bias_squared += bias_gradient * bias_gradient
+            bias -= args.lr * bias_gradient / np.sqrt(bias_squared)
+
+    model = LinearModel(weights.astype(np.float32), bias, extractor.char_ngrams)
+    model.save(args.output)
+    probability = model.predict_proba(batch.take(held))
+    metrics = classification_metrics(probability >= 0.5, labels[held])
+    print(f"✅ ML model -> {args.output} ({time.perf_counter() - started:.1f}s)", file=sys.stderr)
+    print(f"   validation {metrics}", file=sys.stderr)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline training for the fusion layer and ML engine")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("extract", help="run every engine once, cache score columns")
+    p.add_argument("corpus", help="labelled NDJSON corpus")
+    p.add_argument("-o", "--output", default="engine_scores.npz")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    p.add_argument("--chunk-size", type=int, default=64, help="messages per worker job")
+    p.set_defaults(handler=extract)
+
+    p = commands.add_parser("fit", help="fit fusion weights, calibration and thresholds")
+    p.add_argument("scores", help="columns file written by extract")
+    p.add_argument("-o", "--output", default=os.path.join("backend", "data", "fusion_config.json"))
+    p.add_argument("--calibration", choices=("platt", "isotonic"), default="platt")
+    p.add_argument("--validation", type=float, default=0.25, help="held-out fraction")
+    p.add_argument("--l2", type=float, default=1e-2)
+    p.add_argument("--target-precision", type=float, help="maximize recall at this precision (default: best F1)")
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(handler=fit)
+
+    p = commands.add_parser("train-ml", help="train the ML engine's linear model")
+    p.add_argument("corpus", help="labelled NDJSON corpus")
+    p.add_argument("-o", "--output", default=os.path.join("backend", "data", "ml_model.npz"))
+    p.add_argument("--bits", type=int, default=18, help="hashed feature space is 2^bits")
+    p.add_argument("--epochs", type=int, default=5)
+    p.add_argument("--batch-size", type=int, default=256)
+    p.add_argument("--lr", type=float, default=0.5)
+    p.add_argument("--l2", type=float, default=1e-6)
+    p.add_argument("--validation", type=float, default=0.2, help="held-out fraction")
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(handler=train_ml)
+
+    args = parser.parse_args()
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,11 @@
+"""
+The backend runs from backend/ (engines, security and services are
+top-level packages there), so tests import it the same way.
+"""
+
+import os
+import sys
+
+BACKEND = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
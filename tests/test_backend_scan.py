@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+MBOX = b"".join(
+    b"From sender%d@example.com Mon Jan  1 00:00:0%d 2024\n"
+    b"Subject: message %d\n\nyour account is locked, verify now %d\n\n" % (i, i, i, i)
+    for i in range(4)
+)
+
+
+@pytest.fixture
+def scan(tmp_path, monkeypatch):
+    monkeypatch.setenv("ENGINE_EXECUTOR", "inline")
+    import backend_scan
+
+    mbox = tmp_path / "export.mbox"
+    mbox.write_bytes(MBOX)
+    output = tmp_path / "out.ndjson"
+    saves = []
+
+    class Recording(backend_scan.Checkpoint):
+        def save(self, position, messages, output_bytes):
+            saves.append((position, messages, output_bytes))
+            super().save(position, messages, output_bytes)
+
+    def run(restart=False):
+        source = backend_scan.open_source(str(mbox))
+        checkpoint = Recording(str(output) + ".checkpoint", source)
+        return backend_scan.MailboxScanner(source, str(output), checkpoint, 1, 1).run(restart)
+
+    return run, output, saves
+
+
+def test_resume_truncates_lines_written_after_the_checkpoint(scan):
+    run, output, saves = scan
+    run()
+    complete = output.read_bytes()
+    assert [json.loads(line)["subject"] for line in complete.splitlines()] == [
+        f"message {i}" for i in range(4)
+    ]
+    assert saves[-1][2] == len(complete)
+
+    # Crash after two chunks were flushed but only the first was checkpointed
+    position, messages, output_bytes = saves[0]
+    json.dump({"input": str(output.parent / "export.mbox"), "kind": "mbox",
+               "position": position, "messages": messages, "output_bytes": output_bytes},
+              open(str(output) + ".checkpoint", "w"))
+    output.write_bytes(complete[:saves[1][2]] + b'{"partial')
+
+    run()
+    assert output.read_bytes() == complete
+
+
+def test_output_shorter_than_checkpoint_is_refused(scan):
+    run, output, saves = scan
+    run()
+    output.write_bytes(b"")
+    with pytest.raises(RuntimeError):
+        run()
+    run(restart=True)
+    assert len(output.read_bytes().splitlines()) == 4
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+
+@pytest.fixture
+def client(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import server
+    from security.rate_limit import MemoryRateStore
+    from services.campaigns import CampaignIndex
+
+    async def run(fn, *args, wait=False):
+        return fn(*args)
+
+    monkeypatch.setattr(server.EXECUTOR, "run", run)
+    monkeypatch.setattr(server.limiter, "store", MemoryRateStore())
+    monkeypatch.setattr(server, "CAMPAIGNS", CampaignIndex())
+    monkeypatch.setattr(server, "BATCH_CHUNK_SIZE", 2)
+    monkeypatch.setattr(server, "BATCH_MAX_MESSAGES", 5)
+    server.CACHE.clear()
+    yield TestClient(server.app)
+    server.CACHE.clear()
+
+
+SCAM = "congratulations winner! pay a small fee to claim your prize"
+NOTE = "see you at lunch tomorrow"
+
+
+def lines(response):
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_results_keep_input_order_with_per_item_errors(client):
+    messages = [
+        {"content": SCAM, "mode": "sms"},
+        {"content": 42},
+        {"content": NOTE},
+        {"content": SCAM, "mode": "sms"},  # duplicate in another chunk
+        {"content": NOTE, "mode": 7},
+    ]
+    results = lines(client.post("/api/analyze/batch", json={"messages": messages}))
+
+    assert [r["index"] for r in results] == [0, 1, 2, 3, 4]
+    assert results[0]["verdict"] == results[3]["verdict"] == "Phishing Detected"
+    assert results[2]["verdict"] == "Likely Safe"
+    assert results[1] == {"error": "content must be a string", "index": 1}
+    assert results[4] == {"error": "mode must be a string", "index": 4}
+    assert "timestamp" in results[0] and "timestamp" not in results[1]
+
+
+def test_ndjson_upload_and_message_limit(client):
+    body = "\n".join(
+        [json.dumps({"content": f"{NOTE} #{i}"}) for i in range(3)]
+        + ["{not json"]
+        + [json.dumps({"content": f"{NOTE} #{i}"}) for i in range(3, 6)]
+    )
+    results = lines(client.post(
+        "/api/analyze/batch", content=body, headers={"content-type": "application/x-ndjson"}
+    ))
+
+    # BATCH_MAX_MESSAGES = 5: the sixth message and beyond are ignored
+    assert [r.get("index") for r in results] == [0, 1, 2, 3, 4, None]
+    assert "error" in results[3]
+    assert results[-1]["error"].startswith("Batch limit of 5 messages reached")
+
+
+def test_unreadable_bodies_are_rejected(client):
+    assert client.post("/api/analyze/batch", json={"items": []}).status_code == 422
+    bad = client.post("/api/analyze/batch", content="{", headers={"content-type": "application/json"})
+    assert bad.status_code == 400
+    assert lines(client.post("/api/analyze/batch", json={"messages": []})) == []
@@ -0,0 +1,77 @@
+from services.campaigns import CampaignIndex
+
+BODY = "your parcel is held at the depot pay the customs fee at http://track.example/x today"
+RESULT = {"risk_score": 95, "verdict": "Phishing Detected", "summary": {}}
+HOSTS = frozenset({"track.example"})
+
+
+def test_near_duplicate_reuses_verdict():
+    index = CampaignIndex(threshold=0.6)
+    campaign = index.add(BODY, "sms", HOSTS, RESULT)
+
+    # Different tracking number / amount: digits are masked
+    match = index.lookup(BODY.replace("today", "today 4471"), "sms", HOSTS)
+    assert match is not None
+    assert match.campaign_id == campaign
+    assert match.result is RESULT
+    assert match.size == 2
+
+
+def test_scope_hosts_and_unrelated_text_do_not_match():
+    index = CampaignIndex()
+    index.add(BODY, "sms", HOSTS, RESULT)
+    assert index.lookup(BODY, "email", HOSTS) is None
+    assert index.lookup(BODY, "sms", frozenset({"other.example"})) is None
+    assert index.lookup("lunch tomorrow at noon with the whole team in the usual place", "sms", HOSTS) is None
+
+
+def test_short_messages_are_not_indexed_and_clear_empties():
+    index = CampaignIndex()
+    assert index.add("too short", "sms", HOSTS, RESULT) is None
+    index.add(BODY, "sms", HOSTS, RESULT)
+    index.clear()
+    assert index.lookup(BODY, "sms", HOSTS) is None
+    assert index.stats()["indexed"] == 0
+
+
+def test_safe_verdicts_are_never_reused():
+    index = CampaignIndex(threshold=0.6)
+    safe = dict(RESULT, risk_score=0, verdict="Likely Safe")
+    assert index.add(BODY, "sms", HOSTS, safe) is None
+    assert index.lookup(BODY, "sms", HOSTS) is None
+    assert index.stats()["indexed"] == 0
+
+
+NOTE = (
+    "hi team, notes from the thursday planning meeting: the design review moves to "
+    "next week, anna owns the release checklist, the office will be closed on friday "
+    "afternoon for the move, and please add your holiday dates to the shared calendar "
+    "before the end of the month so we can plan cover for the support rota. thanks all"
+)
+LURE = " also reply with your otp urgently to verify your account login."
+
+
+def test_appended_lure_is_analysed_not_matched_to_a_safe_note(monkeypatch):
+    import asyncio
+
+    import server
+
+    async def run(fn, *args, wait=False):
+        return fn(*args)
+
+    monkeypatch.setattr(server.EXECUTOR, "run", run)
+    monkeypatch.setattr(server, "CAMPAIGNS", CampaignIndex())
+    server.CACHE.clear()
+
+    # Close enough that a reused verdict would have been served
+    index = CampaignIndex()
+    index.add(NOTE, "general", frozenset(), RESULT)
+    assert index.lookup(NOTE + LURE, "general", frozenset()) is not None
+
+    first = asyncio.run(server._analyze_one(NOTE, "general", None))
+    assert first["verdict"] == "Likely Safe"
+    lured = asyncio.run(server._analyze_one(NOTE + LURE, "general", None))
+    assert "campaign_id" not in lured["summary"]
+    alone = server.run_analysis(NOTE + LURE, "general")
+    assert lured["risk_score"] == alone["risk_score"]
+    assert lured["verdict"] == alone["verdict"] == "Phishing Detected"
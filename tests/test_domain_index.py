@@ -0,0 +1,66 @@
+from engines.domain_index import DOMAINS, DomainSet, LabelTrie, PublicSuffixList
+
+PSL = DOMAINS.psl
+
+
+def test_plain_and_multi_label_suffixes():
+    assert PSL.public_suffix("www.example.co.uk") == "co.uk"
+    assert PSL.registrable_domain("www.example.co.uk") == "example.co.uk"
+    assert PSL.registrable_domain("login.paypal.com") == "paypal.com"
+    assert PSL.registrable_domain("co.uk") == ""
+
+
+def test_wildcard_and_exception_rules():
+    # *.ck with !www.ck
+    assert PSL.registrable_domain("shop.example.ck") == "shop.example.ck"
+    assert PSL.registrable_domain("www.ck") == "www.ck"
+    # *.kawasaki.jp with !city.kawasaki.jp
+    assert PSL.public_suffix("a.b.kawasaki.jp") == "b.kawasaki.jp"
+    assert PSL.registrable_domain("city.kawasaki.jp") == "city.kawasaki.jp"
+
+
+def test_private_section_and_unknown_tld():
+    assert PSL.registrable_domain("user.github.io") == "user.github.io"
+    assert PSL.public_suffix("host.notatld") == "notatld"
+
+
+def test_small_psl_rules():
+    psl = PublicSuffixList(["com", "*.test", "!keep.test"])
+    assert psl.registrable_domain("a.b.test") == "a.b.test"
+    assert psl.registrable_domain("x.keep.test") == "keep.test"
+
+
+def test_label_trie_matches_domain_and_parents():
+    trie = LabelTrie([".tk", "bit.ly"])
+    assert "evil.tk" in trie
+    assert "bit.ly" in trie and "x.bit.ly" in trie
+    assert "notbit.ly" not in trie
+
+
+def test_domain_set_hosts_lines_and_parents():
+    domains = DomainSet(["# comment", "0.0.0.0 Evil.Example", "bad.test."])
+    assert "evil.example" in domains
+    assert "a.b.evil.example" in domains
+    assert "bad.test" in domains
+    assert "example" not in domains
+    assert len(domains) == 2
+
+
+def test_domain_set_digests_are_stable_across_processes(tmp_path):
+    import pickle
+    import subprocess
+    import sys
+
+    domains = DomainSet(["evil.example"])
+    path = tmp_path / "set.pkl"
+    path.write_bytes(pickle.dumps(domains))
+    script = (
+        "import pickle, sys; sys.path.insert(0, sys.argv[2]);"
+        "print('a.evil.example' in pickle.load(open(sys.argv[1], 'rb')))"
+    )
+    from tests.conftest import BACKEND
+    out = subprocess.run(
+        [sys.executable, "-c", script, str(path), BACKEND],
+        env={"PYTHONHASHSEED": "12345"}, capture_output=True, text=True, check=True
+    )
+    assert out.stdout.strip() == "True"
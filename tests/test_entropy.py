@@ -0,0 +1,47 @@
+import math
+import random
+
+import pytest
+
+from engines import entropy
+from engines.entropy import entropy_batch, entropy_many, shannon_entropy
+
+
+def reference(s):
+    """The textbook definition, one probability per distinct character."""
+    return -sum((s.count(c) / len(s)) * math.log2(s.count(c) / len(s)) for c in set(s)) if s else 0.0
+
+
+def test_scalar_matches_the_definition():
+    for s in ["", "a", "aaaa", "ab", "abcd", "paypa1-secure.tk", "ключ-ключ", "x\U0001F600y"]:
+        assert shannon_entropy(s) == pytest.approx(reference(s), abs=1e-12)
+    assert shannon_entropy("abcd") == pytest.approx(2.0)
+
+
+def test_batch_equals_scalar():
+    rng = random.Random(5)
+    alphabet = "abcxyz0189-./?=_ДЖя\U0001F600"
+    strings = ["", "a", "zz"] + [
+        "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 80))) for _ in range(300)
+    ]
+    batch = entropy_batch(strings)
+    assert batch.shape == (len(strings),)
+    for s, value in zip(strings, batch):
+        assert value == pytest.approx(shannon_entropy(s), abs=1e-9)
+
+
+def test_batch_edge_cases():
+    assert entropy_batch([]).shape == (0,)
+    assert entropy_batch([""]).tolist() == [0.0]
+    assert entropy_batch(["a"]).tolist() == [0.0]
+    assert entropy_batch(["", "a", ""]).tolist() == [0.0, 0.0, 0.0]
+    # The same character in neighbouring strings is counted per string
+    assert entropy_batch(["ab", "ba", "aa"]).tolist() == pytest.approx([1.0, 1.0, 0.0])
+
+
+def test_entropy_many_agrees_on_both_paths(monkeypatch):
+    strings = ["", "a", "/login/verify", "xn--80ak6aa92e"]
+    small = entropy_many(strings)
+    monkeypatch.setattr(entropy, "BATCH_MIN_CHARS", 0)
+    assert entropy_many(strings) == pytest.approx(small, abs=1e-9)
+    assert all(isinstance(v, float) for v in small)
@@ -0,0 +1,89 @@
+import asyncio
+import os
+import threading
+
+import pytest
+
+from services.executor import EngineExecutor, ExecutorBusy
+
+
+def where() -> tuple:
+    return os.getpid(), threading.current_thread().name
+
+
+def run_on(executor: EngineExecutor):
+    async def run():
+        try:
+            return await executor.run(where)
+        finally:
+            executor.shutdown()
+
+    return asyncio.run(run())
+
+
+def test_inline_runs_on_the_calling_thread():
+    executor = EngineExecutor("inline")
+    assert run_on(executor) == (os.getpid(), threading.current_thread().name)
+    assert executor._pool is None
+
+
+def test_thread_mode_runs_on_engine_threads():
+    pid, thread = run_on(EngineExecutor("thread", workers=2))
+    assert pid == os.getpid()
+    assert thread.startswith("engine")
+
+
+def test_process_mode_runs_in_worker_processes():
+    pid, _ = run_on(EngineExecutor("process", workers=1))
+    assert pid != os.getpid()
+
+
+def test_unknown_kind_is_rejected():
+    with pytest.raises(ValueError):
+        EngineExecutor("gpu")
+
+
+def test_full_executor_rejects_or_queues():
+    executor = EngineExecutor("thread", workers=1, max_pending=1)
+    release = threading.Event()
+
+    async def run():
+        first = asyncio.create_task(executor.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        assert executor.stats()["pending"] == 1
+
+        # Interactive requests are refused at once, batch jobs wait their turn
+        with pytest.raises(ExecutorBusy):
+            await executor.run(where)
+        queued = asyncio.create_task(executor.run(where, wait=True))
+        await asyncio.sleep(0.05)
+        assert not queued.done()
+
+        release.set()
+        assert await first is True
+        assert (await queued)[0] == os.getpid()
+
+    try:
+        asyncio.run(run())
+    finally:
+        executor.shutdown()
+    assert executor.stats()["rejected"] == 1
+    assert executor.stats()["pending"] == 0
+
+
+def test_executor_busy_maps_to_503(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import server
+    from security.rate_limit import MemoryRateStore
+
+    async def busy(fn, *args, wait=False):
+        raise ExecutorBusy("8 engine jobs pending")
+
+    monkeypatch.setattr(server.EXECUTOR, "run", busy)
+    monkeypatch.setattr(server.limiter, "store", MemoryRateStore())
+
+    response = TestClient(server.app).post("/api/analyze", json={"content": "hello", "mode": "sms"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert response.json() == {"error": "Analysis queue full, retry shortly"}
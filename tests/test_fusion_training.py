@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+from backend_train import final_scores, fit_isotonic, fit_logistic
+from engines.fusion_config import HAS_URLS, Calibration, FusionConfig
+
+COLUMNS = np.array(["Hard Rules", "NLP"])
+
+
+def corpus(scores, has_urls=None, decisive=None):
+    scores = np.asarray(scores, dtype=np.float64)
+    n = len(scores)
+    return {
+        "columns": COLUMNS,
+        "scores": scores,
+        "has_urls": np.asarray(has_urls if has_urls is not None else [False] * n),
+        "decisive": np.asarray(decisive if decisive is not None else [False] * n),
+    }
+
+
+def test_fit_logistic_separates_and_orders_features():
+    rng = np.random.default_rng(7)
+    x = rng.random((400, 2))
+    y = (x[:, 0] > 0.5).astype(np.float64)
+    weights, bias = fit_logistic(x, y, l2=0.1)
+    assert weights[0] > 5.0 and abs(weights[1]) < weights[0] / 5
+    p = 1.0 / (1.0 + np.exp(-(x @ weights + bias)))
+    assert ((p > 0.5) == y.astype(bool)).mean() > 0.95
+
+
+def test_fit_logistic_l2_shrinks_weights():
+    x = np.array([[0.0], [0.2], [0.8], [1.0]])
+    y = np.array([0.0, 0.0, 1.0, 1.0])
+    (loose,), _ = fit_logistic(x, y, l2=0.01)
+    (tight,), _ = fit_logistic(x, y, l2=10.0)
+    assert 0.0 < tight < loose
+
+
+def test_fit_isotonic_is_monotone_and_pools_violators():
+    margin = np.array([-2.0, -1.0, 0.0, 1.0, 2.0, 3.0])
+    y = np.array([0.0, 1.0, 0.0, 0.0, 1.0, 1.0])
+    calibration = fit_isotonic(margin, y)
+    assert calibration.method == "isotonic"
+    assert list(calibration.y) == sorted(calibration.y)
+    # The 1 at -1.0 is pooled with the 0s after it: one block at 1/3
+    assert calibration.y[0] == 0.0 and calibration.y[1] == pytest.approx(1 / 3)
+    assert calibration(np.array([3.0]))[0] == 1.0
+
+    flat = fit_isotonic(np.array([0.0, 1.0]), np.array([1.0, 1.0]))
+    assert len(flat.x) == 2 and list(flat.y) == [1.0, 1.0]
+
+
+def test_config_save_load_round_trip(tmp_path):
+    config = FusionConfig(
+        columns=["Hard Rules", "NLP", HAS_URLS],
+        weights=[2.5, 1.0, 0.5],
+        bias=-1.5,
+        calibration=Calibration("isotonic", x=[-1.0, 0.0, 1.0], y=[0.0, 0.4, 1.0]),
+        phishing_threshold=64.0,
+        url_floor=None,
+        consensus=None,
+        version="2026-10-17",
+        metrics={"f1": 0.9},
+    )
+    path = str(tmp_path / "fusion.json")
+    config.save(path)
+    loaded = FusionConfig.load(path)
+    assert loaded.to_json() == config.to_json()
+    engines = [{"engine_name": "Hard Rules", "risk_score": 90}, {"engine_name": "NLP", "risk_score": 40}]
+    assert loaded.score(engines, True) == pytest.approx(config.score(engines, True))
+
+    with pytest.raises(ValueError):
+        FusionConfig.from_json({**config.to_json(), "format_version": 99})
+
+
+def test_final_scores_builtin_rules():
+    data = corpus([[40, 10], [65, 62], [20, 0]], has_urls=[False, False, True])
+    rows = np.arange(3)
+    scores = final_scores(FusionConfig(), data, rows)
+    # max score, consensus (2 engines >= 60 -> 95), URL floor 70
+    assert scores.tolist() == [40.0, 95.0, 70.0]
+
+    bare = FusionConfig(url_floor=None, consensus=None)
+    assert final_scores(bare, data, rows).tolist() == [40.0, 65.0, 20.0]
+
+
+def test_final_scores_fused_rows_and_decisive_passthrough():
+    config = FusionConfig(
+        columns=["Hard Rules", "NLP"], weights=[0.0, 0.0], bias=0.0,
+        url_floor=None, consensus=None
+    )
+    data = corpus([[95, 10], [95, 10]], decisive=[True, False])
+    scores = final_scores(config, data, np.arange(2))
+    # Decisive runs keep their score; fused rows get sigmoid(0) = 50
+    assert scores.tolist() == [95.0, 50.0]
+
+
+def test_consensus_vote_matches_the_offline_rule():
+    config = FusionConfig()
+    agree = [{"engine_name": "A", "risk_score": 60}, {"engine_name": "B", "risk_score": 75}]
+    assert config.consensus_vote(agree) == (True, 95.0, "Multiple engines agree on phishing")
+    assert config.consensus_vote(agree[:1]) == (False, None, None)
+    assert FusionConfig(consensus=None).consensus_vote(agree) == (False, None, None)
@@ -0,0 +1,52 @@
+from engines.idn import LabelInfo, char_script, decode_label, host_labels, skeleton, unicode_host
+
+
+def test_punycode_decoding():
+    assert decode_label("xn--80ak6aa92e") == "аррӏе"
+    assert decode_label("xn--mnchen-3ya") == "münchen"
+    assert decode_label("example") == "example"
+    assert unicode_host("www.xn--80ak6aa92e.com") == "www.аррӏе.com"
+
+    broken = LabelInfo("xn--zz-invalid-")
+    assert broken.bad_punycode and broken.suspicious
+    assert not LabelInfo("xn--mnchen-3ya").bad_punycode
+
+
+def test_host_labels_only_cover_idn_labels():
+    labels = host_labels("login.xn--80ak6aa92e.раураl.com")
+    assert [label.unicode for label in labels] == ["аррӏе", "раураl"]
+    assert host_labels("login.example.com") == ()
+    # Memoized: the same label is analysed once
+    assert host_labels("xn--80ak6aa92e.com")[0] is labels[0]
+
+
+def test_mixed_script_detection():
+    assert char_script("a") == "LATIN" and char_script("а") == "CYRILLIC"
+    assert char_script("-") == char_script("7") == "COMMON"
+
+    mixed = LabelInfo("pаypal")  # Cyrillic а
+    assert mixed.scripts == {"LATIN", "CYRILLIC"}
+    assert mixed.mixed_script and not mixed.whole_script_spoof
+
+    # Latin with Han / Kana is an allowed mix (UTS #39 highly restrictive)
+    assert not LabelInfo("sonyストア").mixed_script
+    assert not LabelInfo("münchen").suspicious
+    assert not LabelInfo("пример").suspicious  # genuine Cyrillic word
+
+
+def test_whole_script_spoof():
+    spoof = LabelInfo("раура")  # all Cyrillic, every letter a Latin look-alike
+    assert spoof.scripts == {"CYRILLIC"}
+    assert spoof.whole_script_spoof and not spoof.mixed_script
+    assert LabelInfo("xn--80ak6aa92e").whole_script_spoof
+
+
+def test_confusable_skeletons():
+    assert skeleton("раураl") == skeleton("paypal")
+    assert skeleton("PAYPA1") == skeleton("paypal")
+    assert skeleton("аррӏе") == skeleton("apple")
+    assert skeleton("rnicrosoft") == skeleton("microsoft")
+    assert skeleton("vvells") == skeleton("wells")
+    assert skeleton("ｇｏｏｇｌｅ") == skeleton("google")  # fullwidth, NFKC
+    assert skeleton("bánk") == skeleton("bank")
+    assert skeleton("bank") != skeleton("back")
@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+from engines.keyword_registry import KeywordAutomaton, KeywordRegistry
+
+PHRASES = ["he", "she", "his", "hers", "verify", "verify now", "act now", "now", "a", "aa", "otp"]
+
+
+def test_scan_matches_substring_semantics():
+    automaton = KeywordAutomaton(PHRASES)
+    rng = random.Random(1)
+    alphabet = "aehirsvyfotpcn w"
+    for _ in range(2000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        hits = automaton.scan(text)
+        for phrase in PHRASES:
+            assert (phrase in hits) == (phrase in text), (phrase, text)
+            if phrase in text:
+                assert hits.position(phrase) == text.index(phrase)
+
+
+def test_occurrences_reports_every_match():
+    automaton = KeywordAutomaton(["aa", "a"])
+    found = [(end, automaton.phrases[pid]) for end, pid in automaton.occurrences("aaa")]
+    assert sorted(found) == [(0, "a"), (1, "a"), (1, "aa"), (2, "a"), (2, "aa")]
+
+
+def test_registry_groups_and_live_handles():
+    registry = KeywordRegistry()
+    urgency = registry.register("t.urgency", ["Urgent", "act now"])
+    hits = registry.scan("please act now")
+    assert hits.matched(urgency) == ["act now"]
+    assert hits.any_of(urgency)
+
+    # Re-registering recompiles; the handle follows the new phrases
+    registry.register("t.urgency", ["immediately"])
+    assert not registry.scan("please act now").any_of(urgency)
+    assert registry.scan("reply immediately").count_of(urgency) == 1
+
+
+def test_registry_overrides_build_and_install():
+    registry = KeywordRegistry()
+    group = registry.register("t.money", ["pay"])
+    registry.install({"t.money": ("wire",)}, registry.build({"t.money": ("wire",)}))
+    assert list(group) == ["wire"]
+    assert registry.scan("wire it").any_of(group)
+    assert registry.builtin("t.money") == ("pay",)
+    with pytest.raises(ValueError):
+        registry.build({"t.unknown": ("x",)})
+
+
+def test_pinned_automaton_wins_over_installed():
+    registry = KeywordRegistry()
+    group = registry.register("t.pin", ["old"])
+    old = registry.compile()
+    with registry.pinned(old):
+        registry.install({"t.pin": ("new",)}, registry.build({"t.pin": ("new",)}))
+        assert registry.scan("old").any_of(group)
+    assert registry.scan("new").any_of(group)
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from engines.domain_index import DomainIndex, DomainSet
+from engines.lookalike_engine import BRAND_INDEX, BrandIndex, LookalikeEngine, osa_distance
+
+FOREIGN_SUFFIX = [
+    "paypal.xyz", "paypal.tk", "secure.paypal.top", "apple.ru", "gmail.co",
+    "chase.io", "netflix.support", "usps.info",
+]
+
+
+@pytest.mark.parametrize("host", FOREIGN_SUFFIX)
+def test_brand_on_a_foreign_suffix_is_a_combosquat(host):
+    matches = BRAND_INDEX.lookup(host)
+    assert [m.kind for m in matches] == ["combosquat"], matches
+
+
+@pytest.mark.parametrize("host", ["dhl-parcel-track.com", "usps-redelivery.com", "uspsredelivery.net",
+                                  "ebay-login.net", "hsbcsecure.com"])
+def test_short_brands_inside_longer_labels(host):
+    assert BRAND_INDEX.lookup(host), host
+
+
+@pytest.mark.parametrize("host", ["paypal.com", "www.paypal.com", "mail.google.com", "amazon.in",
+                                  "amazon.co.uk", "dhl.com", "example.com"])
+def test_official_and_unrelated_domains_do_not_match(host):
+    assert BRAND_INDEX.lookup(host) == []
+
+
+def test_homoglyph_and_typo_kinds():
+    assert BRAND_INDEX.lookup("paypa1.com")[0].kind == "homoglyph"
+    assert BRAND_INDEX.lookup("xn--pypal-4ve.com")[0].kind == "homoglyph"
+    assert BRAND_INDEX.lookup("paypak.com")[0].kind == "keyboard typo"
+    assert BRAND_INDEX.lookup("paypl.com")[0].kind == "typo"
+
+
+def test_allowlisted_domains_never_match(monkeypatch):
+    from engines import lookalike_engine
+    index = DomainIndex(lookalike_engine.DOMAINS.psl, allowlist=DomainSet(["paypal.tk"]))
+    monkeypatch.setattr(lookalike_engine, "DOMAINS", index)
+    assert BrandIndex(["paypal.com"]).lookup("paypal.tk") == []
+
+
+def test_osa_distance():
+    assert osa_distance("paypal", "paypla", 2) == 1  # transposition
+    assert osa_distance("paypal", "pal", 2) == 3     # over the limit
+
+
+def test_impersonation_reported_by_every_consumer():
+    import server
+    from engines.email_header_engine import EmailHeaderEngine
+    from engines.url_engine import URLEngine
+    from engines.url_features import url_features
+
+    assert "Brand impersonation: paypal" in server.url_engine("http://paypal.xyz/login").findings
+
+    findings = []
+    assert URLEngine()._check_lookalike(url_features("http://paypal.xyz/login"), findings) > 0
+
+    header_findings = []
+    EmailHeaderEngine()._check_sender_domain({"from": "service@paypal.tk"}, header_findings)
+    assert any("paypal" in f for f in header_findings)
+
+    result = asyncio.run(LookalikeEngine().analyze("see http://apple.ru/id", "general"))
+    assert result["risk_score"] > 0
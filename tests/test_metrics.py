@@ -0,0 +1,21 @@
+from services.metrics import verdict_bucket
+
+HARD_RULE = {"engine_name": "Advance Fee Scam Engine (Hard Rule)", "risk_score": 100}
+
+
+def test_bucket_follows_verdict_not_score():
+    # A fusion threshold below 70 flags a 60; one above 70 clears an 80
+    assert verdict_bucket({"verdict": "Phishing Detected", "risk_score": 60}) == "phishing"
+    assert verdict_bucket({"verdict": "Likely Safe", "risk_score": 80}) == "suspicious"
+
+
+def test_safe_verdicts_split_into_safe_and_suspicious():
+    assert verdict_bucket({"verdict": "Likely Safe", "risk_score": 10}) == "safe"
+    assert verdict_bucket({"verdict": "Likely Safe", "risk_score": 40}) == "suspicious"
+
+
+def test_hard_rule_phishing_is_scam():
+    result = {"verdict": "Phishing Detected", "risk_score": 100, "engine_results": [HARD_RULE]}
+    assert verdict_bucket(result) == "scam"
+    result["verdict"] = "Likely Safe"
+    assert verdict_bucket(result) == "suspicious"
@@ -0,0 +1,76 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from engines.keyword_registry import KEYWORDS
+from engines.ml_engine import MAX_SCORE, MLDetectionEngine
+from engines.ml_features import FeatureExtractor, LinearModel, load_model
+from engines.url_features import tokenize_urls
+
+PHISHING = [
+    "urgent: your account is suspended, verify your password at http://secure-login.xyz",
+    "confirm your bank details immediately or your card will be locked",
+    "your parcel is held, pay the customs fee now at http://parcel-fee.top",
+    "final notice: update your billing information within 24 hours",
+]
+HAM = [
+    "lunch at noon tomorrow? the usual place",
+    "here are the meeting notes from thursday, see you next week",
+    "happy birthday! hope you have a great day",
+    "the quarterly report is attached, thanks for the review",
+]
+
+
+def features(texts):
+    return [(t, KEYWORDS.scan(t.lower()), tokenize_urls(t)) for t in texts]
+
+
+@pytest.fixture(scope="module")
+def model_path(tmp_path_factory):
+    extractor = FeatureExtractor(1 << 12)
+    batch = extractor.transform(features(PHISHING + HAM))
+    labels = np.asarray([1.0] * len(PHISHING) + [0.0] * len(HAM))
+    weights, bias = np.zeros(extractor.dim), 0.0
+    for _ in range(200):
+        p = 1.0 / (1.0 + np.exp(-(batch.dot(weights) + bias)))
+        residual = p - labels
+        weights -= 0.5 * batch.rdot(residual) / len(labels)
+        bias -= 0.5 * residual.mean()
+    path = tmp_path_factory.mktemp("ml") / "model.npz"
+    LinearModel(weights.astype(np.float32), bias, extractor.char_ngrams).save(str(path))
+    return str(path)
+
+
+def test_saved_model_round_trips(model_path):
+    model = load_model(model_path)
+    assert model.dim == 1 << 12 and model.char_ngrams == (3, 5)
+    batch = model.extractor().transform(features(PHISHING))
+    again = load_model(model_path).predict_proba(batch)
+    assert np.array_equal(model.predict_proba(batch), again)
+
+
+def test_loaded_model_separates_training_messages(model_path):
+    engine = MLDetectionEngine(load_model(model_path))
+    scores = engine.score_batch(features(PHISHING + HAM))
+    assert scores[:len(PHISHING)].min() > 0.5 > scores[len(PHISHING):].max()
+
+
+def test_engine_scores_with_model_and_stays_capped(model_path):
+    engine = MLDetectionEngine(load_model(model_path))
+    result = asyncio.run(engine.analyze(PHISHING[0], "email"))
+    assert result["findings"][0].startswith("ML model: phishing probability")
+    assert 0 < result["risk_score"] <= MAX_SCORE
+
+
+def test_missing_or_incompatible_model_falls_back(tmp_path, monkeypatch):
+    assert load_model(str(tmp_path / "absent.npz")) is None
+    bad = tmp_path / "old.npz"
+    np.savez(bad, weights=np.ones(8, dtype=np.float32), bias=0.0, feature_version=0)
+    with pytest.raises(ValueError):
+        LinearModel.from_npz(str(bad))
+    monkeypatch.setenv("ML_MODEL_FILE", str(bad))
+    engine = MLDetectionEngine()
+    assert engine.model is None
+    result = asyncio.run(engine.analyze("please verify your account", "email"))
+    assert result["findings"][0].startswith("ML heuristic")
@@ -0,0 +1,78 @@
+import random
+import re
+
+import pytest
+
+from engines.pattern_bank import PatternBank, PatternRegistry, split_atoms
+
+RULES = [
+    ("click", r"\b(click|tap)\b.*\b(here|link)\b"),
+    ("deadline", r"within (\d+) (hour|minute|day)"),
+    ("otp", r"\b(otp|pin|code)\b"),
+    ("three", r"\bact\b.*\bnow\b.*\btoday\b"),
+]
+WORDS = ["click", "tap", "here", "link", "within", "2", "hour", "day", "otp", "pin", "code",
+         "act", "now", "today", "clicked", "xhere", "a", "."]
+
+
+def test_scan_agrees_with_re_search():
+    bank = PatternBank(RULES)
+    rng = random.Random(2)
+    for _ in range(3000):
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 15)))
+        hits = bank.scan(text)
+        for name, pattern in RULES:
+            assert (name in hits) == bool(re.search(pattern, text)), (name, text)
+
+
+def test_max_gap_bounds_distance_between_atoms():
+    bank = PatternBank([("click", r"\bclick\b.*\bhere\b")], max_gap=10)
+    assert "click" in bank.scan("click right here")
+    assert "click" not in bank.scan("click " + "x" * 50 + " here")
+
+
+def test_backtracking_constructs_are_rejected():
+    for pattern in (r"(?=a)b", r"(a)\1", r"(?P<x>a)(?P=x)"):
+        with pytest.raises(ValueError):
+            PatternBank([("bad", pattern)])
+
+
+def test_registry_groups_resolve_against_producing_bank():
+    registry = PatternRegistry()
+    group = registry.register("t.threat", [("legal", r"\blawsuit\b")])
+    assert registry.scan("a lawsuit").matched(group) == ["t.threat:legal"]
+    rules = registry.qualify("t.threat", [("police", r"\bpolice\b")])
+    registry.install({"t.threat": rules}, registry.build({"t.threat": rules}))
+    assert registry.scan("a lawsuit").count_of(group) == 0
+    assert registry.scan("the police").matched(group) == ["t.threat:police"]
+
+
+def test_split_atoms_only_on_top_level_unescaped_gaps():
+    assert split_atoms(r"\bclick\b.*\bhere\b") == (r"\bclick\b", r"\bhere\b")
+    assert split_atoms(r"a.*?b") == ("a", "b")
+    assert split_atoms(r"a\.*b") == (r"a\.*b",)
+    assert split_atoms(r"a\\.*b") == ("a\\\\", "b")
+    assert split_atoms(r"[.*]x") == (r"[.*]x",)
+    assert split_atoms(r"[].*]x.*y") == (r"[].*]x", "y")
+    # Ambiguous: kept whole and matched by plain re
+    for pattern in (r"(a.*b)c", r"a.*|b", r"a.*+b", r"a.*{2}b"):
+        assert split_atoms(pattern) == (pattern,)
+
+
+def test_escaped_and_ambiguous_rules_agree_with_re_search():
+    rules = [
+        ("dots", r"win\.*now"),
+        ("class", r"[.*]x"),
+        ("group", r"(pay.*now)!"),
+        ("alt", r"urgent.*act|reply"),
+        ("lazy", r"verify.*?account"),
+    ]
+    bank = PatternBank(rules)
+    words = ["win", "win..now", "winnow", "[.*]x", "*x", "pay", "now!", "urgent", "act",
+             "reply", "verify", "account", "x"]
+    rng = random.Random(3)
+    for _ in range(2000):
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(0, 8)))
+        hits = bank.scan(text)
+        for name, pattern in rules:
+            assert (name in hits) == bool(re.search(pattern, text)), (name, text)
@@ -0,0 +1,134 @@
+import pytest
+
+from engines.pipeline import EnginePipeline
+from engines.url_features import tokenize_urls
+
+
+def result(name, score):
+    return {"engine_name": name, "risk_score": score, "findings": [], "confidence": 0.5}
+
+
+def recording_pipeline(calls, scores, costs, decisive=None, depends=None):
+    pipeline = EnginePipeline(str.lower, tokenize_urls)
+    for name, cost in costs.items():
+        def run(context, upstream, name=name):
+            calls.append(name)
+            return result(name, scores.get(name, 0))
+        pipeline.register(
+            name, run, cost=cost,
+            depends_on=(depends or {}).get(name, ()),
+            decisive_at=(decisive or {}).get(name)
+        )
+    return pipeline
+
+
+def test_cheaper_engines_run_first_results_in_registration_order():
+    calls = []
+    pipeline = recording_pipeline(calls, {}, {"slow": 5, "cheap": 1, "medium": 2, "tie": 1})
+    run = pipeline.run("hello", "general")
+    assert calls == ["cheap", "tie", "medium", "slow"]
+    assert [r["engine_name"] for r in run.results] == ["slow", "cheap", "medium", "tie"]
+    assert {"engine:slow", "engine:cheap", "pipeline"} <= run.timings.keys()
+
+
+def test_dependencies_run_before_their_dependents():
+    calls = []
+    pipeline = recording_pipeline(
+        calls, {}, {"fusion": 0.5, "heavy": 3, "light": 1}, depends={"fusion": ("heavy",)}
+    )
+    pipeline.run("hello", "general")
+    assert calls == ["light", "heavy", "fusion"]
+
+    pipeline.register("orphan", lambda c, up: None, depends_on=("missing",))
+    with pytest.raises(ValueError):
+        pipeline.schedule()
+
+
+def test_decisive_engine_stops_the_run():
+    calls = []
+    pipeline = recording_pipeline(
+        calls, {"rule": 95}, {"expensive": 5, "rule": 1, "cheap": 0.5}, decisive={"rule": 95}
+    )
+    run = pipeline.run("hello", "general")
+    assert calls == ["cheap", "rule"]
+    assert run.stopped_by == "rule"
+    assert [r["engine_name"] for r in run.results] == ["rule", "cheap"]
+
+    # Offline runs keep going but still name the engine that would have stopped
+    calls.clear()
+    full = pipeline.run("hello", "general", early_exit=False)
+    assert calls == ["cheap", "rule", "expensive"]
+    assert full.stopped_by == "rule"
+
+
+def test_below_the_decisive_score_every_engine_runs():
+    calls = []
+    pipeline = recording_pipeline(
+        calls, {"rule": 94}, {"expensive": 5, "rule": 1}, decisive={"rule": 95}
+    )
+    run = pipeline.run("hello", "general")
+    assert calls == ["rule", "expensive"]
+    assert run.stopped_by is None
+
+
+def test_context_is_immutable_and_shared_across_engines():
+    seen = []
+    normalize_calls = []
+
+    def normalize(text):
+        normalize_calls.append(text)
+        return text.lower()
+
+    def engine(name):
+        def run(context, upstream):
+            seen.append(context)
+            assert context.normalized == "verify at http://a.tk/x"
+            assert [u.host for u in context.http_urls] == ["a.tk"]
+            return result(name, 0)
+        return run
+
+    pipeline = EnginePipeline(normalize, tokenize_urls)
+    pipeline.register("first", engine("first"))
+    pipeline.register("second", engine("second"))
+    run = pipeline.run("Verify at http://a.tk/x", "general", headers={"from": "a@b.c"})
+
+    context = run.context
+    assert seen == [context, context]
+    # Derived inputs are built once, however many engines read them
+    assert normalize_calls == ["Verify at http://a.tk/x"]
+    assert context.urls is context.urls
+    assert set(context.timings) >= {"normalize", "tokenize_urls"}
+
+    with pytest.raises(AttributeError):
+        context.content = "changed"
+    with pytest.raises(AttributeError):
+        del context.mode
+    with pytest.raises(TypeError):
+        context.headers["from"] = "x@y.z"
+
+
+def test_caller_inputs_are_not_recomputed():
+    def refuse(text):
+        raise AssertionError("recomputed")
+
+    pipeline = EnginePipeline(refuse, refuse)
+    pipeline.register("reader", lambda c, up: result("reader", len(c.urls) + len(c.normalized)))
+    urls = tokenize_urls("http://a.tk/x")
+    run = pipeline.run("http://a.tk/x", "general", normalized="n", urls=urls)
+    assert run.context.urls is urls
+    assert run.results[0]["risk_score"] == 2
+
+
+def test_core_and_full_profiles():
+    import server
+
+    core = server.build_pipeline("core").engine_names
+    assert core == [
+        "URL Intelligence", "Marketplace Scam", "Social Engineering",
+        "Advance Fee Scam (Hard Rule)", "Email Header Analysis",
+    ]
+    full = server.build_pipeline("full").engine_names
+    assert full[:len(core)] == core
+    assert {"Hard Rules", "NLP", "Intent", "Risk Fusion", "URL Intelligence (Senior)"} <= set(full)
+    with pytest.raises(ValueError):
+        server.build_pipeline("turbo")
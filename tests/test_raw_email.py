@@ -0,0 +1,107 @@
+from engines.raw_email import MboxSplitter, RawEmail, mbox_spans, unquote_mbox
+
+MBOX = (
+    b"From alice@example.com Mon Jan  1 00:00:00 2024\n"
+    b"Subject: one\n\nfirst body\n>From the quoted line\n\n"
+    b"From bob@example.com Mon Jan  1 00:00:01 2024\n"
+    b"Subject: two\n\nsecond body\n"
+)
+
+
+def split(chunks):
+    splitter = MboxSplitter()
+    out = []
+    for chunk in chunks:
+        out.extend(splitter.feed(chunk))
+    out.extend(splitter.finish())
+    return out
+
+
+def test_splitter_is_independent_of_chunking():
+    whole = split([MBOX])
+    assert len(whole) == 2
+    assert whole[0].startswith(b"Subject: one")
+    assert b"From the quoted line" in whole[0] and b">From" not in whole[0]
+    for size in (1, 3, 7, 64):
+        assert split([MBOX[i:i + size] for i in range(0, len(MBOX), size)]) == whole
+
+
+def test_mbox_spans_match_splitter():
+    spans = list(mbox_spans(MBOX))
+    assert [unquote_mbox(MBOX[s:e]) for s, e in spans] == split([MBOX])
+
+
+def test_raw_email_subject_and_text():
+    message = RawEmail(split([MBOX])[1])
+    assert message.header("subject") == "two"
+    assert "second body" in message.text()
+
+
+def test_server_parses_mbox_messages_in_executor_jobs(monkeypatch):
+    import asyncio
+
+    import server
+
+    jobs = []
+
+    async def run(fn, *args, wait=False):
+        jobs.append(fn.__name__)
+        return fn(*args)
+
+    class Upload:
+        async def stream(self):
+            for i in range(0, len(MBOX), 40):
+                yield MBOX[i:i + 40]
+
+    async def collect():
+        return [item async for item in server._mbox_items(Upload())]
+
+    monkeypatch.setattr(server.EXECUTOR, "run", run)
+    items = asyncio.run(collect())
+    assert [item["content"].split("\n")[0] for item in items] == ["one", "two"]
+    assert set(jobs) == {"_parse_emails"}
+    assert server._parse_email(split([MBOX])[0]) == (items[0], 0)
+
+
+SPOOFED = (
+    "".join(
+        f"Received: from relay{i}.mailer.ru (relay{i}.mailer.ru [10.0.0.{i}]) "
+        f"by mx{i}.example.net; Mon, 1 Jan 2024 00:00:{i:02d} +0000\n"
+        for i in range(12)
+    )
+    + "Authentication-Results: mx.example.net; spf=fail smtp.mailfrom=paypa1.com; dkim=fail; dmarc=fail\n"
+    "Return-Path: <bounce@mailer.ru>\n"
+    "From: PayPal Service <service@paypa1.com>\n"
+    "Subject: Statement\n\n"
+    "Your monthly statement is ready.\n"
+).encode()
+
+
+def test_spoofed_eml_is_flagged_by_the_default_profile(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import server
+
+    async def run(fn, *args, wait=False):
+        return fn(*args)
+
+    monkeypatch.setattr(server.EXECUTOR, "run", run)
+    server.CACHE.clear()
+    assert "Email Header Analysis" in server.PIPELINE.engine_names
+
+    response = TestClient(server.app).post(
+        "/api/analyze/email", content=SPOOFED, headers={"content-type": "message/rfc822"}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["verdict"] == "Phishing Detected"
+    assert body["summary"]["received_hops"] == 12
+    header = next(e for e in body["engine_results"] if e["engine_name"] == "Email Header Analysis")
+    assert "SPF authentication failed" in header["findings"]
+
+
+def test_header_engine_stays_out_of_non_email_results():
+    import server
+
+    names = [e["engine_name"] for e in server.run_analysis("hello there", "sms")["engine_results"]]
+    assert "Email Header Analysis" not in names
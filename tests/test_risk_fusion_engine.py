@@ -0,0 +1,32 @@
+from engines.fusion_config import FusionConfig
+from engines.risk_fusion_engine import RiskFusionEngine
+
+
+def verdict(threshold, score, malicious_intent=False):
+    config = FusionConfig(columns=["Scam Pattern"], weights=[1.0], phishing_threshold=threshold)
+    return RiskFusionEngine(config).calculate(score, {"malicious_intent": malicious_intent}, False)
+
+
+def test_builtin_bands_without_a_trained_config():
+    engine = RiskFusionEngine(FusionConfig())
+    assert engine.calculate(30, {}, False)["verdict"] == "Clean"
+    assert engine.calculate(35, {}, False)["verdict"] == "Suspicious"
+    assert engine.calculate(60, {}, False)["verdict"] == "Malicious"
+    assert engine.calculate(80, {}, False)["verdict"] == "Critical – Automated Scam"
+    # An untrained config's threshold does not move the built-in band
+    assert RiskFusionEngine(FusionConfig(phishing_threshold=75.0)).calculate(65, {}, False)["verdict"] == "Malicious"
+
+
+def test_malicious_band_follows_phishing_threshold():
+    assert verdict(70.0, 65)["verdict"] == "Suspicious"
+    assert verdict(70.0, 70)["verdict"] == "Malicious"
+    assert verdict(50.0, 55)["verdict"] == "Malicious"
+    assert verdict(85.0, 80)["verdict"] == "Suspicious"
+    assert verdict(85.0, 90)["verdict"] == "Critical – Automated Scam"
+
+
+def test_score_floors_do_not_depend_on_threshold():
+    for threshold in (50.0, 70.0, 85.0):
+        assert verdict(threshold, 10, malicious_intent=True)["final_risk_score"] == 70
+    assert verdict(20.0, 25)["verdict"] == "Malicious"
+    assert verdict(20.0, 10)["verdict"] == "Clean"
@@ -0,0 +1,94 @@
+import asyncio
+import json
+
+import pytest
+
+import engines.behavioral_engine  # noqa: F401  (registers the behavioral.* pattern groups)
+from engines.keyword_registry import KEYWORDS
+from engines.rule_packs import RuleManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    group = KEYWORDS.register("test_packs.money", ["pay"])
+    path = tmp_path / "pack.json"
+    path.write_text(json.dumps({"version": "v1"}))
+    rules = RuleManager(str(path), poll_seconds=0)
+    tlds = rules.register_domains("test.tlds", [".tk"])
+    rules.register_workflows({"w": {"stages": [["parcel"], ["held"]], "base_score": 30, "message": "m"}})
+    rules.load()
+    yield rules, path, group, tlds
+    # Leave the shared registries on their built-in rules
+    KEYWORDS.install({}, KEYWORDS.build({}))
+
+
+def reload(rules):
+    return asyncio.run(rules.reload())
+
+
+def test_swap_installs_every_section(manager):
+    rules, path, group, tlds = manager
+    assert rules.version == "v1"
+    assert "evil.zip" not in tlds
+
+    path.write_text(json.dumps({
+        "version": "v2",
+        "keywords": {"test_packs.money": {"add": ["wire"]}},
+        "domains": {"test.tlds": {"add": [".zip"]}},
+        "workflows": {"w": None, "x": {"stages": [["one time password"]], "base_score": 10, "message": "x"}},
+    }))
+    stats = reload(rules)
+    assert stats["version"] == "v2" and stats["reloads"] == 1
+    assert KEYWORDS.scan("wire the money").any_of(group)
+    assert "evil.zip" in tlds
+    assert list(rules.snapshot().workflows) == ["x"]
+
+
+@pytest.mark.parametrize("pack", [
+    {"keywords": {"no.such.group": ["x"]}},
+    {"domains": {"no.such.list": ["x"]}},
+    {"patterns": {"behavioral.threat": {"add": {"bad": "(?=a)b"}}}},
+    {"workflows": {"w": {"stages": [], "base_score": 1, "message": "m"}}},
+    {"surprise": {}},
+])
+def test_bad_pack_is_rejected_and_rules_stay(manager, pack):
+    rules, path, group, tlds = manager
+    path.write_text(json.dumps({"version": "bad", **pack}))
+    with pytest.raises(ValueError):
+        reload(rules)
+    assert rules.version == "v1"
+    assert rules.errors == 1 and rules.last_error
+
+
+def test_pinned_snapshot_survives_a_swap(manager):
+    rules, path, group, tlds = manager
+    with rules.pinned() as pinned:
+        path.write_text(json.dumps({"version": "v2", "keywords": {"test_packs.money": ["wire"]}}))
+        reload(rules)
+        assert rules.snapshot() is pinned
+        assert KEYWORDS.scan("pay now").any_of(group)
+    assert rules.version == "v2"
+    assert not KEYWORDS.scan("pay now").any_of(group)
+
+
+def test_builtins_are_compiled_once_by_load(tmp_path):
+    rules = RuleManager(None, poll_seconds=0)
+    rules.register_domains("test.tlds", [".tk"])
+    with pytest.raises(RuntimeError):
+        rules.snapshot()
+    rules.load()
+    assert "a.tk" in rules.register_domains("test.tlds", [".TK"])  # unchanged: no-op
+    with pytest.raises(RuntimeError):
+        rules.register_domains("test.tlds", [".zip"])
+    with pytest.raises(RuntimeError):
+        rules.register_workflows({"late": {"stages": [["x"]], "base_score": 1, "message": "m"}})
+    assert "a.zip" not in rules.register_domains("test.tlds", [".tk"])
+
+
+def test_pack_brand_flags_lookalikes(manager):
+    rules, path, group, tlds = manager
+    assert rules.brands.lookup("examplebank.xyz") == []
+    path.write_text(json.dumps({"version": "v2", "brands": {"add": ["examplebank.com"]}}))
+    reload(rules)
+    assert [m.brand for m in rules.brands.lookup("examplebank.xyz")] == ["examplebank"]
+    assert rules.brands.lookup("examplebank.com") == []
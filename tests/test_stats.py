@@ -0,0 +1,87 @@
+import math
+from collections import Counter
+
+from services import stats
+from services.stats import CountMinSketch, DetectionStats, HeavyHitters, RollingWindow
+
+PHISHING = {
+    "verdict": "Phishing Detected",
+    "risk_score": 90,
+    "engine_results": [
+        {"engine_name": "URL Intelligence Engine", "risk_score": 40, "findings": ["Suspicious TLD: a.tk"]},
+        {"engine_name": "NLP", "risk_score": 0, "findings": ["No indicators detected"]},
+    ],
+}
+SAFE = {"verdict": "Likely Safe", "risk_score": 5, "engine_results": []}
+
+
+def test_rolling_window_expires_old_slots():
+    window = RollingWindow(slot_seconds=10, slots=6)  # the last minute
+    window.add(2, now=1000.0)
+    window.add(2, now=1005.0)
+    window.add(0, now=1030.0)
+    assert window.totals(1030.0) == {"safe": 1, "suspicious": 0, "phishing": 2, "scam": 0}
+    # 1000-1009 leaves the window once its slot is 6 slots old
+    assert window.totals(1059.0)["phishing"] == 2
+    assert window.totals(1060.0) == {"safe": 1, "suspicious": 0, "phishing": 0, "scam": 0}
+
+    # The ring comes back round to slot 1000: the stale count is reset
+    window.add(3, now=1060.0)
+    assert window.totals(1060.0) == {"safe": 1, "suspicious": 0, "phishing": 0, "scam": 1}
+    assert window.totals(1200.0) == dict.fromkeys(("safe", "suspicious", "phishing", "scam"), 0)
+
+
+def test_heavy_hitters_find_the_top_k_within_the_sketch_bound():
+    width = 256
+    hitters = HeavyHitters(k=5, sketch=CountMinSketch(width=width, depth=4))
+    # Bursts of heavy items between runs of one-off items of the same length
+    stream = []
+    for rank in range(5):
+        stream += [f"tail-{i}" for i in range(600 * rank, 600 * rank + 600)]
+        stream += [f"heavy-{rank}"] * (400 - 50 * rank)
+
+    for item in stream:
+        hitters.add(item)
+
+    truth = Counter(stream)
+    top = hitters.items()
+    assert sorted(item for item, _ in top) == [f"heavy-{rank}" for rank in range(5)]
+    # Count-min only overestimates, by at most e / width of the stream
+    bound = math.e / width * len(stream)
+    for item, estimate in top:
+        assert truth[item] <= estimate <= truth[item] + bound
+    for item in truth:
+        assert truth[item] <= hitters.sketch.estimate(item) <= truth[item] + bound
+    assert [item for item, _ in top][0] == "heavy-0"
+
+
+def test_snapshot_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(stats.time, "time", lambda: 50000.0)
+    path = str(tmp_path / "stats.json")
+    before = DetectionStats(top_k=5, snapshot_path=path)
+    for _ in range(3):
+        before.record("sms", PHISHING, ["a.tk"])
+    before.record("email", SAFE, ["example.com"])
+    before.save()
+
+    after = DetectionStats(top_k=5, snapshot_path=path)
+    after.load()
+    assert after.snapshot() == before.snapshot()
+    snapshot = after.snapshot()
+    assert snapshot["total_analyses"] == 4
+    assert snapshot["verdicts_by_mode"]["sms"]["phishing"] == 3
+    assert snapshot["engines_triggered"] == {"URL Intelligence Engine": 3}
+    assert snapshot["top_domains"] == [{"domain": "a.tk", "count": 3}]
+    assert snapshot["windows"]["1m"]["safe"] == 1
+
+    # Counting carries on from the restored state
+    after.record("sms", PHISHING, ["a.tk"])
+    assert after.snapshot()["top_findings"] == [{"finding": "Suspicious TLD: a.tk", "count": 4}]
+
+
+def test_unreadable_snapshot_is_ignored(tmp_path):
+    path = tmp_path / "stats.json"
+    path.write_text("{not json")
+    restored = DetectionStats(snapshot_path=str(path))
+    restored.load()
+    assert restored.total_analyses == 0
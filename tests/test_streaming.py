@@ -0,0 +1,72 @@
+from engines.keyword_registry import KeywordAutomaton
+from services.streaming import ResultMerger, TextWindower, iter_windows
+
+FILLER = " ".join(["the quarterly newsletter covers gardening tips"] * 40)
+BODY = f"dear customer you are our lucky winner {FILLER} a small fee of ten dollars releases it"
+
+
+def windows():
+    return list(iter_windows([BODY], TextWindower(window_chars=600, overlap_chars=60)))
+
+
+def test_earlier_phrases_precede_the_window():
+    automaton = KeywordAutomaton(["winner", "small fee"])
+    hits = automaton.scan("a small fee").after({"winner"})
+    assert hits.matched(["winner", "small fee"]) == ["winner", "small fee"]
+    assert hits.position("winner") == -1 and hits.position("small fee") == 2
+    assert hits.phrases() == {"winner", "small fee"}
+
+
+def stream(carry: bool):
+    import server
+
+    merger = ResultMerger()
+    earlier = None
+    for window in windows():
+        results, _, _, _, phrases = server.run_window(window, "general", None, earlier)
+        merger.add(results)
+        earlier = phrases if carry else None
+    return {r["engine_name"]: r["risk_score"] for r in merger.results}
+
+
+def test_signals_in_distant_windows_still_co_occur():
+    parts = windows()
+    assert len(parts) > 2
+    assert "winner" in parts[0] and "small fee" in parts[-1]
+    assert not any("winner" in w and "small fee" in w for w in parts)
+
+    assert "Advance Fee Scam Engine (Hard Rule)" not in stream(carry=False)
+    assert stream(carry=True)["Advance Fee Scam Engine (Hard Rule)"] == 95
+
+
+def result(name, score, findings, **extra):
+    return {"engine_name": name, "risk_score": score, "findings": findings, "confidence": score / 100, **extra}
+
+
+def test_per_url_results_merge_per_url():
+    merger = ResultMerger()
+    merger.add([
+        result("URL Intelligence Engine", 40, ["Suspicious TLD: a.tk"], url="http://a.tk/x"),
+        result("URL Intelligence Engine", 0, ["URL structure appears normal"], url="http://b.com/"),
+    ])
+    merger.add([
+        result("URL Intelligence Engine", 30, ["IP-based URL detected"], url="http://10.0.0.1/"),
+        result("URL Intelligence Engine", 55, ["Tracking / redirect parameters"], url="http://a.tk/x"),
+    ])
+    by_url = {r["url"]: r for r in merger.results}
+    assert list(by_url) == ["http://a.tk/x", "http://b.com/", "http://10.0.0.1/"]
+    assert by_url["http://a.tk/x"]["risk_score"] == 55
+    assert by_url["http://a.tk/x"]["findings"] == ["Suspicious TLD: a.tk", "Tracking / redirect parameters"]
+    assert by_url["http://b.com/"]["risk_score"] == 0
+
+
+def test_hard_rule_variant_is_the_same_engine():
+    merger = ResultMerger()
+    merger.add([result("Advance Fee Scam Engine", 0, ["No advance-fee scam indicators"])])
+    merger.add([result("Advance Fee Scam Engine (Hard Rule)", 85, ["Prize + urgency manipulation detected"])])
+    merger.add([result("Advance Fee Scam Engine", 0, ["No advance-fee scam indicators"])])
+    merger.add([result("Advance Fee Scam Engine (Hard Rule)", 95, ["Prize + payment request detected"])])
+    (merged,) = merger.results
+    assert merged["engine_name"] == "Advance Fee Scam Engine (Hard Rule)"
+    assert merged["risk_score"] == 95
+    assert merged["findings"] == ["Prize + urgency manipulation detected", "Prize + payment request detected"]
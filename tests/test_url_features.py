@@ -0,0 +1,50 @@
+from engines.url_features import tokenize_urls, url_features
+
+
+def test_scheme_less_hosts_need_a_real_tld():
+    urls = tokenize_urls("pay now at paypa1-secure.tk/login or see node.js and file.txt")
+    assert [u.raw for u in urls] == ["paypa1-secure.tk/login"]
+    record = urls[0]
+    assert record.scheme == "" and not record.explicit
+    assert record.url == "http://paypa1-secure.tk/login"
+    assert (record.host, record.tld, record.path) == ("paypa1-secure.tk", "tk", "/login")
+
+    www = tokenize_urls("docs at www.example.co.uk/help")[0]
+    assert www.explicit and www.scheme == ""
+    assert (www.registrable_domain, www.tld) == ("example.co.uk", "co.uk")
+
+
+def test_trailing_punctuation_is_stripped():
+    text = "click http://x.com/a. Or (www.example.com/b?c=1), then bank.com!"
+    assert [u.raw for u in tokenize_urls(text)] == [
+        "http://x.com/a", "www.example.com/b?c=1", "bank.com"
+    ]
+    assert tokenize_urls("see www.example.com/b?c=1),")[0].query == "c=1"
+
+
+def test_idn_hosts_keep_the_written_form_and_decode():
+    punycode, unicode = tokenize_urls("http://xn--80ak6aa92e.com/x and раураl.com!")
+    assert punycode.host == "xn--80ak6aa92e.com"
+    assert punycode.unicode_host == "аррӏе.com"
+    assert punycode.is_idn and unicode.is_idn
+    assert unicode.host == unicode.unicode_host == "раураl.com"
+    assert unicode.mixed_script
+    assert not url_features("http://example.com").is_idn
+
+
+def test_ip_hosts_skip_the_suffix_list():
+    ip = tokenize_urls("login at http://192.168.0.1:8080/admin; now")[0]
+    assert ip.raw == "http://192.168.0.1:8080/admin"
+    assert ip.is_ip and (ip.host, ip.port, ip.path) == ("192.168.0.1", "8080", "/admin")
+    assert ip.tld == "" and ip.registrable_domain == "192.168.0.1"
+    assert ip.idn_labels == ()
+    assert url_features("http://3232235777/x").is_ip
+    assert url_features("http://[::1]:80/").is_ip
+
+
+def test_duplicate_links_share_one_record():
+    urls = tokenize_urls("http://x.com/a then http://x.com/a again, and x.com")
+    assert [u.raw for u in urls] == ["http://x.com/a", "http://x.com/a", "x.com"]
+    assert urls[0] is urls[1]
+    assert urls[2] is not urls[0]
+    assert urls[0].host_entropy is not None and urls[0].path_entropy is not None
@@ -0,0 +1,96 @@
+import asyncio
+
+from services import verdict_cache
+from services.verdict_cache import VerdictCache, cache_key
+
+
+def test_cache_key_covers_every_verdict_input():
+    base = cache_key("verify your account", "email")
+    assert base == cache_key("verify your account", "email")
+    assert len({
+        base,
+        cache_key("verify your account", "sms"),
+        cache_key("verify your account", "email", {"from": "a@b.c"}),
+        cache_key("verify your account", "email", links=("http://10.0.0.1",)),
+        cache_key("verify your account", "email", rules_version="v2"),
+        cache_key("verify your account!", "email"),
+    }) == 6
+    # Header order does not matter
+    assert cache_key("x", "email", {"a": "1", "b": "2"}) == cache_key("x", "email", {"b": "2", "a": "1"})
+
+
+def test_ttl_expiry_and_lru_eviction(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(verdict_cache.time, "monotonic", lambda: now[0])
+    cache = VerdictCache(max_entries=2, ttl=10.0)
+
+    async def run():
+        cache.put("a", {"v": 1})
+        cache.put("b", {"v": 2})
+        assert await cache.get("a") == {"v": 1}
+        cache.put("c", {"v": 3})           # evicts b, the least recently used
+        assert await cache.get("b") is None
+        assert await cache.get("a") == {"v": 1}
+
+        now[0] += 10.0                      # entries expire at put time + ttl
+        assert await cache.get("a") is None
+        assert await cache.get("c") is None
+
+    asyncio.run(run())
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert cache.expirations == 2
+
+
+def test_disabled_cache_never_hits():
+    cache = VerdictCache(max_entries=0)
+
+    async def run():
+        cache.put("a", {"v": 1})
+        return await cache.get("a")
+
+    assert asyncio.run(run()) is None
+
+
+def test_each_message_is_tokenized_once_off_the_loop(monkeypatch):
+    import json
+
+    import server
+    from services.campaigns import CampaignIndex
+
+    jobs = []
+
+    async def run(fn, *args, wait=False):
+        jobs.append(fn.__name__)
+        return fn(*args)
+
+    calls = []
+    tokenize = server.tokenize_urls
+
+    def counting(text):
+        calls.append(text)
+        return tokenize(text)
+
+    monkeypatch.setattr(server.EXECUTOR, "run", run)
+    monkeypatch.setattr(server, "tokenize_urls", counting)
+    monkeypatch.setattr(server.PIPELINE, "_tokenize_urls", counting)
+    monkeypatch.setattr(server, "CAMPAIGNS", CampaignIndex())
+    server.CACHE.clear()
+
+    text = "urgent: verify your account at http://paypa1-login.tk/verify now"
+    result = asyncio.run(server._analyze_one(text, "email", None))
+    assert jobs == ["prepare_message", "run_analysis_timed"]
+    assert calls == [text]
+    assert result["risk_score"] == server.run_analysis(text, "email")["risk_score"]
+
+    jobs.clear()
+    calls.clear()
+    server.CACHE.clear()
+    other = "meeting moved to 3pm, agenda at docs.example.com/agenda"
+    lines = asyncio.run(server._analyze_chunk(
+        [{"content": text, "mode": "email"}, {"content": other}, {"content": 7}], 0
+    )).splitlines()
+    assert jobs == ["prepare_many", "_analyze_many"]
+    assert calls == [text, other]
+    assert [json.loads(line)["index"] for line in lines] == [0, 1, 2]
+    server.CACHE.clear()
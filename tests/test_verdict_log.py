@@ -0,0 +1,127 @@
+import asyncio
+
+from services.verdict_log import MemoryVerdictSink, VerdictLog
+
+
+class FlakySink(MemoryVerdictSink):
+    """Fails the first `failures` inserts."""
+
+    def __init__(self, failures: int):
+        super().__init__()
+        self.failures = failures
+
+    async def insert_many(self, documents):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("storage down")
+        await super().insert_many(documents)
+
+
+def run(scenario):
+    return asyncio.run(scenario())
+
+
+def docs(n, start=0):
+    return [{"n": i} for i in range(start, start + n)]
+
+
+def test_full_batch_flushes_without_waiting_for_the_timer():
+    async def scenario():
+        sink = MemoryVerdictSink()
+        log = VerdictLog(sink, batch_size=3, flush_ms=60_000)
+        log.start()
+        for doc in docs(3):
+            await log.record(doc)
+        await asyncio.sleep(0.05)
+        assert list(sink.documents) == docs(3) and log.batches == 1
+        await log.stop()
+
+    run(scenario)
+
+
+def test_partial_batch_flushes_on_the_timer():
+    async def scenario():
+        sink = MemoryVerdictSink()
+        log = VerdictLog(sink, batch_size=100, flush_ms=20)
+        log.start()
+        await log.record({"n": 0})
+        assert not sink.documents
+        await asyncio.sleep(0.1)
+        assert list(sink.documents) == [{"n": 0}]
+        await log.stop()
+
+    run(scenario)
+
+
+def test_drop_policy_discards_when_full():
+    async def scenario():
+        sink = MemoryVerdictSink()
+        log = VerdictLog(sink, batch_size=100, flush_ms=60_000, max_buffer=2)
+        log.start()
+        for doc in docs(3):
+            await log.record(doc)
+        assert log.dropped == 1
+        await log.stop()
+        assert list(sink.documents) == docs(2)
+
+    run(scenario)
+
+
+def test_block_policy_waits_for_space():
+    async def scenario():
+        sink = MemoryVerdictSink()
+        log = VerdictLog(sink, batch_size=100, flush_ms=50, max_buffer=2, policy="block")
+        log.start()
+        for doc in docs(2):
+            await log.record(doc)
+        waiting = asyncio.ensure_future(log.record({"n": 2}))
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+        await asyncio.wait_for(waiting, 1)
+        await log.stop()
+        assert list(sink.documents) == docs(3) and log.dropped == 0
+
+    run(scenario)
+
+
+def test_block_policy_retries_a_failed_batch():
+    async def scenario():
+        sink = FlakySink(failures=2)
+        log = VerdictLog(sink, batch_size=2, flush_ms=10, policy="block")
+        log.start()
+        for doc in docs(4):
+            await log.record(doc)
+        await asyncio.sleep(0.2)
+        assert list(sink.documents) == docs(4)
+        assert log.errors == 2 and log.dropped == 0
+        await log.stop()
+
+    run(scenario)
+
+
+def test_drop_policy_counts_a_failed_batch_as_dropped():
+    async def scenario():
+        sink = FlakySink(failures=1)
+        log = VerdictLog(sink, batch_size=2, flush_ms=60_000)
+        log.start()
+        for doc in docs(4):
+            await log.record(doc)
+        await log.stop()
+        assert log.errors == 1 and log.dropped == 2
+        assert list(sink.documents) == docs(2, start=2)
+
+    run(scenario)
+
+
+def test_stop_flushes_everything_buffered():
+    async def scenario():
+        sink = MemoryVerdictSink()
+        log = VerdictLog(sink, batch_size=2, flush_ms=60_000)
+        log.start()
+        for doc in docs(5):
+            await log.record(doc)
+        await log.stop()
+        assert list(sink.documents) == docs(5)
+        assert log.stats()["buffered"] == 0 and log.written == 5
+
+    run(scenario)
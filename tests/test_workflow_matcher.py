@@ -0,0 +1,57 @@
+import random
+
+from engines.workflow_matcher import WorkflowMatcher, token_stream
+
+WORKFLOWS = {
+    "delivery": {"stages": (("delivery", "package", "parcel"), ("failed", "pending", "held"), ("confirm", "verify", "link"))},
+    "otp": {"stages": (("otp", "code"), ("share", "enter", "send"))},
+    "prize": {"stages": (("winner", "won"), ("prize", "gift"), ("claim",))},
+    "repeat": {"stages": (("verify",), ("verify",))},
+}
+
+
+def old_loop(text, stages):
+    """The per-workflow word loop this matcher replaced."""
+    index = 0
+    words = text.split()
+    for stage in stages:
+        for i in range(index, len(words)):
+            if any(keyword in words[i] for keyword in stage):
+                index = i + 1
+                break
+        else:
+            return False
+    return True
+
+
+def test_agrees_with_the_old_per_word_loop():
+    matcher = WorkflowMatcher(WORKFLOWS)
+    vocab = sorted({k for w in WORKFLOWS.values() for stage in w["stages"] for k in stage})
+    vocab += ["the", "a", "link:", "unverified", "codes!", "xx"]
+    rng = random.Random(0)
+    for _ in range(20000):
+        words = [rng.choice(vocab) + rng.choice(["", "", "s", "."]) for _ in range(rng.randint(0, 20))]
+        text = rng.choice([" ", "  ", "\n"]).join(words)
+        expected = [name for name, w in WORKFLOWS.items() if old_loop(text, w["stages"])]
+        assert matcher.matched(token_stream(text)) == expected, text
+
+
+def test_multi_word_phrases_match_across_whitespace():
+    matcher = WorkflowMatcher({"otp": {"stages": (("one time password",), ("share",))}})
+    assert matcher.matched(token_stream("your one  time\npassword, share it")) == ["otp"]
+    assert matcher.matched(token_stream("share your one time password")) == []
+
+
+def test_overlapping_phrases_need_a_later_word():
+    matcher = WorkflowMatcher({"w": {"stages": (("code",), ("verification code",))}})
+    assert matcher.matched("verification code") == []
+    assert matcher.matched("code then verification code") == ["w"]
+
+
+def test_max_gap_in_words():
+    matcher = WorkflowMatcher({"g": {"stages": (("a",), ("b",)), "max_gap": 1}})
+    assert matcher.matched("a b") == ["g"]
+    assert matcher.matched("a x b") == ["g"]
+    assert matcher.matched("a x y b") == []
+    # A later first stage restarts the gap
+    assert matcher.matched("a x y a b") == ["g"]